@@ -1,27 +1,405 @@
 import random
-import io
+import os
+import heapq
+from array import array
+from collections import OrderedDict
 
-from matplotlib import pyplot as plt
+from simulation_log import record_simulation
+
+# simulate的输出级别：不输出、只在结束时输出计数、只输出缺页和置换事件、输出每一步的内存状态
+TRACE_NONE = 'none'
+TRACE_COUNTERS = 'counters'
+TRACE_EVENTS = 'events'
+TRACE_FULL = 'full'
+TRACE_LEVELS = (TRACE_NONE, TRACE_COUNTERS, TRACE_EVENTS, TRACE_FULL)
+
+# 访问类型：与页面序列等长的访问类型序列（如bytearray、numpy.uint8数组）中每项取以下值之一
+ACCESS_READ = 0
+ACCESS_WRITE = 1
+
+
+def as_page_sequence(page_sequence):
+    """
+    将支持缓冲区协议的一维整数数组（如numpy.ndarray、array.array）包装为memoryview，
+    不复制数据即可按Python整数逐个迭代和随机访问；其他序列原样返回。
+
+    参数:
+    page_sequence: 页面请求序列。
+
+    返回:
+    页面请求序列或其memoryview。
+    """
+    if isinstance(page_sequence, (list, tuple, range)):
+        return page_sequence
+    try:
+        view = memoryview(page_sequence)
+    except TypeError:
+        return page_sequence
+    if view.ndim != 1 or view.format.lstrip('@=<>!') not in 'bBhHiIlLqQ':
+        return page_sequence
+    return view
 
 
 class PageReplacementAlgorithm:
+    # 置换时新页面是否原位占据被置换页面所在的帧（时钟类算法），否则被置换页面移除、新页面追加在末尾
+    replaces_in_place = False
+    # 是否支持用resize改变物理块数
+    resizable = False
+    # 不随检查点保存的属性：大小与页面序列长度成正比、可以由页面序列重建的状态，由restore重建
+    transient_state = ()
+
     def __init__(self, frames):
         self.frames = frames  # 物理内存块的数量
         self.memory = []  # 当前内存块的状态
         self.page_faults = 0  # 缺页的数量
         self.page_hits = 0  # 页面命中的数量
         self.replacements = 0  # 置换的数量
+        self.page_writes = 0  # 写访问的数量
+        self.dirty = set()  # 内存中被写过、尚未写回的页面
+        self.dirty_evictions = 0  # 置换出脏页面的数量，每次都需要同步写回
+        self.write_backs = 0  # 写回交换设备的页面数量，包括置换脏页面和提前清理脏页面
+        # 滑动窗口：最近window_size次访问是否缺页的环形缓冲区，由set_window启用
+        self.window = None
+        self.window_position = 0  # 下一次访问写入环形缓冲区的位置
+        self.window_count = 0  # 窗口中已有的访问次数，窗口填满前小于窗口大小
+        self.window_faults = 0  # 窗口中的缺页次数
 
-    def simulate(self, page_sequence, file):
+    def simulate(self, page_sequence, file=None, trace=TRACE_NONE, access_types=None):
         """
         模拟页面置换过程。
 
         参数:
         page_sequence (list): 页面请求序列。
-        file: 用于输出结果的文件对象。
+        file: 用于输出结果的文件对象，trace为TRACE_NONE时可以为None。
+        trace (str): 输出级别，TRACE_LEVELS之一，默认不输出。
+        access_types: 与页面序列等长的访问类型序列（ACCESS_READ或ACCESS_WRITE），为None时全部视为读访问。
+        """
+        if trace not in TRACE_LEVELS:
+            raise ValueError(f"未知的输出级别: {trace}")
+        if trace != TRACE_NONE and file is None:
+            raise ValueError("输出级别不是TRACE_NONE时必须提供输出文件。")
+        page_sequence = as_page_sequence(page_sequence)
+        if trace == TRACE_FULL:
+            file.writelines(self.snapshots(page_sequence, access_types))
+        elif trace == TRACE_EVENTS:
+            file.writelines(self.events(page_sequence, access_types))
+        else:
+            self.prepare(page_sequence)
+            if access_types is None:
+                reference_page = self.reference_page
+                for page in page_sequence:
+                    reference_page(page)
+            else:
+                reference_access = self.reference_access
+                for page, access_type in zip(page_sequence, as_page_sequence(access_types)):
+                    reference_access(page, access_type)
+            if trace == TRACE_COUNTERS:
+                file.write(self.summary())
+
+    def prepare(self, page_sequence):
+        """
+        模拟开始前的准备工作，需要预知整个页面序列的算法（如OPT）重写此方法。
+
+        参数:
+        page_sequence (list): 页面请求序列。
+        """
+
+    def restore(self, page_sequence):
+        """
+        从检查点恢复后、继续模拟前重建transient_state中的属性，有这类属性的算法（如OPT）重写此方法。
+
+        参数:
+        page_sequence (list): 与保存检查点时相同的完整页面请求序列。
+        """
+
+    def __getstate__(self):
+        # 检查点（pickle）只保存与物理块数成正比的状态，不保存transient_state和实例上替换的方法（如统计钩子）
+        return {name: value for name, value in self.__dict__.items()
+                if name not in self.transient_state and not callable(value)}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        for name in self.transient_state:
+            setattr(self, name, None)
+
+    def clone(self):
+        """
+        返回状态完全相同的新实例，供从同一状态出发尝试多种后续访问的搜索使用。
+        每个容器属性只复制一层（容器中只有页面编号等不可变值），比copy.deepcopy快得多；
+        容器中嵌套容器的算法（如LFU）需要重写此方法。
+
+        返回:
+        新的算法实例。
+        """
+        new = object.__new__(type(self))
+        new.__dict__ = {name: value.copy() if hasattr(value, 'copy') else value
+                        for name, value in self.__getstate__().items()}
+        for name in self.transient_state:
+            new.__dict__[name] = self.__dict__[name]  # 可以由页面序列重建的状态只读，直接共用
+        return new
+
+    def reference_page(self, page):
+        """
+        处理一次页面访问，更新内存状态和计数。
+
+        参数:
+        page (int): 被访问的页面编号。
+
+        返回:
+        被置换出内存的页面编号，没有发生置换时返回None。
         """
         raise NotImplementedError("子类必须重写此方法。")
 
+    def reference_access(self, page, access_type):
+        """
+        处理一次带访问类型的页面访问：置换出脏页面时记录一次写回，写访问把页面标记为脏页面。
+
+        参数:
+        page (int): 被访问的页面编号。
+        access_type (int): ACCESS_READ或ACCESS_WRITE。
+
+        返回:
+        被置换出内存的页面编号，没有发生置换时返回None。
+        """
+        evicted = self.reference_page(page)
+        if evicted is not None and evicted in self.dirty:
+            self.dirty.remove(evicted)
+            self.dirty_evictions += 1
+            self.write_backs += 1
+        if access_type == ACCESS_WRITE:
+            self.page_writes += 1
+            self.mark_dirty(page)
+        return evicted
+
+    def mark_dirty(self, page):
+        """
+        把内存中的页面标记为脏页面，记录修改位的算法（如EnhancedCLOCK）重写此方法同步修改位。
+
+        参数:
+        page (int): 被写的页面编号。
+        """
+        self.dirty.add(page)
+
+    def resize(self, frames):
+        """
+        改变物理块数（供多道程序模拟中的动态分配使用）：增加时保留所有驻留页面，减少时按算法自身的淘汰顺序
+        移出多余的页面，移出的脏页面记录一次写回，不计入置换次数。
+
+        参数:
+        frames (int): 新的物理块数，至少为1。
+
+        返回:
+        list: 被移出内存的页面。
+        """
+        if not self.resizable:
+            raise NotImplementedError(f"{self.__class__.__name__} 不支持改变物理块数。")
+        if frames < 1:
+            raise ValueError("物理块数必须是正整数。")
+        evicted = []
+        while len(self.memory) > frames:
+            evicted.append(self.evict_page())
+        self.frames = frames
+        self.write_back_evicted(evicted)
+        return evicted
+
+    def evict_page(self):
+        """
+        按算法的淘汰顺序移出一个驻留页面，不计入置换次数，支持resize的子类重写此方法。
+
+        返回:
+        被移出内存的页面编号。
+        """
+        raise NotImplementedError("子类必须重写此方法。")
+
+    def write_back_evicted(self, evicted):
+        # resize移出的脏页面与置换出的脏页面一样需要写回
+        for page in evicted:
+            if page in self.dirty:
+                self.dirty.remove(page)
+                self.dirty_evictions += 1
+                self.write_backs += 1
+
+    def set_window(self, window_size):
+        """
+        启用滑动窗口缺页率统计，之后每次access都以O(1)的代价更新窗口。
+
+        参数:
+        window_size (int): 窗口包含的最近访问次数。
+        """
+        if window_size <= 0:
+            raise ValueError("窗口大小必须是正整数。")
+        self.window = bytearray(window_size)
+        self.window_position = self.window_count = self.window_faults = 0
+
+    def access(self, page, access_type=ACCESS_READ):
+        """
+        在线处理一次页面访问：不需要预先知道整个页面序列，计数和滑动窗口随之更新，
+        可以随时用metrics读取当前的统计。需要预知未来访问的OPT不支持在线访问。
+
+        参数:
+        page (int): 被访问的页面编号。
+        access_type (int): ACCESS_READ或ACCESS_WRITE。
+
+        返回:
+        被置换出内存的页面编号，没有发生置换时返回None。
+        """
+        page_faults = self.page_faults
+        evicted = self.reference_access(page, access_type)
+        window = self.window
+        if window is not None:
+            fault = self.page_faults != page_faults
+            position = self.window_position
+            self.window_faults += fault - window[position]
+            window[position] = fault
+            self.window_position = position + 1 if position + 1 < len(window) else 0
+            if self.window_count < len(window):
+                self.window_count += 1
+        return evicted
+
+    def access_batch(self, pages, access_types=None):
+        """
+        在线处理一批页面访问，例如从管道或套接字读到的一块数据。
+
+        参数:
+        pages: 页面编号序列（如列表、numpy数组）。
+        access_types: 与pages等长的访问类型序列，为None时全部视为读访问。
+
+        返回:
+        int: 这批访问中的缺页次数。
+        """
+        page_faults = self.page_faults
+        access = self.access
+        if access_types is None:
+            for page in as_page_sequence(pages):
+                access(page)
+        else:
+            for page, access_type in zip(as_page_sequence(pages), as_page_sequence(access_types)):
+                access(page, access_type)
+        return self.page_faults - page_faults
+
+    def get_window_fault_rate(self):
+        """
+        计算滑动窗口内的缺页率。
+
+        返回:
+        float: 最近window_size次访问（窗口未填满时为已有的访问）中的缺页率，没有访问时为0。
+        """
+        if self.window is None:
+            raise RuntimeError("请先调用set_window启用滑动窗口。")
+        return self.window_faults / self.window_count if self.window_count else 0.0
+
+    def metrics(self):
+        """
+        返回当前的运行统计，代价为O(1)，可以在在线模拟过程中随时调用。
+
+        返回:
+        dict: 访问次数、缺页、命中、置换次数，累计缺页率和置换率，启用滑动窗口时还有窗口缺页率。
+        """
+        references = self.page_faults + self.page_hits
+        metrics = {
+            'references': references,
+            'page_faults': self.page_faults,
+            'page_hits': self.page_hits,
+            'replacements': self.replacements,
+            'page_fault_rate': self.page_faults / references if references else 0.0,
+            'replacement_rate': self.replacements / references if references else 0.0,
+        }
+        if self.page_writes:
+            metrics['dirty_evictions'] = self.dirty_evictions
+            metrics['write_backs'] = self.write_backs
+        if self.window is not None:
+            metrics['window_fault_rate'] = self.get_window_fault_rate()
+        return metrics
+
+    def steps(self, page_sequence, access_types=None):
+        """
+        逐个页面地模拟页面置换过程的生成器，调用方每取一项才处理一个页面。
+
+        参数:
+        page_sequence (list): 页面请求序列。
+        access_types: 与页面序列等长的访问类型序列，为None时全部视为读访问。
+
+        返回:
+        generator: 每次产生 (序列号, 页面, 是否命中, 被置换的页面或None)。
+        """
+        page_sequence = as_page_sequence(page_sequence)
+        self.prepare(page_sequence)
+        if access_types is None:
+            reference_page = self.reference_page
+            for counter, page in enumerate(page_sequence, start=1):
+                page_hits = self.page_hits
+                evicted = reference_page(page)
+                yield counter, page, self.page_hits != page_hits, evicted
+        else:
+            reference_access = self.reference_access
+            for counter, (page, access_type) in enumerate(zip(page_sequence, as_page_sequence(access_types)), start=1):
+                page_hits = self.page_hits
+                evicted = reference_access(page, access_type)
+                yield counter, page, self.page_hits != page_hits, evicted
+
+    def snapshots(self, page_sequence, access_types=None):
+        """
+        逐行产生每一步内存状态的生成器，供界面或文件按需拉取。
+
+        参数:
+        page_sequence (list): 页面请求序列。
+        access_types: 与页面序列等长的访问类型序列，为None时全部视为读访问。
+
+        返回:
+        generator: 每次产生一行 "序列号: 算法名 - Memory state: [...]" 文本。
+        """
+        for counter, _, _, _ in self.steps(page_sequence, access_types):
+            yield self.snapshot_line(counter)
+
+    def snapshot_line(self, counter):
+        """
+        参数:
+        counter (int): 序列号（从1开始）。
+
+        返回:
+        str: 一行 "序列号: 算法名 - Memory state: [...]" 文本，内容为当前的内存状态。
+        """
+        return f"{counter}: {self.__class__.__name__} - Memory state: {self.memory_state()}\n"
+
+    def events(self, page_sequence, access_types=None):
+        """
+        只对缺页逐行产生事件文本的生成器。
+
+        参数:
+        page_sequence (list): 页面请求序列。
+        access_types: 与页面序列等长的访问类型序列，为None时全部视为读访问。
+
+        返回:
+        generator: 每次缺页产生一行 "序列号: 算法名 - Page fault: 页面[, evicted: 被置换页面]" 文本。
+        """
+        name = self.__class__.__name__
+        for counter, page, hit, evicted in self.steps(page_sequence, access_types):
+            if hit:
+                continue
+            if evicted is None:
+                yield f"{counter}: {name} - Page fault: {page}\n"
+            else:
+                yield f"{counter}: {name} - Page fault: {page}, evicted: {evicted}\n"
+
+    def summary(self):
+        """
+        返回:
+        str: 一行包含物理块数、缺页、命中和置换次数（有写访问时还有写回次数）的汇总文本。
+        """
+        text = (f"{self.__class__.__name__} - Frames: {self.frames}, Page faults: {self.page_faults}, "
+                f"Page hits: {self.page_hits}, Replacements: {self.replacements}")
+        if self.page_writes:
+            # 只有带写访问的模拟才输出写回计数，纯读模拟的输出保持不变
+            text += f", Dirty evictions: {self.dirty_evictions}, Write-backs: {self.write_backs}"
+        return text + "\n"
+
+    def memory_state(self):
+        """
+        返回:
+        list: 当前内存中的页面列表。
+        """
+        return list(self.memory)
+
     def is_page_in_memory(self, page):
         """
         检查页面是否已在内存中。
@@ -67,213 +445,833 @@ class PageReplacementAlgorithm:
 
 # FIFO (First In, First Out)先进先出算法实现
 class FIFO(PageReplacementAlgorithm):
+    resizable = True
+
     def __init__(self, frames):
         super().__init__(frames)
-        self.queue = []  # 用于跟踪页面插入顺序的FIFO队列
-
-    def simulate(self, page_sequence, file):
-        counter = 1  # 初始化序列号计数器
-        for page in page_sequence:
-            if not self.is_page_in_memory(page):  # 如果页面不在内存中
-                self.record_page_fault()  # 记录缺页
-                if len(self.memory) == self.frames:  # 如果内存已满
-                    # 移除FIFO队列中最早的页面，并从内存中移除该页面
-                    self.memory.remove(self.queue.pop(0))
-                    self.replacements += 1  # 增加置换次数
-                # 将新页面添加到内存和FIFO队列中
-                self.memory.append(page)
-                self.queue.append(page)
-            else:  # 如果页面已在内存中
-                self.record_page_hit()  # 记录页面命中
-            # 将当前内存状态写入文件，每行前加上序列号
-            file.write(f"{counter}: {self.__class__.__name__} - Memory state: {self.memory}\n")
-            counter += 1  # 序列号递增
+        # 内存用按装入顺序排列的有序字典表示（页面 -> None），它本身就是FIFO队列，表头即最早装入的页面
+        self.memory = OrderedDict()
+
+    def reference_page(self, page):
+        evicted = None
+        if page not in self.memory:  # 如果页面不在内存中
+            self.record_page_fault()  # 记录缺页
+            if len(self.memory) == self.frames:  # 如果内存已满
+                # 移除最早装入的页面
+                evicted = self.evict_page()
+                self.replacements += 1  # 增加置换次数
+            # 将新页面添加到内存队尾
+            self.memory[page] = None
+        else:  # 如果页面已在内存中
+            self.record_page_hit()  # 记录页面命中
+        return evicted
+
+    def evict_page(self):
+        page, _ = self.memory.popitem(last=False)
+        return page
 
 
 # LRU (Least Recently Used)最近最少使用算法实现
 class LRU(PageReplacementAlgorithm):
+    resizable = True
+
     def __init__(self, frames):
         super().__init__(frames)
-        self.page_time = {}  # 用于跟踪每个页面最后一次访问时间的字典
-
-    def simulate(self, page_sequence, file):
-        time = 0  # 初始化时间，用于记录页面访问时间
-        for page in page_sequence:
-            if not self.is_page_in_memory(page):
-                self.record_page_fault()  # 如果页面不在内存中，记录缺页
-                if len(self.memory) == self.frames:
-                    # 如果内存已满，找到最久未使用的页面（访问时间最早的页面）
-                    oldest_page = min(self.page_time, key=self.page_time.get)
-                    self.memory.remove(oldest_page)  # 从内存中移除最久未使用的页面
-                    del self.page_time[oldest_page]  # 从访问时间字典中删除该页面
-                    self.replacements += 1  # 增加置换次数
-                self.memory.append(page)  # 将新页面添加到内存中
-                self.page_time[page] = time  # 更新新页面的访问时间
-            else:
-                self.record_page_hit()  # 如果页面已在内存中，记录页面命中
-                self.page_time[page] = time  # 更新页面的访问时间
-            # 写入文件时，加上序列号和内存状态
-            file.write(f"{time + 1}: {self.__class__.__name__} - Memory state: {self.memory}\n")
-            time += 1  # 时间递增，对应下一个页面请求
+        # 内存用按装入顺序排列的字典表示（页面 -> None），成员检查和删除均为O(1)
+        self.memory = {}
+        # 按最近访问顺序排列的有序字典（页面 -> 最后访问时间），表头即最久未使用的页面
+        self.page_time = OrderedDict()
+        self.time = 0  # 时间，用于记录页面访问时间
+
+    def reference_page(self, page):
+        evicted = None
+        if page not in self.memory:
+            self.record_page_fault()  # 如果页面不在内存中，记录缺页
+            if len(self.memory) == self.frames:
+                # 如果内存已满，弹出有序字典表头，即最久未使用的页面，并从内存中移除
+                evicted = self.evict_page()
+                self.replacements += 1  # 增加置换次数
+            self.memory[page] = None  # 将新页面添加到内存中
+            self.page_time[page] = self.time  # 新页面排在有序字典末尾，即最近使用的位置
+        else:
+            self.record_page_hit()  # 如果页面已在内存中，记录页面命中
+            self.page_time[page] = self.time  # 更新页面的访问时间
+            self.page_time.move_to_end(page)  # 将页面移到最近使用的位置
+        self.time += 1  # 时间递增，对应下一个页面请求
+        return evicted
+
+    def evict_page(self):
+        page, _ = self.page_time.popitem(last=False)
+        del self.memory[page]
+        return page
 
 
 # OPT (Optimal Page Replacement Algorithm)最佳页面置换算法实现
 class OPT(PageReplacementAlgorithm):
-    def simulate(self, page_sequence, file):
-        counter = 1  # 序列号计数器，用于输出的行前缀
-        for i, page in enumerate(page_sequence):
-            # 遍历页面请求序列，`i` 是索引，`page` 是页面编号
-            if not self.is_page_in_memory(page):
-                # 如果页面不在内存中，记录一次缺页
-                self.record_page_fault()
-                if len(self.memory) == self.frames:
-                    # 如果内存已满，找出未来最长时间内不会被访问的页面
-                    longest_unused_page = self.find_longest_unused_page(page_sequence[i + 1:])
-                    # 从内存中移除这个页面
-                    self.memory.remove(longest_unused_page)
-                    self.replacements += 1  # 增加置换次数
-                # 将当前请求的页面添加到内存中
-                self.memory.append(page)
-            else:
-                # 如果页面已经在内存中，记录一次页面命中
-                self.record_page_hit()
-            # 将当前内存状态写入文件，每行前加上序列号
-            file.write(f"{counter}: {self.__class__.__name__} - Memory state: {self.memory}\n")
-            counter += 1  # 更新序列号
-
-    def find_longest_unused_page(self, future_sequence):
-        # 在未来的页面请求序列中找出最长时间内不会被访问的页面
-        last_used = -1  # 最远的未来索引
-        page_to_replace = None  # 将要被替换的页面
-        for page in self.memory:
-            # 遍历当前内存中的页面
-            if page not in future_sequence:
-                # 如果页面不在未来序列中，直接返回该页面
+    transient_state = ('next_occurrence',)
+
+    def __init__(self, frames):
+        super().__init__(frames)
+        # 内存用按装入顺序排列的字典表示（页面 -> 装入序号），成员检查和删除均为O(1)
+        self.memory = {}
+        self.next_use = {}  # 每个驻留页面下一次被访问的位置
+        # 以下一次访问位置为键的最大堆（存负值），堆中可能残留已失效的条目，弹出时跳过
+        self.heap = []
+        self.load_counter = 0  # 装入序号计数器，用于在多个页面都不再被访问时按装入顺序选择
+        self.next_occurrence = None  # 页面序列中每个位置上的页面下一次出现的位置
+        self.position = 0  # 当前处理到页面序列的位置
+
+    def prepare(self, page_sequence):
+        if not hasattr(page_sequence, '__len__'):
+            raise TypeError("OPT需要可随机访问的完整页面序列，流式trace请先用trace_loader.write_binary_trace转换为二进制文件。")
+        # 一次逆序遍历预先求出每个位置上的页面下一次出现的位置
+        self.next_occurrence = build_next_occurrence(page_sequence)
+        self.position = 0
+
+    def restore(self, page_sequence):
+        # 下一次出现的位置按整个序列计算，position仍是检查点中的位置
+        self.next_occurrence = build_next_occurrence(page_sequence)
+
+    def reference_page(self, page):
+        if self.next_occurrence is None:
+            raise RuntimeError("OPT需要预知整个页面序列，请先调用prepare，不能用于在线访问。")
+        evicted = None
+        if page not in self.memory:
+            # 如果页面不在内存中，记录一次缺页
+            self.record_page_fault()
+            if len(self.memory) == self.frames:
+                # 如果内存已满，找出未来最长时间内不会被访问的页面并从内存中移除
+                evicted = self.find_longest_unused_page()
+                del self.memory[evicted]
+                del self.next_use[evicted]
+                self.replacements += 1  # 增加置换次数
+            # 将当前请求的页面添加到内存中
+            self.memory[page] = self.load_counter
+            self.load_counter += 1
+        else:
+            # 如果页面已经在内存中，记录一次页面命中
+            self.record_page_hit()
+        # 更新页面的下一次访问位置，并压入堆中（旧条目随之失效）
+        next_use = self.next_occurrence[self.position]
+        self.next_use[page] = next_use
+        heapq.heappush(self.heap, (-next_use, self.memory[page], page))
+        if len(self.heap) > 2 * self.frames + 16:
+            self.compact_heap()
+        self.position += 1
+        return evicted
+
+    def find_longest_unused_page(self):
+        # 从堆顶弹出未来最长时间内不会被访问的页面，跳过已失效的条目
+        while True:
+            negative_next_use, _, page = heapq.heappop(self.heap)
+            if self.next_use.get(page) == -negative_next_use:
+                # 若有多个页面都不再被访问，装入序号最小（最早进入内存）的页面排在堆顶
                 return page
-            index = future_sequence.index(page)
-            # 找到页面在未来序列中最远的索引位置
-            if index > last_used:
-                last_used = index
-                page_to_replace = page
-        # 返回最长时间内不会被访问的页面
-        return page_to_replace
+
+    def compact_heap(self):
+        # 失效条目过多时，只用驻留页面的当前条目重建堆
+        self.heap = [(-self.next_use[page], load_order, page) for page, load_order in self.memory.items()]
+        heapq.heapify(self.heap)
+
+
+def build_next_occurrence(page_sequence):
+    """
+    逆序遍历一次页面序列，求出每个位置上的页面下一次出现的位置。
+
+    参数:
+    page_sequence (list): 页面请求序列。
+
+    返回:
+    array: 与序列等长的数组，第i项为页面page_sequence[i]下一次出现的位置，不再出现则为序列长度。
+    """
+    never = len(page_sequence)
+    next_occurrence = array('q', [never]) * never
+    last_seen = {}  # 每个页面在已遍历部分（即序列后部）中最早出现的位置
+    for i in range(never - 1, -1, -1):
+        page = page_sequence[i]
+        next_occurrence[i] = last_seen.get(page, never)
+        last_seen[page] = i
+    return next_occurrence
 
 
 # LFU (Least Frequently Used Page Replacement Algorithm)最不常用页面置换算法实现
 class LFU(PageReplacementAlgorithm):
-    def __init__(self, frames):
+    # 同频率页面的淘汰顺序：fifo淘汰最早进入内存的页面，lru淘汰最久未访问的页面
+    TIE_BREAKS = ('fifo', 'lru')
+    resizable = True
+
+    def __init__(self, frames, tie_break='fifo', aging_interval=None):
         super().__init__(frames)
+        if tie_break not in self.TIE_BREAKS:
+            raise ValueError(f"未知的同频率淘汰顺序: {tie_break}")
+        self.tie_break = tie_break
+        self.aging_interval = aging_interval  # 每隔多少次访问将所有页面的访问频率减半，None表示不老化
+        # 内存用按装入顺序排列的字典表示（页面 -> 装入序号），成员检查和删除均为O(1)
+        self.memory = {}
         self.page_frequency = {}  # 页面频率字典，用于记录每个页面的访问频率
+        # 频率桶：频率 -> 该频率的页面，按进入该桶的先后排列，桶头即同频率中最久未访问的页面
+        self.buckets = {}
+        # fifo顺序下每个桶另有一个按装入序号排列的小顶堆，堆中可能残留已失效的条目
+        self.bucket_heaps = {}
+        self.min_frequency = 0  # 当前最小的访问频率
+        self.load_counter = 0  # 装入序号计数器
 
-    def simulate(self, page_sequence, file):
-        counter = 1  # 序列号计数器，用于输出的行前缀
-        for page in page_sequence:
-            if not self.is_page_in_memory(page):
-                self.record_page_fault()  # 如果页面不在内存中，记录缺页
-                if len(self.memory) == self.frames:
-                    # 如果内存已满，找出最少使用的页面
-                    least_frequent_page = self.find_least_frequent_page()
-                    self.memory.remove(least_frequent_page)  # 移除最少使用的页面
-                    del self.page_frequency[least_frequent_page]  # 删除该页面的频率记录
-                    self.replacements += 1  # 记录一次置换
-                self.memory.append(page)  # 将新页面添加到内存中
-                self.page_frequency[page] = 1  # 初始化新页面的访问频率
-            else:
-                self.record_page_hit()  # 如果页面已在内存中，记录页面命中
-                self.page_frequency[page] += 1  # 增加页面的访问频率
+    def reference_page(self, page):
+        evicted = None
+        if page not in self.memory:
+            self.record_page_fault()  # 如果页面不在内存中，记录缺页
+            if len(self.memory) == self.frames:
+                # 如果内存已满，找出最少使用的页面
+                evicted = self.find_least_frequent_page()
+                # 移除最少使用的页面，并删除该页面的频率记录
+                self.remove_from_bucket(evicted, self.page_frequency.pop(evicted))
+                del self.memory[evicted]
+                self.replacements += 1  # 记录一次置换
+            self.memory[page] = self.load_counter  # 将新页面添加到内存中
+            self.load_counter += 1
+            self.page_frequency[page] = 1  # 初始化新页面的访问频率
+            self.add_to_bucket(page, 1)
+            self.min_frequency = 1
+        else:
+            self.record_page_hit()  # 如果页面已在内存中，记录页面命中
+            # 增加页面的访问频率，即把页面移到下一个频率桶
+            frequency = self.page_frequency[page]
+            self.remove_from_bucket(page, frequency)
+            if frequency == self.min_frequency and frequency not in self.buckets:
+                self.min_frequency += 1
+            self.page_frequency[page] = frequency + 1
+            self.add_to_bucket(page, frequency + 1)
+        if self.aging_interval and (self.page_faults + self.page_hits) % self.aging_interval == 0:
+            self.age()
+        return evicted
 
-            # 写入文件时，加上序列号和内存状态
-            file.write(f"{counter}: {self.__class__.__name__} - Memory state: {self.memory}\n")
-            counter += 1  # 序列号递增
+    def clone(self):
+        new = super().clone()
+        new.buckets = {frequency: bucket.copy() for frequency, bucket in self.buckets.items()}
+        new.bucket_heaps = {frequency: heap.copy() for frequency, heap in self.bucket_heaps.items()}
+        return new
+
+    def evict_page(self):
+        page = self.find_least_frequent_page()
+        self.remove_from_bucket(page, self.page_frequency.pop(page))
+        del self.memory[page]
+        if self.min_frequency not in self.buckets:
+            self.min_frequency = min(self.buckets, default=0)
+        return page
+
+    def add_to_bucket(self, page, frequency):
+        # 将页面放入对应频率桶的末尾
+        bucket = self.buckets.get(frequency)
+        if bucket is None:
+            bucket = self.buckets[frequency] = OrderedDict()
+        bucket[page] = None
+        if self.tie_break == 'fifo':
+            heap = self.bucket_heaps.setdefault(frequency, [])
+            heapq.heappush(heap, (self.memory[page], page))
+            if len(heap) > 2 * len(bucket) + 16:
+                # 失效条目过多时，只用桶内页面的当前条目重建堆
+                heap[:] = [(self.memory[bucket_page], bucket_page) for bucket_page in bucket]
+                heapq.heapify(heap)
+
+    def remove_from_bucket(self, page, frequency):
+        # 将页面从频率桶中移除，桶空时一并删除
+        bucket = self.buckets[frequency]
+        del bucket[page]
+        if not bucket:
+            del self.buckets[frequency]
+            self.bucket_heaps.pop(frequency, None)
 
     def find_least_frequent_page(self):
-        # 找出访问频率最少的页面
-        least_used = min(self.page_frequency.values())  # 获取最小的访问频率
-        least_frequent_pages = [page for page in self.page_frequency if self.page_frequency[page] == least_used]
+        # 找出访问频率最少的页面，即最小频率桶中按淘汰顺序排在最前的页面
+        bucket = self.buckets[self.min_frequency]
+        if self.tie_break == 'lru':
+            return next(iter(bucket))
         # 在有最小访问频率的页面中，找出最早进入内存的页面
-        for page in self.memory:
-            if page in least_frequent_pages:
-                return page  # 返回最少使用的页面
+        heap = self.bucket_heaps[self.min_frequency]
+        while True:
+            load_order, page = heap[0]
+            if page in bucket and self.memory[page] == load_order:
+                return page
+            heapq.heappop(heap)
+
+    def age(self):
+        # 老化：所有页面的访问频率减半（至少为1），并按新频率重建频率桶
+        buckets = self.buckets
+        self.buckets, self.bucket_heaps = {}, {}
+        for frequency in sorted(buckets):
+            for page in buckets[frequency]:
+                self.page_frequency[page] = max(1, frequency >> 1)
+                self.add_to_bucket(page, self.page_frequency[page])
+        self.min_frequency = min(self.buckets, default=0)
 
 
 # SimpleCLOCK (Simple CLOCK Page Replacement Algorithm)简单时钟页面置换算法实现
 class SimpleCLOCK(PageReplacementAlgorithm):
+    replaces_in_place = True
+    resizable = True
+
     def __init__(self, frames):
         super().__init__(frames)
-        self.use_bit = {i: False for i in range(frames)}  # 用位字典，记录每个帧是否被访问过
+        self.use_bit = bytearray(frames)  # 用位数组，每帧一个字节，记录每个帧是否被访问过
+        self.frame_of = {}  # 页面 -> 所在帧（即在memory中的位置），用于O(1)判断页面是否在内存中
         self.hand = 0  # 时钟指针，指示当前检查的帧
+        self.hand_moves = 0  # 时钟指针累计移动的帧数，即扫描长度之和
 
-    def simulate(self, page_sequence, file):
-        counter = 1  # 序列号计数器，用于输出的行前缀
-        for page in page_sequence:
-            # 遍历页面请求序列
-            if not self.is_page_in_memory(page):
-                # 如果页面不在内存中，记录一次缺页
-                self.record_page_fault()
-                # 使用时钟算法进行页面置换
-                while self.use_bit[self.hand]:
-                    # 如果当前帧的用位为真，置为假，并移动指针
-                    self.use_bit[self.hand] = False
-                    self.hand = (self.hand + 1) % self.frames
-                if len(self.memory) == self.frames:
-                    # 如果内存已满，则替换页面
-                    self.memory[self.hand] = page
-                    self.replacements += 1  # 增加置换次数
-                else:
-                    # 如果内存未满，则添加页面
-                    self.memory.append(page)
-                # 设置新页面的用位为真
-                self.use_bit[self.hand] = True
+    def is_page_in_memory(self, page):
+        return page in self.frame_of
+
+    def reference_page(self, page):
+        evicted = None
+        use_bit, frame_of = self.use_bit, self.frame_of
+        if page not in frame_of:
+            # 如果页面不在内存中，记录一次缺页
+            self.record_page_fault()
+            # 使用时钟算法进行页面置换
+            self.select_victim()
+            if len(self.memory) == self.frames:
+                # 如果内存已满，则替换页面
+                evicted = self.memory[self.hand]
+                del frame_of[evicted]
+                self.memory[self.hand] = page
+                frame_of[page] = self.hand
+                self.replacements += 1  # 增加置换次数
             else:
-                # 如果页面已在内存中，记录页面命中，并设置用位为真
-                self.record_page_hit()
-                page_index = self.memory.index(page)
-                self.use_bit[page_index] = True
+                # 如果内存未满，则添加页面
+                frame_of[page] = len(self.memory)
+                self.memory.append(page)
+            # 设置新页面的用位为真
+            use_bit[self.hand] = 1
+        else:
+            # 如果页面已在内存中，记录页面命中，并设置用位为真
+            self.record_page_hit()
+            use_bit[frame_of[page]] = 1
+        return evicted
+
+    def select_victim(self):
+        """
+        转动时钟指针，清除途经帧的用位，停在第一个用位为假的帧上。
+
+        返回:
+        int: 指针停下的帧，内存已满时即被置换的帧。
+        """
+        use_bit = self.use_bit
+        hand = start = self.hand
+        frames = self.frames
+        wraps = 0
+        while use_bit[hand]:
+            # 如果当前帧的用位为真，置为假，并移动指针
+            use_bit[hand] = 0
+            hand += 1
+            if hand == frames:
+                hand = 0
+                wraps += 1
+        self.hand = hand
+        self.hand_moves += hand - start + wraps * frames
+        return hand
 
-            # 写入文件时，加上序列号和内存状态
-            file.write(f"{counter}: {self.__class__.__name__} - Memory state: {self.memory}\n")
-            counter += 1  # 序列号递增
+    def resize(self, frames):
+        if frames < 1:
+            raise ValueError("物理块数必须是正整数。")
+        removed = {}  # 选出的帧，按选出的先后排列
+        used = len(self.memory)
+        if used > frames:
+            self.hand %= used
+        while used - len(removed) > frames:
+            # 与置换时一样转动时钟指针，跳过已选出的帧
+            while self.hand in removed or self.use_bit[self.hand]:
+                self.use_bit[self.hand] = 0
+                self.hand = (self.hand + 1) % used
+            removed[self.hand] = None
+        evicted = [self.memory[frame] for frame in removed]
+        compact_clock(self, frames, removed, ('use_bit',))
+        self.write_back_evicted(evicted)
+        return evicted
 
 
 # EnhancedCLOCK (Enhanced CLOCK Page Replacement Algorithm)增强时钟页面置换算法实现
 class EnhancedCLOCK(PageReplacementAlgorithm):
+    replaces_in_place = True
+    resizable = True
+
     def __init__(self, frames):
         super().__init__(frames)
-        self.use_bit = {i: False for i in range(frames)}  # 用位字典，用于标记每个帧是否被访问过
-        self.modify_bit = {i: False for i in range(frames)}  # 修改位字典，用于标记每个帧自上次访问以来是否被修改过
+        self.use_bit = bytearray(frames)  # 用位数组，每帧一个字节，用于标记每个帧是否被访问过
+        self.modify_bit = bytearray(frames)  # 修改位数组，每帧一个字节，用于标记每个帧自上次访问以来是否被修改过
+        self.frame_of = {}  # 页面 -> 所在帧（即在memory中的位置），用于O(1)判断页面是否在内存中
         self.hand = 0  # 时钟指针，用于指示当前检查的帧
+        self.hand_moves = 0  # 时钟指针累计移动的帧数，即扫描长度之和
 
-    def simulate(self, page_sequence, file):
-        counter = 1  # 序列号计数器，用于输出的行前缀
-        for page in page_sequence:
-            # 遍历页面请求序列
-            if not self.is_page_in_memory(page):
-                self.record_page_fault()  # 如果页面不在内存中，记录缺页
-                replaced = False
-                while not replaced:
-                    # 进行页面置换
-                    if not self.use_bit[self.hand] and not self.modify_bit[self.hand]:
-                        # 如果当前帧的用位和修改位都为假，则替换该帧
-                        if len(self.memory) == self.frames:
-                            self.memory[self.hand] = page
-                            self.replacements += 1  # 记录一次置换
-                        else:
-                            self.memory.append(page)
-                        self.modify_bit[self.hand] = False  # 重置修改位
-                        replaced = True  # 设置替换标志为真
-                    else:
-                        # 如果用位为真，则清除用位，并继续检查下一帧
-                        self.use_bit[self.hand] = False
-                    self.hand = (self.hand + 1) % self.frames  # 移动时钟指针
-                self.use_bit[self.hand] = True  # 新加入或替换的页面设置用位为真
+    def is_page_in_memory(self, page):
+        return page in self.frame_of
+
+    def reference_page(self, page):
+        evicted = None
+        use_bit, modify_bit, frame_of = self.use_bit, self.modify_bit, self.frame_of
+        if page not in frame_of:
+            self.record_page_fault()  # 如果页面不在内存中，记录缺页
+            frames = self.frames
+            if len(self.memory) < frames:
+                # 内存未满时页面装入第一个空帧，不转动时钟指针扫描（也就不会提前写回任何页面）
+                frame = len(self.memory)
+                frame_of[page] = frame
+                self.memory.append(page)
+                self.hand = frame + 1 if frame + 1 < frames else 0
             else:
-                self.record_page_hit()  # 如果页面已在内存中，记录页面命中
-                page_index = self.memory.index(page)
-                self.use_bit[page_index] = True  # 页面被访问，设置用位为真
+                # 进行页面置换：替换选出的帧，时钟指针移到它的下一帧
+                frame = self.select_victim()
+                evicted = self.memory[frame]
+                del frame_of[evicted]
+                self.memory[frame] = page
+                frame_of[page] = frame
+                self.replacements += 1  # 记录一次置换
+                self.hand = frame + 1 if frame + 1 < frames else 0
+                self.hand_moves += 1
+            use_bit[frame] = 1  # 新加入或替换的页面所在帧设置用位为真
+            modify_bit[frame] = 0  # 重置修改位
+        else:
+            self.record_page_hit()  # 如果页面已在内存中，记录页面命中
+            use_bit[frame_of[page]] = 1  # 页面被访问，设置用位为真
+        return evicted
+
+    def select_victim(self):
+        """
+        转动时钟指针：跳过用位或修改位为真的帧，清除途经帧的用位，途经的最近未访问脏页面先写回。
+
+        返回:
+        int: 指针停下的帧，其用位和修改位都为假，即被置换的帧。
+        """
+        use_bit, modify_bit = self.use_bit, self.modify_bit
+        hand = start = self.hand
+        frames = self.frames
+        wraps = 0
+        while use_bit[hand] or modify_bit[hand]:
+            if not use_bit[hand]:
+                # 最近未访问的脏页面：写回交换设备并清除修改位，下一圈即可被置换
+                self.clean_frame(hand)
+            use_bit[hand] = 0
+            hand += 1  # 移动时钟指针
+            if hand == frames:
+                hand = 0
+                wraps += 1
+        self.hand = hand
+        self.hand_moves += hand - start + wraps * frames
+        return hand
+
+    def mark_dirty(self, page):
+        super().mark_dirty(page)
+        self.modify_bit[self.frame_of[page]] = 1  # 页面被写，设置修改位为真
+
+    def clean_frame(self, frame):
+        # 把帧中的脏页面写回交换设备，页面仍留在内存中
+        self.modify_bit[frame] = 0
+        self.dirty.discard(self.memory[frame])
+        self.write_backs += 1
+
+    def resize(self, frames):
+        if frames < 1:
+            raise ValueError("物理块数必须是正整数。")
+        removed = {}  # 选出的帧，按选出的先后排列
+        used = len(self.memory)
+        if used > frames:
+            self.hand %= used
+        while used - len(removed) > frames:
+            # 与置换时一样转动时钟指针：跳过已选出的帧和用位或修改位为真的帧，途经的最近未访问脏页面先写回
+            while self.hand in removed or self.use_bit[self.hand] or self.modify_bit[self.hand]:
+                if self.hand not in removed and not self.use_bit[self.hand]:
+                    self.clean_frame(self.hand)
+                self.use_bit[self.hand] = 0
+                self.hand = (self.hand + 1) % used
+            removed[self.hand] = None
+        evicted = [self.memory[frame] for frame in removed]
+        compact_clock(self, frames, removed, ('use_bit', 'modify_bit'))
+        self.write_back_evicted(evicted)
+        return evicted
+
 
-            # 写入文件时，加上序列号和内存状态
-            file.write(f"{counter}: {self.__class__.__name__} - Memory state: {self.memory}\n")
-            counter += 1  # 序列号递增
+def compact_clock(alg, frames, removed, bit_names):
+    """
+    从时钟算法的内存中去掉选出的帧，其余页面从时钟指针处开始依次排入新的frames个帧。
+    内存已满时指针指向原指针处的页面，未满时指向第一个空帧，与内存逐步装满时的布局一致。
+
+    参数:
+    alg: SimpleCLOCK或EnhancedCLOCK实例。
+    frames (int): 新的物理块数。
+    removed: 要去掉的帧。
+    bit_names (tuple): 随页面一起移动的位数组属性名。
+    """
+    used = len(alg.memory)
+    start = alg.hand % used if used else 0
+    order = [frame for frame in range(start, start + used) if frame % used not in removed]
+    order = [frame % used for frame in order]
+    for name in bit_names:
+        old_bits, new_bits = getattr(alg, name), bytearray(frames)
+        for index, frame in enumerate(order):
+            new_bits[index] = old_bits[frame]
+        setattr(alg, name, new_bits)
+    alg.memory = [alg.memory[frame] for frame in order]
+    alg.frame_of = {page: index for index, page in enumerate(alg.memory)}
+    alg.frames = frames
+    alg.hand = len(alg.memory) % frames
+
+
+# ARC (Adaptive Replacement Cache)自适应置换算法实现
+class ARC(PageReplacementAlgorithm):
+    def __init__(self, frames):
+        super().__init__(frames)
+        # 内存用按装入顺序排列的字典表示（页面 -> None），只用于成员检查和输出内存状态
+        self.memory = {}
+        # 四个按最近访问顺序排列的有序字典，表头即最久未访问的页面：
+        # t1为只访问过一次的驻留页面，t2为访问过至少两次的驻留页面，b1、b2分别为从t1、t2淘汰的页面的历史记录
+        self.t1, self.t2 = OrderedDict(), OrderedDict()
+        self.b1, self.b2 = OrderedDict(), OrderedDict()
+        self.target = 0  # t1的目标大小，根据历史记录的命中自适应调整
+
+    def reference_page(self, page):
+        evicted = None
+        t1, t2, b1, b2 = self.t1, self.t2, self.b1, self.b2
+        if page in t1:
+            # 第二次访问：从t1移到t2的最近使用端
+            self.record_page_hit()
+            del t1[page]
+            t2[page] = None
+            return None
+        if page in t2:
+            self.record_page_hit()
+            t2.move_to_end(page)
+            return None
+        self.record_page_fault()
+        if page in b1:
+            # 在b1中命中说明t1太小，增大t1的目标大小
+            self.target = min(self.frames, self.target + max(len(b2) // len(b1), 1))
+            evicted = self.replace(page)
+            del b1[page]
+            t2[page] = None
+        elif page in b2:
+            # 在b2中命中说明t2太小，减小t1的目标大小
+            self.target = max(0, self.target - max(len(b1) // len(b2), 1))
+            evicted = self.replace(page)
+            del b2[page]
+            t2[page] = None
+        else:
+            if len(t1) + len(b1) == self.frames:
+                if len(t1) < self.frames:
+                    b1.popitem(last=False)
+                    evicted = self.replace(page)
+                else:
+                    # b1为空且t1已占满内存，直接丢弃t1中最久未访问的页面，不保留历史记录
+                    evicted, _ = t1.popitem(last=False)
+            elif len(t1) + len(t2) + len(b1) + len(b2) >= self.frames:
+                if len(t1) + len(t2) + len(b1) + len(b2) == 2 * self.frames:
+                    b2.popitem(last=False)
+                evicted = self.replace(page)
+            t1[page] = None
+        if evicted is not None:
+            del self.memory[evicted]
+            self.replacements += 1  # 增加置换次数
+        self.memory[page] = None
+        return evicted
+
+    def replace(self, page):
+        # 内存已满时，按t1的目标大小决定从t1还是t2淘汰最久未访问的页面，并把它移入对应的历史记录
+        t1, t2 = self.t1, self.t2
+        if len(t1) + len(t2) < self.frames:
+            return None
+        if t1 and (len(t1) > self.target or (page in self.b2 and len(t1) == self.target) or not t2):
+            evicted, _ = t1.popitem(last=False)
+            self.b1[evicted] = None
+        else:
+            evicted, _ = t2.popitem(last=False)
+            self.b2[evicted] = None
+        return evicted
+
+
+# 2Q (Two Queue)双队列页面置换算法实现
+class TwoQ(PageReplacementAlgorithm):
+    def __init__(self, frames, in_ratio=0.25, out_ratio=0.5):
+        """
+        参数:
+        frames (int): 物理块数。
+        in_ratio (float): 首次访问队列a1_in占物理块数的比例。
+        out_ratio (float): 历史记录a1_out能记住的页面数占物理块数的比例。
+        """
+        super().__init__(frames)
+        # 内存用按装入顺序排列的字典表示（页面 -> None），只用于成员检查和输出内存状态
+        self.memory = {}
+        self.a1_in = OrderedDict()  # 只访问过一次的驻留页面，先进先出
+        self.a1_out = OrderedDict()  # 从a1_in淘汰的页面的历史记录，先进先出
+        self.am = OrderedDict()  # 再次访问过的驻留页面，按最近访问顺序排列，表头即最久未访问的页面
+        self.in_size = max(1, int(frames * in_ratio))
+        self.out_size = max(1, int(frames * out_ratio))
+
+    def reference_page(self, page):
+        evicted = None
+        if page in self.am:
+            self.record_page_hit()
+            self.am.move_to_end(page)
+            return None
+        if page in self.a1_in:
+            # a1_in中的命中不改变顺序，短时间内的重复访问不足以证明页面是热页面
+            self.record_page_hit()
+            return None
+        self.record_page_fault()
+        if len(self.memory) == self.frames:
+            evicted = self.reclaim()
+            del self.memory[evicted]
+            self.replacements += 1  # 增加置换次数
+        if page in self.a1_out:
+            # 淘汰后不久又被访问，说明是热页面，直接进入am
+            del self.a1_out[page]
+            self.am[page] = None
+        else:
+            self.a1_in[page] = None
+        self.memory[page] = None
+        return evicted
+
+    def reclaim(self):
+        # 腾出一个物理块：a1_in超过目标大小时淘汰其最早的页面并记入a1_out，否则淘汰am中最久未访问的页面
+        if len(self.a1_in) > self.in_size or not self.am:
+            evicted, _ = self.a1_in.popitem(last=False)
+            self.a1_out[evicted] = None
+            if len(self.a1_out) > self.out_size:
+                self.a1_out.popitem(last=False)
+        else:
+            evicted, _ = self.am.popitem(last=False)
+        return evicted
+
+
+# LIRS (Low Inter-reference Recency Set)低重用距离集合页面置换算法实现
+class LIRS(PageReplacementAlgorithm):
+    def __init__(self, frames, hir_ratio=0.01, ghost_ratio=2.0):
+        """
+        参数:
+        frames (int): 物理块数。
+        hir_ratio (float): 高重用距离（HIR）驻留页面占物理块数的比例，至少为1个块。
+        ghost_ratio (float): 栈中最多保留的非驻留页面数占物理块数的比例。
+        """
+        super().__init__(frames)
+        # 内存用按装入顺序排列的字典表示（页面 -> None），只用于成员检查和输出内存状态
+        self.memory = {}
+        self.lir_size = max(1, frames - max(1, int(frames * hir_ratio)))
+        self.ghost_size = max(1, int(frames * ghost_ratio))
+        # 按最近访问顺序排列的栈，表头（栈底）总是LIR页面，包含LIR页面、部分HIR驻留页面和HIR非驻留页面
+        self.stack = OrderedDict()
+        self.lir = set()  # LIR页面，总是驻留
+        self.hir_queue = OrderedDict()  # HIR驻留页面，先进先出，表头即下一个被淘汰的页面
+        self.ghosts = OrderedDict()  # 栈中的HIR非驻留页面，按淘汰顺序排列
+
+    def reference_page(self, page):
+        evicted = None
+        stack = self.stack
+        if page in self.lir:
+            self.record_page_hit()
+            stack.move_to_end(page)
+            self.prune()
+            return None
+        if page in self.hir_queue:
+            self.record_page_hit()
+            if page in stack:
+                # 重用距离小于栈底LIR页面的最近访问距离，升级为LIR页面
+                del self.hir_queue[page]
+                self.promote(page)
+            else:
+                stack[page] = None
+                self.hir_queue.move_to_end(page)
+            return None
+        self.record_page_fault()
+        if len(self.memory) == self.frames:
+            evicted = self.evict()
+            del self.memory[evicted]
+            self.replacements += 1  # 增加置换次数
+        if page in self.ghosts:
+            # 非驻留页面仍在栈中，说明重用距离较小，直接成为LIR页面
+            del self.ghosts[page]
+            self.promote(page)
+        elif len(self.lir) < self.lir_size:
+            stack[page] = None
+            self.lir.add(page)
+        else:
+            stack[page] = None
+            self.hir_queue[page] = None
+        self.memory[page] = None
+        return evicted
+
+    def promote(self, page):
+        # 把页面升级为LIR页面并移到栈顶，LIR页面过多时把栈底的LIR页面降级为HIR驻留页面
+        self.stack[page] = None
+        self.stack.move_to_end(page)
+        self.lir.add(page)
+        if len(self.lir) > self.lir_size:
+            bottom, _ = self.stack.popitem(last=False)
+            self.lir.remove(bottom)
+            self.hir_queue[bottom] = None
+            self.prune()
+
+    def evict(self):
+        # 淘汰HIR驻留队列的表头；它若仍在栈中则保留为非驻留页面，以便识别下一次访问
+        if not self.hir_queue:
+            # 只有一个物理块等HIR队列为空的情形下，淘汰栈底的LIR页面
+            evicted, _ = self.stack.popitem(last=False)
+            self.lir.remove(evicted)
+            self.prune()
+            return evicted
+        evicted, _ = self.hir_queue.popitem(last=False)
+        if evicted in self.stack:
+            self.ghosts[evicted] = None
+            if len(self.ghosts) > self.ghost_size:
+                # 非驻留页面过多时丢弃最早淘汰的一个，栈底是LIR页面，不会因此被破坏
+                ghost, _ = self.ghosts.popitem(last=False)
+                del self.stack[ghost]
+        return evicted
+
+    def prune(self):
+        # 栈剪枝：移除栈底的HIR页面，直到栈底是LIR页面
+        stack = self.stack
+        while stack:
+            bottom = next(iter(stack))
+            if bottom in self.lir:
+                return
+            del stack[bottom]
+            self.ghosts.pop(bottom, None)
+
+
+# CLOCK-Pro页面置换算法实现
+# 原算法的三个指针共用一个环形链表，hand_cold在冷页面很少时要跳过大量热页面；
+# 这里热页面、驻留冷页面和测试期内的非驻留页面各用一个时钟（有序字典）维护，三个指针的每次移动都是O(1)
+class CLOCKPro(PageReplacementAlgorithm):
+    def __init__(self, frames):
+        super().__init__(frames)
+        # 内存用按装入顺序排列的字典表示（页面 -> None），只用于成员检查和输出内存状态
+        self.memory = {}
+        self.hot = OrderedDict()  # 热页面，按hand_hot的检查顺序排列，表头即指针所指的页面
+        self.cold = OrderedDict()  # 驻留冷页面，按hand_cold的检查顺序排列
+        self.nonresident = OrderedDict()  # 测试期内被淘汰的冷页面，按淘汰顺序排列，最多记住frames个
+        self.referenced = set()  # 用位为真的驻留页面
+        self.testing = set()  # 处于测试期的驻留冷页面
+        self.cold_target = 1  # 驻留冷页面的目标数量，根据测试期内的再次访问自适应调整
+
+    def reference_page(self, page):
+        evicted = None
+        if page in self.memory:
+            self.record_page_hit()
+            self.referenced.add(page)
+            return None
+        self.record_page_fault()
+        if len(self.memory) == self.frames:
+            evicted = self.run_hand_cold()
+            del self.memory[evicted]
+            self.replacements += 1  # 增加置换次数
+        if page in self.nonresident:
+            # 测试期内再次访问的非驻留页面：冷页面需要更长的驻留时间，页面直接成为热页面
+            del self.nonresident[page]
+            self.cold_target = min(self.frames, self.cold_target + 1)
+            self.hot[page] = None
+            if len(self.hot) > self.frames - self.cold_target:
+                self.run_hand_hot()
+        else:
+            # 新页面作为冷页面进入测试期
+            self.cold[page] = None
+            self.testing.add(page)
+        self.memory[page] = None
+        return evicted
+
+    def run_hand_cold(self):
+        # 转动hand_cold直到淘汰一个最近未访问的驻留冷页面，返回被淘汰的页面
+        cold, referenced = self.cold, self.referenced
+        while True:
+            page, _ = cold.popitem(last=False)
+            if page not in referenced:
+                break
+            referenced.discard(page)
+            if page in self.testing:
+                # 测试期内被再次访问，升级为热页面
+                self.testing.discard(page)
+                self.hot[page] = None
+                if len(self.hot) > self.frames - self.cold_target:
+                    self.run_hand_hot()
+            else:
+                # 获得第二次机会，并开始新的测试期
+                self.testing.add(page)
+                cold[page] = None
+        if page in self.testing:
+            # 仍在测试期内的页面保留为非驻留页面，超过frames个时hand_test结束最早的测试期
+            self.testing.discard(page)
+            self.nonresident[page] = None
+            if len(self.nonresident) > self.frames:
+                self.run_hand_test()
+        return page
+
+    def run_hand_hot(self):
+        # 转动hand_hot直到把一个最近未访问的热页面降级为冷页面
+        hot, referenced = self.hot, self.referenced
+        while True:
+            page, _ = hot.popitem(last=False)
+            if page not in referenced:
+                self.cold[page] = None
+                return
+            referenced.discard(page)
+            hot[page] = None
+
+    def run_hand_test(self):
+        # 结束最早的非驻留页面的测试期：它在测试期内没有被再次访问，驻留冷页面的目标数量减一
+        self.nonresident.popitem(last=False)
+        self.cold_target = max(1, self.cold_target - 1)
+
+
+class CostModel:
+    def __init__(self, fault_latency, write_back_latency, hit_latency=0.0):
+        """
+        把模拟得到的计数换算为估计的访存服务时间，时间单位由调用方决定（如微秒）。
+
+        参数:
+        fault_latency (float): 每次缺页从交换设备读入页面的延迟。
+        write_back_latency (float): 每次把脏页面写回交换设备的延迟。
+        hit_latency (float): 每次命中的延迟。
+        """
+        self.fault_latency = fault_latency
+        self.write_back_latency = write_back_latency
+        self.hit_latency = hit_latency
+
+    def breakdown(self, alg):
+        """
+        参数:
+        alg: 已完成模拟的页面置换算法实例。
+
+        返回:
+        dict: 缺页读入、写回和命中各自耗费的时间，以及总时间total。
+        模拟结束时仍在内存中的脏页面不计入写回。
+        """
+        times = {
+            'faults': alg.page_faults * self.fault_latency,
+            'write_backs': alg.write_backs * self.write_back_latency,
+            'hits': alg.page_hits * self.hit_latency,
+        }
+        times['total'] = sum(times.values())
+        return times
+
+    def service_time(self, alg):
+        """
+        参数:
+        alg: 已完成模拟的页面置换算法实例。
+
+        返回:
+        float: 估计的总服务时间。
+        """
+        return self.breakdown(alg)['total']
+
+    def mean_access_time(self, alg):
+        """
+        参数:
+        alg: 已完成模拟的页面置换算法实例。
+
+        返回:
+        float: 平均每次访问的服务时间。
+        """
+        return self.service_time(alg) / (alg.page_faults + alg.page_hits)
+
+
+# 算法名称 -> 算法类，便于按名称选择算法（如在子进程或命令行中）
+ALGORITHMS = {alg.__name__: alg for alg in (FIFO, LRU, OPT, LFU, SimpleCLOCK, EnhancedCLOCK,
+                                            ARC, TwoQ, LIRS, CLOCKPro)}
 
 
 # 生成一个随机页面序列函数
@@ -292,8 +1290,182 @@ def generate_page_sequence(size, upper_bound):
     return [random.randint(1, upper_bound) for _ in range(size)]
 
 
+# 栈算法：满足包含性质，可以一次遍历求出所有物理块数下的缺页次数
+STACK_ALGORITHMS = ('LRU', 'OPT')
+# OPT的栈距离遍历每次访问的代价与最大物理块数成正比，约为每64个物理块一次OPT模拟的代价
+OPT_PROFILE_FRAMES_PER_SIMULATION = 64
+
+
+def use_stack_profile(policy, frame_counts):
+    """
+    判断求一组物理块数下的结果时，用一次栈距离遍历是否比逐个物理块数模拟更快。
+    LRU的栈距离遍历为O(n log n)，总是更快；OPT的代价随最大物理块数增长，
+    只有最大物理块数相对于要求的物理块数个数不太大时才更快。
+
+    参数:
+    policy: 算法类或其名称。
+    frame_counts (list): 要求的物理块数。
+
+    返回:
+    bool: 是否应该用stack_distance_profile。
+    """
+    name = policy if isinstance(policy, str) else policy.__name__
+    if name == 'LRU':
+        return True
+    return name == 'OPT' and max(frame_counts) <= OPT_PROFILE_FRAMES_PER_SIMULATION * len(frame_counts)
+
+
+# 一次遍历求出任意物理块数下缺页率曲线的函数
+def stack_distance_profile(page_sequence, policy, max_frames=None):
+    """
+    按Mattson栈距离方法一次遍历页面序列，求出所有物理块数下的缺页率和置换率。
+
+    参数:
+    page_sequence (list): 页面请求序列。
+    policy: 栈算法类（LRU或OPT）或其名称。
+    max_frames (int): 曲线的最大物理块数，默认取序列中出现的最大栈距离。
+
+    返回:
+    dict: 包含frame_counts、page_faults、page_fault_rates和replacement_rates四个等长列表的字典，
+          第k项对应k + 1个物理块，可以直接作为plot_performance的结果项。
+    """
+    name = policy if isinstance(policy, str) else policy.__name__
+    page_sequence = as_page_sequence(page_sequence)
+    if name == 'LRU':
+        histogram, cold_misses = lru_stack_distances(page_sequence)
+    elif name == 'OPT':
+        histogram, cold_misses = opt_stack_distances(page_sequence, max_frames)
+    else:
+        raise ValueError(f"{name} 不是栈算法，无法用栈距离求缺页率曲线。")
+    total = len(page_sequence)
+    if total == 0:
+        raise ValueError("页面序列不能为空。")
+    if max_frames is None:
+        max_frames = max(histogram, default=1)
+
+    profile = {'frame_counts': [], 'page_faults': [], 'page_fault_rates': [], 'replacement_rates': []}
+    faults = total  # 0个物理块时所有访问都缺页
+    for frames in range(1, max_frames + 1):
+        # 栈距离不超过物理块数的访问都命中
+        faults -= histogram.get(frames, 0)
+        profile['frame_counts'].append(frames)
+        profile['page_faults'].append(faults)
+        profile['page_fault_rates'].append(faults / total)
+        # 内存装满之前的缺页不需要置换
+        profile['replacement_rates'].append(max(0, faults - frames) / total)
+    return profile
+
+
+def lru_stack_distances(page_sequence):
+    """
+    用树状数组求LRU栈距离的直方图，时间复杂度O(n log n)。
+
+    树状数组的第t个位置标记第t次访问是否为该页面的最近一次访问，
+    某次访问的栈距离即上次访问该页面之后（含上次访问）的标记数量。
+
+    参数:
+    page_sequence (list): 页面请求序列。
+
+    返回:
+    tuple: (栈距离 -> 访问次数的字典, 首次访问即冷缺页的次数)。
+    """
+    size = len(page_sequence)
+    tree = array('q', [0]) * (size + 1)
+    last_access = {}  # 每个页面最近一次访问的位置（从1开始）
+    histogram = {}
+    cold_misses = 0
+    for t, page in enumerate(page_sequence, start=1):
+        previous = last_access.get(page)
+        if previous is None:
+            cold_misses += 1
+        else:
+            # 标记总数即目前出现过的不同页面数，减去previous之前的标记数
+            marked_before = 0
+            i = previous - 1
+            while i > 0:
+                marked_before += tree[i]
+                i -= i & -i
+            distance = len(last_access) - marked_before
+            histogram[distance] = histogram.get(distance, 0) + 1
+            # 取消上次访问位置的标记
+            i = previous
+            while i <= size:
+                tree[i] -= 1
+                i += i & -i
+        # 标记本次访问的位置
+        i = t
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
+        last_access[page] = t
+    return histogram, cold_misses
+
+
+def opt_stack_distances(page_sequence, max_frames=None):
+    """
+    用Mattson优先级栈求OPT栈距离的直方图。
+
+    栈的前k项恰好是k个物理块时OPT算法的内存内容。访问页面x时x移到栈顶，
+    原栈顶向下传递，在每一层与该层页面比较，下一次访问更晚的页面继续下沉，直到x原来的位置。
+    前k项的内容与更深的层无关，所以栈只保留前max_frames层：更深处的页面被访问时对所有
+    不超过max_frames的物理块数都缺页，下沉到第max_frames层之下的页面直接丢弃。
+    每次访问的代价与x的栈深度成正比，因此总代价为O(n * max_frames)。
+
+    参数:
+    page_sequence (list): 页面请求序列。
+    max_frames (int): 栈保留的最大深度，为None时不截断。
+
+    返回:
+    tuple: (栈距离 -> 访问次数的字典（只含不超过max_frames的栈距离）, 首次访问即冷缺页的次数)。
+    """
+    next_occurrence = build_next_occurrence(page_sequence)
+    seen = set()
+    stack = []  # 优先级栈中的页面
+    stack_next_use = []  # 与stack平行，记录每个页面下一次被访问的位置
+    level_of = {}  # 页面 -> 在栈中的层（从0开始），不在栈中的页面没有条目
+    histogram = {}
+    cold_misses = 0
+    for t, page in enumerate(page_sequence):
+        next_use = next_occurrence[t]
+        if page not in seen:
+            seen.add(page)
+            cold_misses += 1
+        depth = level_of.get(page)
+        if depth is None:
+            # 页面不在保留的栈中，相当于位于栈底之下
+            depth = len(stack)
+            if max_frames is None or depth < max_frames:
+                stack.append(page)
+                stack_next_use.append(next_use)
+                if depth == 0:
+                    level_of[page] = 0
+                    continue
+        elif depth == 0:
+            stack_next_use[0] = next_use
+            histogram[1] = histogram.get(1, 0) + 1
+            continue
+        else:
+            histogram[depth + 1] = histogram.get(depth + 1, 0) + 1
+        carried, carried_next_use = stack[0], stack_next_use[0]
+        stack[0], stack_next_use[0] = page, next_use
+        level_of[page] = 0
+        for level in range(1, depth):
+            if carried_next_use < stack_next_use[level]:
+                # 该层原页面下一次访问更晚，被挤到下一层
+                stack[level], carried = carried, stack[level]
+                stack_next_use[level], carried_next_use = carried_next_use, stack_next_use[level]
+                level_of[stack[level]] = level
+        if depth < len(stack):
+            stack[depth], stack_next_use[depth] = carried, carried_next_use
+            level_of[carried] = depth
+        else:
+            # 下沉到保留的最深层之下，从栈中丢弃
+            del level_of[carried]
+    return histogram, cold_misses
+
+
 # 测试不同的页面置换算法函数
-def test_page_replacement_algorithms(algorithms, page_sequence, frame_counts, file):
+def test_page_replacement_algorithms(algorithms, page_sequence, frame_counts, file=None):
     """
     测试不同的页面置换算法。
 
@@ -301,19 +1473,28 @@ def test_page_replacement_algorithms(algorithms, page_sequence, frame_counts, fi
     algorithms (list): 要测试的页面置换算法类的列表。
     page_sequence (list): 用于模拟的页面序列。
     frame_counts (list): 用于测试每种算法的帧数列表。
-    file: 用于将输出写入的文件对象。
+    file: 用于将输出写入的文件对象，为None时不输出内存状态，栈算法（use_stack_profile判断更快时）改用一次栈距离遍历求所有帧数的结果。
 
     返回:
-    dict: 以算法名称为键，页面缺页率列表为值的字典。
+    dict: 以算法名称为键，包含缺页率列表和置换率列表的字典为值的字典。
     """
-    # 初始化结果字典，用于存储每种算法的页面缺页率
-    results = {alg.__name__: [] for alg in algorithms}
+    # 初始化结果字典，用于存储每种算法的页面缺页率和置换率
+    results = {alg.__name__: {'page_fault_rates': [], 'replacement_rates': []} for alg in algorithms}
+    # 不需要输出内存状态时，栈算法只需遍历一次序列
+    profiles = {alg.__name__: stack_distance_profile(page_sequence, alg, max(frame_counts))
+                for alg in algorithms if file is None and use_stack_profile(alg, frame_counts)}
     # 遍历不同的帧数
     for frames in frame_counts:
         # 对每种算法进行测试
         for alg_class in algorithms:
+            if alg_class.__name__ in profiles:
+                profile = profiles[alg_class.__name__]
+                results[alg_class.__name__]['page_fault_rates'].append(profile['page_fault_rates'][frames - 1])
+                results[alg_class.__name__]['replacement_rates'].append(profile['replacement_rates'][frames - 1])
+                continue
             alg = alg_class(frames)  # 创建算法实例
-            alg.simulate(page_sequence, file)  # 模拟页面置换过程
+            # 模拟页面置换过程，提供了文件时输出每一步的内存状态
+            alg.simulate(page_sequence, file, TRACE_FULL if file is not None else TRACE_NONE)
             # 记录当前帧数下算法的页面缺页率
             results[alg_class.__name__]['page_fault_rates'].append(alg.get_page_fault_rate())
             results[alg_class.__name__]['replacement_rates'].append(alg.get_replacement_rate())
@@ -322,45 +1503,31 @@ def test_page_replacement_algorithms(algorithms, page_sequence, frame_counts, fi
 
 
 # 绘制各种页面置换算法的性能函数
-def plot_performance(results, frame_counts):
+def plot_performance(results, frame_counts=None, output=None):
     """
     绘制各种页面置换算法的性能。
 
     参数:
-    results (dict): 一个字典，键是算法名称，值是包含缺页率和置换率的字典。
-    frame_counts (list): 测试的帧数列表。
+    results (dict): 一个字典，键是算法名称，值是包含缺页率和置换率的字典（如stack_distance_profile的返回值）。
+    frame_counts (list): 测试的帧数列表，为None时使用每个结果自带的frame_counts。
+    output (str): 图片文件路径，给出时不经过pyplot直接保存图片，不需要界面。
 
     说明:
     此函数将根据提供的算法结果和帧数，绘制出每种算法的缺页率和置换率性能曲线图。
-    图中将展示不同帧数下的缺页率和置换率，以便比较不同算法的性能。
+    图中将展示不同帧数下的缺页率和置换率，以便比较不同算法的性能；帧数很多时曲线降采样后显示（见plotting模块）。
     """
-    # 设置支持中文的字体
-    plt.rcParams['font.sans-serif'] = ['SimHei']  # 设置中文字体为SimHei
-    plt.rcParams['axes.unicode_minus'] = False  # 正确显示负号
-
-    # 创建一个画布和两个子图
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 5))
-
-    # 在第一个子图中绘制缺页率曲线
-    for alg_name, rates in results.items():
-        ax1.plot(frame_counts, rates['page_fault_rates'], label=f"{alg_name}")
-
-    ax1.set_xlabel('物理块数')
-    ax1.set_ylabel('缺页率')
-    ax1.set_title('缺页率比较')
-    ax1.legend()
-
-    # 在第二个子图中绘制置换率曲线
-    for alg_name, rates in results.items():
-        ax2.plot(frame_counts, rates['replacement_rates'], label=f"{alg_name}")
+    # 只在绘图时导入matplotlib，只做模拟的程序不必承担它的导入时间
+    from plotting import PerformancePlot, curves_from_results
 
-    ax2.set_xlabel('物理块数')
-    ax2.set_ylabel('置换率')
-    ax2.set_title('置换率比较')
-    ax2.legend()
-
-    # 调整子图布局
-    plt.tight_layout()
+    curves = curves_from_results(results, frame_counts)
+    if output is not None:
+        plot = PerformancePlot()
+        plot.update(curves)
+        plot.save(output)
+        return
+    from matplotlib import pyplot as plt
+    plot = PerformancePlot(plt.figure(figsize=(10, 5)))
+    plot.update(curves)
     # 显示图表
     plt.show()
 
@@ -372,7 +1539,7 @@ if __name__ == "__main__":
     page_upper_bound = 10  # 页面编号的上限
 
     # 定义要测试的页面置换算法类列表
-    algorithms = [FIFO, LRU, OPT, LFU, SimpleCLOCK, EnhancedCLOCK]  # 可以添加其他算法类
+    algorithms = [FIFO, LRU, OPT, LFU, SimpleCLOCK, EnhancedCLOCK, ARC, TwoQ, LIRS, CLOCKPro]  # 可以添加其他算法类
 
     # 定义要测试的物理帧数列表
     frame_counts = [2, 3, 4, 5, 6, 7, 8]
@@ -380,22 +1547,19 @@ if __name__ == "__main__":
     # 初始化一个字典来收集结果
     results = {alg.__name__: {'page_fault_rates': [], 'replacement_rates': []} for alg in algorithms}
 
-    # 打开（或创建）一个文件用于记录算法的输出结果
-    with open('algorithm_output.txt', 'w') as output_file:
-        # 对每个算法和帧数进行测试
-        for alg_class in algorithms:
-            for frames in frame_counts:
-                alg = alg_class(frames)
-                page_sequence = generate_page_sequence(sequence_size, page_upper_bound)
-                with io.StringIO() as file:  # 使用 StringIO 对象来收集模拟输出
-                    alg.simulate(page_sequence, file)  # 运行模拟
-                    # 写入模拟输出到实际文件
-                    output_file.write(f"Algorithm: {alg_class.__name__}, Frames: {frames}\n")
-                    output_file.write(file.getvalue() + "\n")
-                # 记录缺页率和置换率
-                results[alg_class.__name__]['page_fault_rates'].append(alg.get_page_fault_rate())
-                # 假设算法类有一个方法来获取置换率
-                results[alg_class.__name__]['replacement_rates'].append(alg.get_replacement_rate())
+    # 每次运行的输出写入algorithm_output目录下的二进制日志，可用simulation_log.py查看任意一步的内存状态
+    os.makedirs('algorithm_output', exist_ok=True)
+    # 对每个算法和帧数进行测试
+    for alg_class in algorithms:
+        for frames in frame_counts:
+            alg = alg_class(frames)
+            page_sequence = generate_page_sequence(sequence_size, page_upper_bound)
+            log_path = os.path.join('algorithm_output', f"{alg_class.__name__}_{frames}.simlog")
+            record_simulation(alg, page_sequence, log_path)  # 运行模拟并记录每一步
+            # 记录缺页率和置换率
+            results[alg_class.__name__]['page_fault_rates'].append(alg.get_page_fault_rate())
+            # 假设算法类有一个方法来获取置换率
+            results[alg_class.__name__]['replacement_rates'].append(alg.get_replacement_rate())
 
     # 根据测试结果绘制算法性能曲线图
     plot_performance(results, frame_counts)
\ No newline at end of file
@@ -0,0 +1,391 @@
+import argparse
+import time
+from array import array
+
+import numpy as np
+
+from PageReplacementAlgorithm import ALGORITHMS, ACCESS_READ
+import trace_loader
+
+# 页表每级索引的位数（x86-64每级512项）和虚拟地址位数，--levels未给出时按这两项推算页表级数
+BITS_PER_LEVEL = 9
+VIRTUAL_ADDRESS_BITS = 48
+# 支持的页表级数
+PAGE_TABLE_LEVELS = (2, 3, 4)
+# 页表项大小（字节），用于统计页表占用的内存
+PTE_BYTES = 8
+# TLB组内的置换策略
+TLB_POLICIES = ('LRU', 'FIFO')
+# 默认的访问时间（纳秒）：TLB查找、一次内存访问、一次缺页处理
+TLB_NS = 1
+MEMORY_NS = 100
+PAGE_FAULT_NS = 8_000_000
+
+
+class TLB:
+    def __init__(self, entries=64, ways=4, policy='LRU'):
+        """
+        组相联TLB，虚拟页号的低位选择组，组内按policy置换。
+        所有表项放在一个数组中，第s组占用[s*ways, (s+1)*ways)，另用字典记录每个虚拟页号所在的表项，查找为O(1)。
+
+        参数:
+        entries (int): 表项总数。
+        ways (int): 相联度，等于entries时为全相联。
+        policy (str): TLB_POLICIES之一，LRU按最近访问时间、FIFO按装入时间选择组内被置换的表项。
+        """
+        if policy not in TLB_POLICIES:
+            raise ValueError(f"未知的TLB置换策略: {policy}")
+        sets = entries // ways
+        if sets * ways != entries or sets & (sets - 1):
+            raise ValueError("TLB表项数必须是相联度的2的幂倍。")
+        self.entries = entries
+        self.ways = ways
+        self.policy = policy
+        self.set_mask = sets - 1
+        self.tags = array('q', [-1]) * entries  # 每个表项中的虚拟页号，-1为无效
+        self.stamps = array('q', [-1]) * entries  # 每个表项最近访问（LRU）或装入（FIFO）的时间
+        self.slot_of = {}  # 虚拟页号 -> 表项位置
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0  # 所映射页面被置换出内存而作废的表项数
+
+    def lookup(self, vpn, now):
+        """
+        参数:
+        vpn (int): 虚拟页号。
+        now (int): 当前时间（访问序号）。
+
+        返回:
+        bool: 是否命中。
+        """
+        slot = self.slot_of.get(vpn)
+        if slot is None:
+            self.misses += 1
+            return False
+        self.hits += 1
+        if self.policy == 'LRU':
+            self.stamps[slot] = now
+        return True
+
+    def insert(self, vpn, now):
+        # 装入组内的空表项，组满时置换时间最早的表项
+        base = (vpn & self.set_mask) * self.ways
+        stamps = self.stamps[base:base + self.ways]
+        slot = base + stamps.index(min(stamps))
+        old = self.tags[slot]
+        if old >= 0:
+            del self.slot_of[old]
+        self.tags[slot] = vpn
+        self.stamps[slot] = now
+        self.slot_of[vpn] = slot
+
+    def invalidate(self, vpn):
+        # 作废映射vpn的表项（TLB shootdown），表项变为空闲
+        slot = self.slot_of.pop(vpn, None)
+        if slot is not None:
+            self.tags[slot] = -1
+            self.stamps[slot] = -1
+            self.invalidations += 1
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0
+
+
+class PageTable:
+    def __init__(self, levels=4, page_size=4096, bits_per_level=BITS_PER_LEVEL):
+        """
+        多级页表（基数树）：每级用虚拟页号中的bits_per_level位索引，每张页表是一个有2**bits_per_level项的数组，
+        所有页表放在一个列表中、用下标互相引用，第0张为根页表。中间级页表项为下一级页表的下标，
+        末级页表项为物理块号，-1表示不存在。页表按需分配，缺页时才建立途经的各级页表。
+
+        参数:
+        levels (int): 页表级数，PAGE_TABLE_LEVELS之一。
+        page_size (int): 页面大小（字节），必须是2的幂；使用大页时末级页表直接映射大页，级数相应减少。
+        bits_per_level (int): 每级索引的位数。
+        """
+        if levels not in PAGE_TABLE_LEVELS:
+            raise ValueError(f"页表级数必须是{PAGE_TABLE_LEVELS}之一。")
+        shift = trace_loader.page_shift(page_size)
+        if shift is None:
+            raise ValueError("页面大小必须是2的幂。")
+        self.levels = levels
+        self.page_size = page_size
+        self.page_shift = shift
+        self.bits_per_level = bits_per_level
+        self.index_mask = (1 << bits_per_level) - 1
+        self.virtual_address_bits = shift + levels * bits_per_level  # 页表能够映射的虚拟地址位数
+        # 各级索引在虚拟页号中的移位，根页表在前
+        self.shifts = [bits_per_level * (levels - 1 - level) for level in range(levels)]
+        self.inner_shifts = self.shifts[:-1]  # 中间各级（不含末级页表）
+        self.tables = [self.new_table()]
+        self.tables_per_level = [1] + [0] * (levels - 1)
+        self.walks = 0  # 页表遍历次数，即TLB缺失次数
+        self.walk_references = 0  # 页表遍历访问内存的次数，每次遍历访问每级页表各一次
+
+    def new_table(self):
+        return array('q', [-1]) * (1 << self.bits_per_level)
+
+    def walk(self, vpn):
+        """
+        从根页表逐级查找虚拟页号的页表项。
+
+        参数:
+        vpn (int): 虚拟页号。
+
+        返回:
+        int: 物理块号，页面不在内存中时为-1。
+        """
+        self.walks += 1
+        self.walk_references += self.levels
+        tables, mask = self.tables, self.index_mask
+        table = 0
+        for shift in self.inner_shifts:
+            table = tables[table][(vpn >> shift) & mask]
+            if table < 0:
+                return -1
+        return tables[table][vpn & mask]
+
+    def leaf(self, vpn):
+        # 返回末级页表的下标，途经的页表不存在时分配
+        tables, mask = self.tables, self.index_mask
+        table = 0
+        for level, shift in enumerate(self.inner_shifts, start=1):
+            index = (vpn >> shift) & mask
+            child = tables[table][index]
+            if child < 0:
+                child = len(tables)
+                tables.append(self.new_table())
+                self.tables_per_level[level] += 1
+                tables[table][index] = child
+            table = child
+        return table
+
+    def map(self, vpn, frame):
+        self.tables[self.leaf(vpn)][vpn & self.index_mask] = frame
+
+    def unmap(self, vpn):
+        """
+        返回:
+        int: 页面原来所在的物理块号。
+        """
+        table = self.tables[self.leaf(vpn)]
+        frame = table[vpn & self.index_mask]
+        table[vpn & self.index_mask] = -1
+        return frame
+
+    def memory_bytes(self):
+        # 已分配的页表占用的内存（字节）
+        return len(self.tables) * (1 << self.bits_per_level) * PTE_BYTES
+
+
+class AddressTranslator:
+    def __init__(self, algorithm, frames, page_size=4096, levels=None, bits_per_level=BITS_PER_LEVEL,
+                 tlb_entries=64, tlb_ways=4, tlb_policy='LRU', tlb_ns=TLB_NS, memory_ns=MEMORY_NS,
+                 page_fault_ns=PAGE_FAULT_NS, **params):
+        """
+        在页面置换算法前加上地址转换：虚拟地址先查TLB，缺失时遍历多级页表，页面不在内存中时缺页，
+        由置换算法决定置换哪个页面，被置换页面的页表项和TLB表项随之作废。每次访问都交给置换算法，
+        使LRU等算法看到完整的访问序列。
+
+        参数:
+        algorithm (str): 置换算法名称，不能是需要预知未来访问的OPT。
+        frames (int): 物理块数。
+        page_size (int): 页面大小（字节）。
+        levels (int): 页表级数，为None时按VIRTUAL_ADDRESS_BITS推算（4KB页面为4级，2MB大页为3级）。
+        bits_per_level (int): 页表每级索引的位数。
+        tlb_entries (int): TLB表项数。
+        tlb_ways (int): TLB相联度。
+        tlb_policy (str): TLB组内的置换策略。
+        tlb_ns (float): 一次TLB查找的时间（纳秒）。
+        memory_ns (float): 一次内存访问的时间（纳秒），页表遍历的每一级各计一次。
+        page_fault_ns (float): 一次缺页处理的时间（纳秒）。
+        **params: 传给置换算法类的其他参数。
+        """
+        if algorithm == 'OPT':
+            raise ValueError("地址转换按访问顺序逐个处理，不能使用需要预知未来访问的OPT。")
+        if levels is None:
+            shift = trace_loader.page_shift(page_size) or 0
+            levels = min(max(-(-(VIRTUAL_ADDRESS_BITS - shift) // bits_per_level), PAGE_TABLE_LEVELS[0]),
+                         PAGE_TABLE_LEVELS[-1])
+        self.alg = ALGORITHMS[algorithm](frames, **params)
+        self.page_table = PageTable(levels, page_size, bits_per_level)
+        self.tlb = TLB(tlb_entries, tlb_ways, tlb_policy)
+        self.tlb_ns = tlb_ns
+        self.memory_ns = memory_ns
+        self.page_fault_ns = page_fault_ns
+        self.references = 0
+
+    def access(self, address, access_type=ACCESS_READ):
+        """
+        处理一次虚拟地址访问。
+
+        参数:
+        address (int): 虚拟地址。
+        access_type (int): ACCESS_READ或ACCESS_WRITE。
+
+        返回:
+        int: 物理地址。
+        """
+        page_table = self.page_table
+        if address >> page_table.virtual_address_bits:
+            raise ValueError(f"虚拟地址 {address:#x} 超出{page_table.levels}级页表的映射范围。")
+        vpn = address >> page_table.page_shift
+        self.translate(vpn, access_type)
+        frame = page_table.tables[page_table.leaf(vpn)][vpn & page_table.index_mask]
+        return (frame << page_table.page_shift) | (address & (page_table.page_size - 1))
+
+    def translate(self, vpn, access_type=ACCESS_READ):
+        # 处理一次虚拟页号的访问：查TLB，缺失时遍历页表，页面不在内存中时缺页
+        now = self.references
+        self.references += 1
+        if self.tlb.lookup(vpn, now):
+            self.alg.reference_access(vpn, access_type)
+            return
+        self.miss(vpn, access_type, now)
+
+    def miss(self, vpn, access_type, now):
+        # TLB缺失：遍历页表，页面不在内存中时由置换算法处理缺页，然后装入TLB
+        page_table = self.page_table
+        present = page_table.walk(vpn) >= 0
+        evicted = self.alg.reference_access(vpn, access_type)
+        if not present:
+            if evicted is not None:
+                frame = page_table.unmap(evicted)
+                self.tlb.invalidate(evicted)
+            else:
+                # 内存未满时依次使用空闲的物理块，之后复用被置换页面的物理块
+                frame = len(self.alg.memory) - 1
+            page_table.map(vpn, frame)
+        self.tlb.insert(vpn, now)
+
+    def replay(self, addresses, access_types=None):
+        """
+        处理一批虚拟地址，地址换算为虚拟页号用numpy批量完成，TLB命中的路径内联在循环中。
+
+        参数:
+        addresses: 虚拟地址数组或列表。
+        access_types: 与addresses等长的访问类型序列，为None时全部视为读访问。
+        """
+        addresses = np.asarray(addresses, dtype=np.uint64)
+        page_table, tlb, alg = self.page_table, self.tlb, self.alg
+        if len(addresses) and int(addresses.max()) >> page_table.virtual_address_bits:
+            raise ValueError(f"trace中有超出{page_table.levels}级页表映射范围的虚拟地址。")
+        vpns = (addresses >> np.uint64(page_table.page_shift)).tolist()
+        slot_of, stamps, lru = tlb.slot_of, tlb.stamps, tlb.policy == 'LRU'
+        miss = self.miss
+        now = self.references
+        hits = 0
+        if access_types is None:
+            # 全部为读访问时TLB命中直接调用reference_page，省去脏页面的簿记
+            reference_page = alg.reference_page
+            for vpn in vpns:
+                # 与TLB.lookup相同，内联以省去每次访问的方法调用
+                slot = slot_of.get(vpn)
+                if slot is not None:
+                    hits += 1
+                    if lru:
+                        stamps[slot] = now
+                    reference_page(vpn)
+                else:
+                    miss(vpn, ACCESS_READ, now)
+                now += 1
+        else:
+            if isinstance(access_types, np.ndarray):
+                access_types = access_types.tolist()
+            reference_access = alg.reference_access
+            for vpn, access_type in zip(vpns, access_types):
+                slot = slot_of.get(vpn)
+                if slot is not None:
+                    hits += 1
+                    if lru:
+                        stamps[slot] = now
+                    reference_access(vpn, access_type)
+                else:
+                    miss(vpn, access_type, now)
+                now += 1
+        tlb.hits += hits
+        tlb.misses += now - self.references - hits
+        self.references = now
+
+    def replay_trace(self, trace):
+        """
+        分块处理trace文件中的全部虚拟地址，内存占用与trace大小无关。
+
+        参数:
+        trace: 以虚拟地址为记录打开的trace（trace_loader.open_trace(path, page_size=1)）。
+        """
+        for addresses, access_types in trace.access_chunks():
+            self.replay(addresses, access_types)
+
+    def effective_access_time(self):
+        """
+        返回:
+        float: 有效访问时间（纳秒）：每次访问的TLB查找和数据访问时间，加上平均每次访问分摊的页表遍历和缺页处理时间。
+        """
+        if not self.references:
+            return 0
+        stall = self.page_table.walk_references * self.memory_ns + self.alg.page_faults * self.page_fault_ns
+        return self.tlb_ns + self.memory_ns + stall / self.references
+
+    def summary(self):
+        """
+        返回:
+        dict: 访问次数、TLB命中率、页表遍历次数、缺页率、页表内存和有效访问时间等统计。
+        """
+        page_table, tlb, alg = self.page_table, self.tlb, self.alg
+        return {
+            'algorithm': type(alg).__name__,
+            'frames': alg.frames,
+            'page_size': page_table.page_size,
+            'levels': page_table.levels,
+            'references': self.references,
+            'tlb_hits': tlb.hits,
+            'tlb_misses': tlb.misses,
+            'tlb_hit_rate': tlb.hit_rate(),
+            'tlb_invalidations': tlb.invalidations,
+            'page_walks': page_table.walks,
+            'walk_references': page_table.walk_references,
+            'page_faults': alg.page_faults,
+            'page_fault_rate': alg.page_faults / self.references if self.references else 0,
+            'page_tables': page_table.tables_per_level,
+            'page_table_bytes': page_table.memory_bytes(),
+            'effective_access_ns': self.effective_access_time(),
+        }
+
+
+def format_summary(summary):
+    return (f"页面 {summary['page_size']}B，{summary['levels']}级页表，{summary['frames']}块，{summary['algorithm']}：\n"
+            f"  访问 {summary['references']}，TLB命中率 {summary['tlb_hit_rate']:.2%}，"
+            f"页表遍历 {summary['page_walks']}（访存 {summary['walk_references']}），"
+            f"缺页 {summary['page_faults']}（{summary['page_fault_rate']:.4%}）\n"
+            f"  各级页表 {summary['page_tables']}，页表占用 {summary['page_table_bytes'] / 1024:.0f}KB，"
+            f"有效访问时间 {summary['effective_access_ns']:.1f}ns")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按虚拟地址回放trace：TLB、多级页表和页面置换，比较不同页面大小（如大页）的有效访问时间")
+    parser.add_argument('trace', help="以虚拟地址为记录的trace文件，格式按扩展名判断（见trace_loader.open_trace）")
+    parser.add_argument('--algorithm', choices=[name for name in ALGORITHMS if name != 'OPT'], default='LRU')
+    parser.add_argument('--memory', type=int, default=1 << 30, help="物理内存大小（字节），物理块数为内存大小除以页面大小")
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[4096, 2 << 20],
+                        help="依次模拟的页面大小（字节），默认比较4KB页面和2MB大页")
+    parser.add_argument('--levels', type=int, choices=PAGE_TABLE_LEVELS, default=None,
+                        help=f"页表级数，默认按{VIRTUAL_ADDRESS_BITS}位虚拟地址推算")
+    parser.add_argument('--bits-per-level', type=int, default=BITS_PER_LEVEL, help="页表每级索引的位数")
+    parser.add_argument('--tlb-entries', type=int, default=64)
+    parser.add_argument('--tlb-ways', type=int, default=4)
+    parser.add_argument('--tlb-policy', choices=TLB_POLICIES, default='LRU')
+    parser.add_argument('--tlb-ns', type=float, default=TLB_NS)
+    parser.add_argument('--memory-ns', type=float, default=MEMORY_NS)
+    parser.add_argument('--page-fault-ns', type=float, default=PAGE_FAULT_NS)
+    args = parser.parse_args()
+
+    for page_size in args.page_sizes:
+        start = time.perf_counter()
+        translator = AddressTranslator(args.algorithm, max(1, args.memory // page_size), page_size, args.levels,
+                                       args.bits_per_level, args.tlb_entries, args.tlb_ways, args.tlb_policy,
+                                       args.tlb_ns, args.memory_ns, args.page_fault_ns)
+        translator.replay_trace(trace_loader.open_trace(args.trace, page_size=1))
+        print(format_summary(translator.summary()))
+        print(f"  用时 {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,295 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import RawValue
+
+from PageReplacementAlgorithm import ALGORITHMS, ACCESS_READ, ACCESS_WRITE
+
+# 可能出现Belady异常（物理块数增加、缺页次数反而增加）的算法，LRU和OPT是栈算法，不会出现异常
+POLICIES = ('FIFO', 'SimpleCLOCK', 'EnhancedCLOCK')
+# 按前多少次访问把搜索树切分为子树，分给各个进程
+SPLIT_DEPTH = 6
+# 每个物理块数最多报告的示例数
+EXAMPLE_LIMIT = 10
+# 每个进程记录的已访问状态数上限，超过时清空重新记录
+VISITED_LIMIT = 1 << 20
+
+# 子进程中共享的剪枝下界（已找到的最大缺页差），由进程池的初始化函数设置
+_shared_floor = None
+
+
+def _share_floor(floor):
+    global _shared_floor
+    _shared_floor = floor
+
+
+def _run_task(policy, frames, prefix, length, pages, writes, limit):
+    # 在子进程中搜索以prefix开头的子树
+    return search_subtree(policy, frames, prefix, length, pages, writes, limit, _shared_floor)
+
+
+def canonical_prefixes(depth, pages, writes=False):
+    """
+    生成长度为depth的所有规范访问序列：页面按首次出现的顺序编号为1, 2, ...，
+    只是页面编号不同的序列缺页情况完全相同，每组只保留一个。
+
+    参数:
+    depth (int): 序列长度。
+    pages (int): 不同页面数的上限。
+    writes (bool): 每次访问是否可以是写访问。
+
+    返回:
+    list: (页面, 访问类型) 元组的序列。
+    """
+    access_types = (ACCESS_READ, ACCESS_WRITE) if writes else (ACCESS_READ,)
+    prefixes = []
+
+    def extend(prefix, used):
+        if len(prefix) == depth:
+            prefixes.append(tuple(prefix))
+            return
+        for page in range(1, min(used + 1, pages) + 1):
+            for access_type in access_types:
+                prefix.append((page, access_type))
+                extend(prefix, max(used, page))
+                prefix.pop()
+
+    extend([], 0)
+    return prefixes
+
+
+def state_signature(alg):
+    """
+    返回:
+    tuple: 决定此后缺页情况的全部状态（内存中的页面及顺序、时钟算法的用位、修改位和指针）。
+    """
+    return (tuple(alg.memory), bytes(getattr(alg, 'use_bit', b'')), bytes(getattr(alg, 'modify_bit', b'')),
+            getattr(alg, 'hand', 0))
+
+
+class Search:
+    def __init__(self, length, pages, writes, limit, floor):
+        """
+        深度优先搜索访问序列，同时用frames和frames+1个物理块模拟，寻找缺页差（frames+1的缺页次数减去frames的）最大的序列。
+        每个节点从父节点的算法实例复制状态后只处理一次访问，共同前缀只模拟一次；
+        剩余访问即使每次都拉大差距也达不到已找到的最大差时剪枝；
+        剩余长度、已用页面数和两个算法状态都相同、缺页差不大于已搜索过的节点时，子树不会有更好的结果，直接跳过。
+
+        参数:
+        length (int): 序列长度。
+        pages (int): 不同页面数的上限。
+        writes (bool): 每次访问是否可以是写访问。
+        limit (int): 最多记录的示例数。
+        floor: 多个进程共享的剪枝下界（RawValue），只记录缺页差不小于它的序列。
+        """
+        self.length = length
+        self.pages = pages
+        self.access_types = (ACCESS_READ, ACCESS_WRITE) if writes else (ACCESS_READ,)
+        self.limit = limit
+        self.floor = floor
+        self.best = 0  # 本进程找到的最大缺页差
+        self.examples = []  # 缺页差等于best的序列
+        self.nodes = 0  # 模拟过的节点数
+        self.visited = {}  # (剩余长度, 已用页面数, 两个算法状态) -> 到达时的最大缺页差
+
+    def threshold(self):
+        # 示例已记满时只寻找更大的缺页差
+        return max(self.floor.value, self.best + (len(self.examples) >= self.limit))
+
+    def visit(self, small, large, sequence, used):
+        self.nodes += 1
+        gap = large.page_faults - small.page_faults
+        remaining = self.length - len(sequence)
+        if gap + remaining < self.threshold():
+            return
+        if remaining == 0:
+            self.record(sequence, gap)
+            return
+        key = (remaining, used, state_signature(small), state_signature(large))
+        if self.visited.get(key, gap - 1) >= gap:
+            return
+        if len(self.visited) >= VISITED_LIMIT:
+            self.visited.clear()
+        self.visited[key] = gap
+        choices = [(page, access_type) for page in range(1, min(used + 1, self.pages) + 1)
+                   for access_type in self.access_types]
+        last = len(choices) - 1
+        for index, (page, access_type) in enumerate(choices):
+            if index == last:
+                # 最后一个后续访问直接沿用当前实例，省去一次复制
+                next_small, next_large = small, large
+            else:
+                next_small, next_large = small.clone(), large.clone()
+            next_small.reference_access(page, access_type)
+            next_large.reference_access(page, access_type)
+            sequence.append((page, access_type))
+            self.visit(next_small, next_large, sequence, max(used, page))
+            sequence.pop()
+
+    def record(self, sequence, gap):
+        if gap > self.best:
+            self.best = gap
+            self.examples = []
+            if gap > self.floor.value:
+                self.floor.value = gap
+        if gap == self.best and len(self.examples) < self.limit:
+            self.examples.append(tuple(sequence))
+
+
+def search_subtree(policy, frames, prefix, length, pages, writes=False, limit=EXAMPLE_LIMIT, floor=None):
+    """
+    在以prefix开头、长度为length的规范访问序列中搜索缺页差最大的序列。
+
+    参数:
+    policy (str): POLICIES之一。
+    frames (int): 较少的物理块数，与frames+1比较。
+    prefix (tuple): (页面, 访问类型) 元组组成的前缀。
+    length (int): 序列长度。
+    pages (int): 不同页面数的上限。
+    writes (bool): 每次访问是否可以是写访问。
+    limit (int): 最多记录的示例数。
+    floor: 剪枝下界（RawValue），为None时从1开始，即只记录出现异常的序列。
+
+    返回:
+    tuple: (最大缺页差, 示例列表, 模拟过的节点数)，没有找到异常时最大缺页差为0、示例列表为空。
+    """
+    algorithm = ALGORITHMS[policy]
+    small, large = algorithm(frames), algorithm(frames + 1)
+    used = 0
+    for page, access_type in prefix:
+        small.reference_access(page, access_type)
+        large.reference_access(page, access_type)
+        used = max(used, page)
+    search = Search(length, pages, writes, limit, floor if floor is not None else RawValue('i', 1))
+    search.visit(small, large, list(prefix), used)
+    return search.best, search.examples, search.nodes
+
+
+def search(policy, frames, length, pages=None, writes=False, limit=EXAMPLE_LIMIT, max_workers=None):
+    """
+    搜索长度为length的访问序列中，frames+1个物理块比frames个物理块缺页多得最多的序列。
+    搜索树按前SPLIT_DEPTH次访问切分后分给多个进程，进程之间共享已找到的最大缺页差用于剪枝。
+
+    参数:
+    policy (str): POLICIES之一。
+    frames (int): 较少的物理块数。
+    length (int): 序列长度。
+    pages (int): 不同页面数的上限，默认为frames+2。
+    writes (bool): 每次访问是否可以是写访问（对EnhancedCLOCK有意义）。
+    limit (int): 最多报告的示例数。
+    max_workers (int): 进程数，为1时在当前进程中运行，为None时使用全部CPU。
+
+    返回:
+    dict: 包含gap（最大缺页差，没有异常时为0）、examples（示例序列）、faults（第一个示例在两种物理块数下的缺页次数）
+          和nodes（模拟过的节点数）的字典。
+    """
+    pages = pages or frames + 2
+    prefixes = canonical_prefixes(min(SPLIT_DEPTH, length), pages, writes)
+    floor = RawValue('i', 1)
+    results = []
+    if max_workers == 1:
+        _share_floor(floor)
+        results = [_run_task(policy, frames, prefix, length, pages, writes, limit) for prefix in prefixes]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_share_floor, initargs=(floor,)) as executor:
+            futures = [executor.submit(_run_task, policy, frames, prefix, length, pages, writes, limit)
+                       for prefix in prefixes]
+            results = [future.result() for future in as_completed(futures)]
+    gap = max(best for best, _, _ in results)
+    examples = sorted(example for best, found, _ in results if best == gap for example in found)[:limit] if gap else []
+    return {
+        'policy': policy,
+        'frames': frames,
+        'length': length,
+        'gap': gap,
+        'examples': examples,
+        'faults': count_faults(policy, frames, examples[0]) if examples else None,
+        'nodes': sum(nodes for _, _, nodes in results),
+    }
+
+
+def minimal_anomaly(policy, frames, max_length, pages=None, writes=False, limit=EXAMPLE_LIMIT, max_workers=None):
+    """
+    从短到长逐个长度搜索，返回出现Belady异常的最短访问序列，参数见search。
+    至少要有frames+2个不同页面才可能出现异常，从长度frames+2开始搜索。
+
+    返回:
+    dict: 最短长度上search的结果，到max_length仍没有异常时返回max_length上的结果（gap为0）。
+    """
+    nodes = 0
+    for length in range(frames + 2, max_length + 1):
+        result = search(policy, frames, length, pages, writes, limit, max_workers)
+        nodes += result['nodes']
+        if result['gap']:
+            break
+    result['nodes'] = nodes
+    return result
+
+
+def count_faults(policy, frames, sequence):
+    """
+    用全新的算法实例重新模拟，确认搜索结果。
+
+    返回:
+    tuple: (frames个物理块的缺页次数, frames+1个物理块的缺页次数)。
+    """
+    pages = [page for page, _ in sequence]
+    access_types = [access_type for _, access_type in sequence]
+    faults = []
+    for count in (frames, frames + 1):
+        alg = ALGORITHMS[policy](count)
+        alg.simulate(pages, access_types=access_types)
+        faults.append(alg.page_faults)
+    return tuple(faults)
+
+
+def format_sequence(sequence):
+    # 写访问的页面后加*
+    return ','.join(f"{page}*" if access_type == ACCESS_WRITE else str(page) for page, access_type in sequence)
+
+
+def format_result(result):
+    if not result['gap']:
+        return f"{result['policy']} {result['frames']}->{result['frames'] + 1}: 长度{result['length']}以内没有异常"
+    small, large = result['faults']
+    lines = [f"{result['policy']} {result['frames']}->{result['frames'] + 1}: 长度{result['length']}，"
+             f"缺页 {small}->{large}，缺页率差 {result['gap'] / result['length']:.2%}"]
+    lines.extend('  ' + format_sequence(example) for example in result['examples'])
+    return '\n'.join(lines)
+
+
+def parse_frame_counts(text):
+    # "3" 或 "1:4"（闭区间）
+    if ':' in text:
+        start, stop = (int(part) for part in text.split(':'))
+        return list(range(start, stop + 1))
+    return [int(part) for part in text.split(',')]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="搜索FIFO和时钟算法出现Belady异常的最短访问序列，以及缺页率差最大的序列")
+    parser.add_argument('--policies', nargs='+', choices=POLICIES, default=list(POLICIES))
+    parser.add_argument('--frames', type=parse_frame_counts, default=[3], help="较少的物理块数，如 3 或 1:4，与多一块时比较")
+    parser.add_argument('--max-length', type=int, default=12, help="搜索最短异常序列时的最大长度")
+    parser.add_argument('--length', type=int, default=None,
+                        help="同时在这个长度上搜索缺页率差最大的序列，默认只搜索最短异常序列")
+    parser.add_argument('--pages', type=int, default=None, help="不同页面数的上限，默认为物理块数加2")
+    parser.add_argument('--writes', action='store_true', help="访问可以是写访问（影响EnhancedCLOCK）")
+    parser.add_argument('--examples', type=int, default=EXAMPLE_LIMIT, help="每项最多列出的示例数")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认使用全部CPU，1为在当前进程中运行")
+    args = parser.parse_args()
+
+    for policy in args.policies:
+        for frames in args.frames:
+            start = time.perf_counter()
+            result = minimal_anomaly(policy, frames, args.max_length, args.pages, args.writes, args.examples,
+                                     args.workers)
+            print(format_result(result))
+            if args.length is not None:
+                worst = search(policy, frames, args.length, args.pages, args.writes, args.examples, args.workers)
+                print(format_result(worst))
+                result['nodes'] += worst['nodes']
+            elapsed = time.perf_counter() - start
+            print(f"  模拟了 {result['nodes']} 个节点，用时 {elapsed:.1f}s（{result['nodes'] / elapsed:.0f} 个/秒，"
+                  f"{os.cpu_count() if args.workers is None else args.workers} 个进程）")
@@ -0,0 +1,318 @@
+import argparse
+import io
+import random
+import time
+
+from PageReplacementAlgorithm import generate_page_sequence, FIFO, LRU, OPT, LFU, SimpleCLOCK, EnhancedCLOCK, \
+    ACCESS_READ, ACCESS_WRITE, TRACE_FULL
+
+
+# 旧版LRU算法（逐次min扫描实现），仅作为性能对比和结果校验的基准
+# 旧版算法提供了file时与原来一样逐行输出每一步的内存状态，算法名与新实现相同，便于逐行对比
+class LegacyLRU:
+    def __init__(self, frames):
+        self.frames = frames
+        self.memory = []
+        self.page_time = {}
+        self.page_faults = 0
+        self.page_hits = 0
+        self.replacements = 0
+
+    def write_state(self, file, counter):
+        if file is not None:
+            name = self.__class__.__name__[len('Legacy'):]
+            file.write(f"{counter}: {name} - Memory state: {self.memory}\n")
+
+    def simulate(self, page_sequence, file=None):
+        for time_, page in enumerate(page_sequence):
+            if page not in self.memory:
+                self.page_faults += 1
+                if len(self.memory) == self.frames:
+                    oldest_page = min(self.page_time, key=self.page_time.get)
+                    self.memory.remove(oldest_page)
+                    del self.page_time[oldest_page]
+                    self.replacements += 1
+                self.memory.append(page)
+            else:
+                self.page_hits += 1
+            self.page_time[page] = time_
+            self.write_state(file, time_ + 1)
+
+
+# 旧版FIFO算法（列表队列，每次置换都从表头弹出并线性删除），仅作为性能对比和结果校验的基准
+class LegacyFIFO(LegacyLRU):
+    def simulate(self, page_sequence, file=None):
+        queue = []
+        for counter, page in enumerate(page_sequence, start=1):
+            if page not in self.memory:
+                self.page_faults += 1
+                if len(self.memory) == self.frames:
+                    self.memory.remove(queue.pop(0))
+                    self.replacements += 1
+                self.memory.append(page)
+                queue.append(page)
+            else:
+                self.page_hits += 1
+            self.write_state(file, counter)
+
+
+# 旧版OPT算法（每次缺页都切片并扫描未来序列），仅作为性能对比和结果校验的基准
+class LegacyOPT(LegacyLRU):
+    def simulate(self, page_sequence, file=None):
+        for i, page in enumerate(page_sequence):
+            if page not in self.memory:
+                self.page_faults += 1
+                if len(self.memory) == self.frames:
+                    self.memory.remove(self.find_longest_unused_page(page_sequence[i + 1:]))
+                    self.replacements += 1
+                self.memory.append(page)
+            else:
+                self.page_hits += 1
+            self.write_state(file, i + 1)
+
+    def find_longest_unused_page(self, future_sequence):
+        last_used = -1
+        page_to_replace = None
+        for page in self.memory:
+            if page not in future_sequence:
+                return page
+            index = future_sequence.index(page)
+            if index > last_used:
+                last_used = index
+                page_to_replace = page
+        return page_to_replace
+
+
+# 旧版LFU算法（每次淘汰都扫描全部频率和内存），仅作为性能对比和结果校验的基准
+class LegacyLFU(LegacyLRU):
+    def simulate(self, page_sequence, file=None):
+        page_frequency = {}
+        for counter, page in enumerate(page_sequence, start=1):
+            if page not in self.memory:
+                self.page_faults += 1
+                if len(self.memory) == self.frames:
+                    least_used = min(page_frequency.values())
+                    least_frequent_pages = [p for p in page_frequency if page_frequency[p] == least_used]
+                    least_frequent_page = next(p for p in self.memory if p in least_frequent_pages)
+                    self.memory.remove(least_frequent_page)
+                    del page_frequency[least_frequent_page]
+                    self.replacements += 1
+                self.memory.append(page)
+                page_frequency[page] = 1
+            else:
+                self.page_hits += 1
+                page_frequency[page] += 1
+            self.write_state(file, counter)
+
+
+# 旧版简单时钟算法（用位字典，命中时线性查找页面所在帧），仅作为性能对比和结果校验的基准
+class LegacySimpleCLOCK(LegacyLRU):
+    def simulate(self, page_sequence, file=None):
+        use_bit = {i: False for i in range(self.frames)}
+        hand = 0
+        for counter, page in enumerate(page_sequence, start=1):
+            if page not in self.memory:
+                self.page_faults += 1
+                while use_bit[hand]:
+                    use_bit[hand] = False
+                    hand = (hand + 1) % self.frames
+                if len(self.memory) == self.frames:
+                    self.memory[hand] = page
+                    self.replacements += 1
+                else:
+                    self.memory.append(page)
+                use_bit[hand] = True
+            else:
+                self.page_hits += 1
+                use_bit[self.memory.index(page)] = True
+            self.write_state(file, counter)
+
+
+# 旧版增强时钟算法（用位和修改位字典，命中时线性查找页面所在帧），仅作为性能对比和结果校验的基准
+# 内存未满时页面装入第一个空帧；用位和修改位设在页面实际所在的帧上
+class LegacyEnhancedCLOCK(LegacyLRU):
+    def simulate(self, page_sequence, file=None):
+        use_bit = {i: False for i in range(self.frames)}
+        modify_bit = {i: False for i in range(self.frames)}
+        hand = 0
+        for counter, page in enumerate(page_sequence, start=1):
+            if page not in self.memory:
+                self.page_faults += 1
+                if len(self.memory) < self.frames:
+                    frame = len(self.memory)
+                    self.memory.append(page)
+                    hand = (frame + 1) % self.frames
+                else:
+                    while use_bit[hand] or modify_bit[hand]:
+                        use_bit[hand] = False
+                        hand = (hand + 1) % self.frames
+                    frame = hand
+                    self.memory[frame] = page
+                    self.replacements += 1
+                    hand = (hand + 1) % self.frames
+                use_bit[frame] = True
+                modify_bit[frame] = False
+            else:
+                self.page_hits += 1
+                use_bit[self.memory.index(page)] = True
+            self.write_state(file, counter)
+
+
+# 参与对比的算法：名称 -> (新实现, 旧实现, 旧实现默认运行的前缀长度)
+ENGINES = {
+    'FIFO': (FIFO, LegacyFIFO, 20_000),
+    'LRU': (LRU, LegacyLRU, 20_000),
+    'OPT': (OPT, LegacyOPT, 5_000),
+    'LFU': (LFU, LegacyLFU, 5_000),
+    'SimpleCLOCK': (SimpleCLOCK, LegacySimpleCLOCK, 20_000),
+    'EnhancedCLOCK': (EnhancedCLOCK, LegacyEnhancedCLOCK, 20_000),
+}
+
+
+def time_simulation(alg, page_sequence):
+    """
+    计时一次模拟过程（不输出内存状态）。
+
+    参数:
+    alg: 页面置换算法实例。
+    page_sequence (list): 页面请求序列。
+
+    返回:
+    float: 平均每次页面访问耗费的纳秒数。
+    """
+    start = time.perf_counter()
+    alg.simulate(page_sequence)
+    elapsed = time.perf_counter() - start
+    return elapsed * 1e9 / len(page_sequence)
+
+
+def compare(new_class, legacy_class, page_sequence, frames, legacy_length):
+    """
+    对比新旧实现的性能，并校验两者在相同前缀上的统计结果完全一致。
+
+    参数:
+    new_class: 新的算法类。
+    legacy_class: 旧的基准算法类。
+    page_sequence (list): 页面请求序列。
+    frames (int): 物理块数。
+    legacy_length (int): 旧实现只运行序列的前legacy_length个页面，避免耗时过长。
+
+    返回:
+    tuple: (新实现每次访问纳秒数, 旧实现每次访问纳秒数)。
+    """
+    prefix = page_sequence[:legacy_length]
+    new_alg, legacy_alg = new_class(frames), legacy_class(frames)
+    new_alg.simulate(prefix)
+    legacy_ns = time_simulation(legacy_alg, prefix)
+    for counter in ('page_faults', 'page_hits', 'replacements'):
+        if getattr(new_alg, counter) != getattr(legacy_alg, counter):
+            raise AssertionError(f"{new_class.__name__}: {counter} 与旧实现不一致")
+    new_ns = time_simulation(new_class(frames), page_sequence)
+    return new_ns, legacy_ns
+
+
+def verify_equivalence(names, trials=200, max_length=300, max_frames=16):
+    """
+    在随机页面序列上校验新旧实现的缺页、命中和置换次数完全一致，并逐行对比每一步的内存状态
+    （TRACE_FULL输出），页面所在帧或装入顺序的差异也会被发现。
+
+    参数:
+    names (list): 要校验的算法名称。
+    trials (int): 随机序列的数量。
+    max_length (int): 随机序列的最大长度。
+    max_frames (int): 校验的最大物理块数。
+
+    返回:
+    int: 校验通过的（算法, 序列, 物理块数）组合数，不一致时抛出AssertionError。
+    """
+    rng = random.Random(12345)
+    checked = 0
+    for _ in range(trials):
+        upper_bound = rng.choice([2, 3, 5, 10, 50])
+        page_sequence = [rng.randint(1, upper_bound) for _ in range(rng.randint(1, max_length))]
+        for name in names:
+            new_class, legacy_class, _ = ENGINES[name]
+            for frames in range(1, max_frames + 1):
+                new_alg, legacy_alg = new_class(frames), legacy_class(frames)
+                new_output, legacy_output = io.StringIO(), io.StringIO()
+                new_alg.simulate(page_sequence, new_output, TRACE_FULL)
+                legacy_alg.simulate(page_sequence, legacy_output)
+                for counter in ('page_faults', 'page_hits', 'replacements'):
+                    if getattr(new_alg, counter) != getattr(legacy_alg, counter):
+                        raise AssertionError(f"{name}: frames={frames} 时 {counter} 与旧实现不一致: {page_sequence}")
+                for new_line, legacy_line in zip(new_output.getvalue().splitlines(),
+                                                 legacy_output.getvalue().splitlines()):
+                    if new_line != legacy_line:
+                        raise AssertionError(f"{name}: frames={frames} 时内存状态与旧实现不一致: "
+                                             f"{new_line} != {legacy_line}: {page_sequence}")
+                checked += 1
+    return checked
+
+
+def verify_write_backs(names, trials=200, max_length=300, max_frames=16):
+    """
+    在随机读写序列上逐步校验新实现的写回计数：内存未满（还没有发生置换）时没有写回，
+    置换出的脏页面不多于置换次数，写回次数加上仍为脏的页面数不多于写访问次数，脏页面都在内存中。
+    EnhancedCLOCK提前写回扫描途经的脏页面，写回次数可以多于置换次数，因此不比较两者。
+
+    参数:
+    names (list): 要校验的算法名称。
+    trials (int): 随机序列的数量。
+    max_length (int): 随机序列的最大长度。
+    max_frames (int): 校验的最大物理块数。
+
+    返回:
+    int: 校验通过的（算法, 序列, 物理块数）组合数，不满足时抛出AssertionError。
+    """
+    rng = random.Random(54321)
+    checked = 0
+    for _ in range(trials):
+        upper_bound = rng.choice([2, 3, 5, 10, 50])
+        length = rng.randint(1, max_length)
+        page_sequence = [rng.randint(1, upper_bound) for _ in range(length)]
+        access_types = [rng.choice((ACCESS_READ, ACCESS_WRITE)) for _ in range(length)]
+        for name in names:
+            new_class = ENGINES[name][0]
+            for frames in range(1, max_frames + 1):
+                alg = new_class(frames)
+                alg.prepare(page_sequence)
+                for page, access_type in zip(page_sequence, access_types):
+                    alg.reference_access(page, access_type)
+                    if (alg.replacements == 0 and alg.write_backs
+                            or alg.dirty_evictions > alg.replacements
+                            or alg.write_backs + len(alg.dirty) > alg.page_writes
+                            or not alg.dirty.issubset(alg.memory)):
+                        raise AssertionError(f"{name}: frames={frames} 时写回计数不一致: "
+                                             f"{list(zip(page_sequence, access_types))}")
+                checked += 1
+    return checked
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="页面置换算法新旧实现性能对比")
+    parser.add_argument('--algorithms', nargs='+', choices=list(ENGINES), default=list(ENGINES),
+                        help="参与对比的算法")
+    parser.add_argument('--length', type=int, default=10_000_000, help="页面序列的大小")
+    parser.add_argument('--frames', type=int, default=4096, help="物理块数")
+    parser.add_argument('--upper-bound', type=int, default=8192, help="页面编号的上限")
+    parser.add_argument('--legacy-length', type=int, default=None, help="旧实现运行的前缀长度")
+    parser.add_argument('--seed', type=int, default=0, help="随机数种子")
+    parser.add_argument('--verify', action='store_true', help="只在随机序列上校验新旧实现结果一致")
+    args = parser.parse_args()
+
+    if args.verify:
+        print(f"校验通过: {verify_equivalence(args.algorithms)} 个组合")
+        print(f"写回计数校验通过: {verify_write_backs(args.algorithms)} 个组合")
+        raise SystemExit(0)
+
+    random.seed(args.seed)
+    page_sequence = generate_page_sequence(args.length, args.upper_bound)
+
+    for name in args.algorithms:
+        new_class, legacy_class, legacy_length = ENGINES[name]
+        legacy_length = args.legacy_length or legacy_length
+        new_ns, legacy_ns = compare(new_class, legacy_class, page_sequence, args.frames, legacy_length)
+        print(f"{name}  frames={args.frames} length={args.length}")
+        print(f"  新实现: {new_ns:10.1f} ns/次访问")
+        print(f"  旧实现: {legacy_ns:10.1f} ns/次访问（前{legacy_length}个页面）")
+        print(f"  加速比: {legacy_ns / new_ns:10.1f}x")
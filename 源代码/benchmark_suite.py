@@ -0,0 +1,315 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from PageReplacementAlgorithm import ALGORITHMS
+import workload
+
+# 默认的测试网格：序列长度 × 物理块数
+LENGTHS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+FRAME_COUNTS = (2, 16, 256, 4096, 65536)
+# --quick 使用的小网格，用于提交前的快速检查
+QUICK_LENGTHS = (1_000, 10_000, 100_000)
+QUICK_FRAME_COUNTS = (2, 256, 4096)
+# 计时至少覆盖的页面访问总数，短序列会重复运行多次并取最快的一次
+MIN_TIMED_REFERENCES = 1_000_000
+MAX_REPEAT = 20
+# tracemalloc会显著拖慢运行，峰值内存只在序列的前TRACED_SAMPLE个页面上跟踪
+TRACED_SAMPLE = 1_000_000
+# compare 默认容忍的相对退化幅度
+THRESHOLD = 0.25
+# 同一算法和物理块数下，最长序列的ns/次访问超过最短序列的SCALING_LIMIT倍时视为复杂度异常
+SCALING_LIMIT = 4.0
+# 参与复杂度检查的最短序列，更短的序列受固定开销影响太大
+SCALING_MIN_LENGTH = 10_000
+# 比较时检查的指标
+# CPython不提供分配事件的计数，报告中没有“每次访问的分配次数”：retained_blocks_per_ref是模拟结束后
+# 仍存活的新内存块数 / 访问次数，反映算法状态随序列增长的情况，访问过程中分配又释放的临时对象不计入；
+# traced_peak_bytes_per_ref是tracemalloc跟踪到的峰值内存字节数 / 访问次数
+METRICS = ('ns_per_ref', 'peak_rss_bytes', 'retained_blocks_per_ref', 'traced_peak_bytes_per_ref')
+
+
+def benchmark_trace(length, frames, seed):
+    """
+    生成测试用的页面序列：页面编号在1到2倍物理块数之间均匀分布，缺页率约为一半，命中和置换路径都会被覆盖。
+
+    参数:
+    length (int): 页面序列的大小。
+    frames (int): 物理块数。
+    seed (int): 随机数种子。
+
+    返回:
+    numpy.ndarray: int32页面序列。
+    """
+    return workload.uniform_sequence(length, max(16, 2 * frames), seed=seed)
+
+
+def peak_rss_bytes():
+    """
+    返回:
+    int: 当前进程到目前为止的峰值常驻内存（字节）。
+    """
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_case(name, length, frames, seed=0):
+    """
+    在当前进程中测量一个用例，应在独立的子进程中调用，否则峰值内存会受之前用例的影响。
+
+    参数:
+    name (str): 算法名称。
+    length (int): 页面序列的大小。
+    frames (int): 物理块数。
+    seed (int): 随机数种子。
+
+    返回:
+    dict: 测量结果，包括ns_per_ref（每次访问纳秒数）、peak_rss_bytes（峰值常驻内存）、
+          trace_rss_bytes（生成序列后的常驻内存）、retained_blocks_per_ref（模拟结束后仍存活的新内存块数 / 访问次数）、
+          traced_peak_bytes_per_ref（tracemalloc跟踪到的峰值内存字节数 / 访问次数）。
+    """
+    algorithm_class = ALGORITHMS[name]
+    page_sequence = benchmark_trace(length, frames, seed)
+    trace_rss = peak_rss_bytes()
+    repeat = max(1, min(MAX_REPEAT, MIN_TIMED_REFERENCES // length))
+    best = float('inf')
+    for _ in range(repeat):
+        alg = algorithm_class(frames)
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        alg.simulate(page_sequence)
+        best = min(best, time.perf_counter() - start)
+        # 模拟结束后算法实例仍然存活，新增的内存块即算法状态占用的块数
+        retained_blocks = sys.getallocatedblocks() - blocks
+        faults = alg.page_faults
+        del alg
+    peak_rss = peak_rss_bytes()
+
+    sample = page_sequence[:TRACED_SAMPLE]
+    alg = algorithm_class(frames)
+    tracemalloc.start()
+    alg.simulate(sample)
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'algorithm': name,
+        'length': length,
+        'frames': frames,
+        'seed': seed,
+        'repeat': repeat,
+        'page_faults': faults,
+        'ns_per_ref': best * 1e9 / length,
+        'peak_rss_bytes': peak_rss,
+        'trace_rss_bytes': trace_rss,
+        'retained_blocks_per_ref': retained_blocks / length,
+        'traced_peak_bytes_per_ref': traced_peak / len(sample),
+    }
+
+
+def run_case_subprocess(name, length, frames, seed=0, timeout=None):
+    """
+    在新的Python子进程中运行一个用例，使峰值内存只反映该用例。
+
+    参数:
+    name (str): 算法名称。
+    length (int): 页面序列的大小。
+    frames (int): 物理块数。
+    seed (int): 随机数种子。
+    timeout (float): 超时秒数，为None时不限时。
+
+    返回:
+    dict: run_case的结果；超时或子进程出错时返回带有error字段的结果。
+    """
+    command = [sys.executable, __file__, 'case', name, str(length), str(frames), '--seed', str(seed)]
+    case = {'algorithm': name, 'length': length, 'frames': frames, 'seed': seed}
+    try:
+        completed = subprocess.run(command, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return dict(case, error=f"超过 {timeout} 秒")
+    if completed.returncode != 0:
+        return dict(case, error=completed.stderr.strip().splitlines()[-1] if completed.stderr.strip()
+                    else f"退出码 {completed.returncode}")
+    return json.loads(completed.stdout)
+
+
+def run_suite(algorithms, lengths, frame_counts, seed=0, timeout=None, progress=None):
+    """
+    对 算法 × 序列长度 × 物理块数 的网格逐个用例运行基准测试。
+
+    参数:
+    algorithms (list): 算法名称列表。
+    lengths (list): 序列长度列表。
+    frame_counts (list): 物理块数列表。
+    seed (int): 随机数种子，相同的种子生成相同的序列。
+    timeout (float): 每个用例的超时秒数。
+    progress: 可选的回调函数，每完成一个用例调用一次 progress(用例结果)。
+
+    返回:
+    dict: 包含运行环境信息和cases（用例结果列表）的报告，可直接写成JSON。
+    """
+    cases = []
+    for name in algorithms:
+        for frames in frame_counts:
+            for length in lengths:
+                result = run_case_subprocess(name, length, frames, seed, timeout)
+                cases.append(result)
+                if progress is not None:
+                    progress(result)
+    return {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'seed': seed,
+        'cases': cases,
+    }
+
+
+def case_key(case):
+    return case['algorithm'], case['length'], case['frames']
+
+
+def compare_reports(baseline, current, threshold=THRESHOLD):
+    """
+    对比两份报告中相同用例的各项指标，找出退化超过阈值的用例。
+
+    参数:
+    baseline (dict): 基准报告。
+    current (dict): 当前报告。
+    threshold (float): 允许的相对退化幅度，0.25表示慢25%以内不算退化。
+
+    返回:
+    list: 退化记录 (算法, 序列长度, 物理块数, 指标, 基准值, 当前值)；
+          基准中成功而当前失败或超时的用例，指标记为'error'。
+    """
+    baseline_cases = {case_key(case): case for case in baseline['cases'] if 'error' not in case}
+    regressions = []
+    for case in current['cases']:
+        key = case_key(case)
+        if key not in baseline_cases:
+            continue
+        if 'error' in case:
+            regressions.append(key + ('error', None, case['error']))
+            continue
+        old = baseline_cases[key]
+        for metric in METRICS:
+            if metric not in old:
+                continue  # 旧版报告中没有的指标
+            # 每次访问保留的内存块数可能为0，至少允许增加1个块/千次访问的噪声
+            limit = old[metric] * (1 + threshold) + (1e-3 if metric == 'retained_blocks_per_ref' else 0)
+            if case[metric] > limit:
+                regressions.append(key + (metric, old[metric], case[metric]))
+    return regressions
+
+
+def scaling_anomalies(report, limit=SCALING_LIMIT):
+    """
+    在一份报告内部检查复杂度：相同算法和物理块数下，每次访问的耗时应与序列长度基本无关。
+
+    参数:
+    report (dict): 基准测试报告。
+    limit (float): 最长序列与最短序列的ns/次访问之比的上限。
+
+    返回:
+    list: 异常记录 (算法, 物理块数, 最短序列长度, 最长序列长度, 耗时之比)。
+    """
+    groups = {}
+    for case in report['cases']:
+        if 'error' not in case and case['length'] >= SCALING_MIN_LENGTH:
+            groups.setdefault((case['algorithm'], case['frames']), []).append(case)
+    anomalies = []
+    for (name, frames), cases in groups.items():
+        if len(cases) < 2:
+            continue
+        cases.sort(key=lambda case: case['length'])
+        ratio = cases[-1]['ns_per_ref'] / cases[0]['ns_per_ref']
+        if ratio > limit:
+            anomalies.append((name, frames, cases[0]['length'], cases[-1]['length'], ratio))
+    return anomalies
+
+
+def format_case(case):
+    head = f"{case['algorithm']:<14} length={case['length']:<9} frames={case['frames']:<6}"
+    if 'error' in case:
+        return f"{head} 失败: {case['error']}"
+    return (f"{head} {case['ns_per_ref']:9.1f} ns/次访问  峰值内存 {case['peak_rss_bytes'] / 2 ** 20:8.1f} MiB  "
+            f"存活内存块 {case['retained_blocks_per_ref']:7.3f} 块/次访问  "
+            f"tracemalloc峰值 {case['traced_peak_bytes_per_ref']:8.2f} 字节/次访问")
+
+
+def parse_list(text):
+    return [int(part) for part in text.split(',')]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="页面置换算法基准测试套件")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="运行基准测试并写出JSON报告")
+    run_parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    run_parser.add_argument('--lengths', type=parse_list, default=None, help="序列长度，如 1000,100000")
+    run_parser.add_argument('--frames', type=parse_list, default=None, help="物理块数，如 2,256,4096")
+    run_parser.add_argument('--quick', action='store_true', help="使用小网格快速检查")
+    run_parser.add_argument('--seed', type=int, default=0, help="随机数种子")
+    run_parser.add_argument('--timeout', type=float, default=600, help="每个用例的超时秒数")
+    run_parser.add_argument('--output', default='benchmark.json', help="JSON报告路径")
+    run_parser.add_argument('--baseline', default=None, help="运行结束后与该基准报告对比")
+    run_parser.add_argument('--threshold', type=float, default=THRESHOLD, help="允许的相对退化幅度")
+
+    compare_parser = commands.add_parser('compare', help="对比两份JSON报告，有退化时退出码为1")
+    compare_parser.add_argument('baseline', help="基准报告路径")
+    compare_parser.add_argument('current', help="当前报告路径")
+    compare_parser.add_argument('--threshold', type=float, default=THRESHOLD, help="允许的相对退化幅度")
+
+    case_parser = commands.add_parser('case', help="在当前进程中运行单个用例并输出JSON（供run内部使用）")
+    case_parser.add_argument('algorithm', choices=list(ALGORITHMS))
+    case_parser.add_argument('length', type=int)
+    case_parser.add_argument('frames', type=int)
+    case_parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == 'case':
+        print(json.dumps(run_case(args.algorithm, args.length, args.frames, args.seed)))
+        raise SystemExit(0)
+
+    if args.command == 'run':
+        lengths = args.lengths or (QUICK_LENGTHS if args.quick else LENGTHS)
+        frame_counts = args.frames or (QUICK_FRAME_COUNTS if args.quick else FRAME_COUNTS)
+        current = run_suite(args.algorithms, lengths, frame_counts, args.seed, args.timeout,
+                            progress=lambda case: print(format_case(case), flush=True))
+        with open(args.output, 'w') as output_file:
+            json.dump(current, output_file, indent=2)
+        print(f"报告已写入 {args.output}")
+        if args.baseline is None:
+            baseline = None
+        else:
+            with open(args.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+    else:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        with open(args.current) as current_file:
+            current = json.load(current_file)
+
+    failed = False
+    for name, frames, shortest, longest, ratio in scaling_anomalies(current):
+        failed = True
+        print(f"复杂度异常: {name} frames={frames} 长度{longest}的ns/次访问是长度{shortest}的 {ratio:.1f} 倍")
+    if baseline is not None:
+        for name, length, frames, metric, old, new in compare_reports(baseline, current, args.threshold):
+            failed = True
+            head = f"退化: {name} length={length} frames={frames}"
+            if metric == 'error':
+                print(f"{head} 失败: {new}")
+            else:
+                print(f"{head} {metric}: {old:.3f} -> {new:.3f}")
+    raise SystemExit(1 if failed else 0)
@@ -0,0 +1,196 @@
+import argparse
+import os
+import pickle
+import tempfile
+import zlib
+
+import numpy as np
+
+from PageReplacementAlgorithm import ALGORITHMS, as_page_sequence
+import trace_loader
+
+# 检查点文件的标识和格式版本
+MAGIC = b'PRCK'
+VERSION = 1
+# 默认每处理多少次访问写一次检查点
+CHECKPOINT_INTERVAL = 10_000_000
+# 检查点中记录检查点位置之前多少个页面的哈希，恢复时用来确认是同一个trace
+FINGERPRINT_PAGES = 4096
+
+
+def fingerprint(page_sequence, offset):
+    """
+    返回:
+    int: 页面序列在offset之前最多FINGERPRINT_PAGES个页面的CRC32，与序列长度无关的常数开销。
+    """
+    start = max(0, offset - FINGERPRINT_PAGES)
+    return zlib.crc32(np.asarray(page_sequence[start:offset], dtype='<i8').tobytes())
+
+
+def dumps(alg, offset, page_sequence):
+    """
+    把算法实例的完整状态和trace位置序列化为压缩的二进制检查点，大小与物理块数成正比，与trace长度无关。
+
+    参数:
+    alg: 页面置换算法实例。
+    offset (int): 已处理的访问次数，即恢复后继续处理的位置。
+    page_sequence: 正在模拟的完整页面序列。
+
+    返回:
+    bytes: 检查点数据。
+    """
+    state = {
+        'offset': offset,
+        'length': len(page_sequence),
+        'fingerprint': fingerprint(page_sequence, offset),
+        'algorithm': alg,
+    }
+    return MAGIC + bytes([VERSION]) + zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+
+
+def loads(data):
+    """
+    参数:
+    data (bytes): dumps的结果。
+
+    返回:
+    dict: 包含offset、length、fingerprint和algorithm（已恢复的算法实例）的字典。
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("不是页面置换模拟的检查点文件。")
+    if data[len(MAGIC)] != VERSION:
+        raise ValueError(f"不支持的检查点版本: {data[len(MAGIC)]}")
+    return pickle.loads(zlib.decompress(data[len(MAGIC) + 1:]))
+
+
+def save_checkpoint(alg, offset, page_sequence, path):
+    """
+    原子地写入检查点：先写入同一目录下的临时文件并刷到磁盘，再替换原文件，进程随时退出都不会留下残缺的检查点。
+
+    参数:
+    alg: 页面置换算法实例。
+    offset (int): 已处理的访问次数。
+    page_sequence: 正在模拟的完整页面序列。
+    path (str): 检查点文件路径。
+    """
+    data = dumps(alg, offset, page_sequence)
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.checkpoint-')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def load_checkpoint(path, page_sequence):
+    """
+    读取检查点，并确认它属于同一个页面序列。
+
+    参数:
+    path (str): 检查点文件路径。
+    page_sequence: 正在模拟的完整页面序列。
+
+    返回:
+    tuple: (恢复的算法实例, 继续处理的位置)。
+    """
+    with open(path, 'rb') as file:
+        state = loads(file.read())
+    offset = state['offset']
+    if state['length'] != len(page_sequence) or state['fingerprint'] != fingerprint(page_sequence, offset):
+        raise ValueError("检查点与当前trace不一致。")
+    alg = state['algorithm']
+    alg.restore(as_page_sequence(page_sequence))
+    return alg, offset
+
+
+def run_with_checkpoints(alg, page_sequence, path, interval=CHECKPOINT_INTERVAL, access_types=None, offset=0,
+                         progress=None):
+    """
+    从offset处开始模拟，每处理interval次访问写一次检查点，结束时再写一次。
+
+    参数:
+    alg: 页面置换算法实例，offset不为0时应是load_checkpoint恢复的实例。
+    page_sequence: 完整的页面序列。
+    path (str): 检查点文件路径。
+    interval (int): 两次检查点之间的访问次数。
+    access_types: 与页面序列等长的访问类型序列。
+    offset (int): 开始处理的位置。
+    progress: 可选的回调函数，每写一次检查点调用一次 progress(已处理的访问次数, 总访问次数)。
+
+    返回:
+    算法实例。
+    """
+    page_sequence = as_page_sequence(page_sequence)
+    if offset == 0:
+        alg.prepare(page_sequence)
+    if access_types is not None:
+        access_types = as_page_sequence(access_types)
+    total = len(page_sequence)
+    for start in range(offset, total, interval):
+        stop = min(start + interval, total)
+        if access_types is None:
+            reference_page = alg.reference_page
+            for page in page_sequence[start:stop]:
+                reference_page(page)
+        else:
+            reference_access = alg.reference_access
+            for page, access_type in zip(page_sequence[start:stop], access_types[start:stop]):
+                reference_access(page, access_type)
+        save_checkpoint(alg, stop, page_sequence, path)
+        if progress is not None:
+            progress(stop, total)
+    return alg
+
+
+def resume(path, page_sequence, interval=CHECKPOINT_INTERVAL, access_types=None, progress=None):
+    """
+    从检查点继续模拟到序列结束，参数见run_with_checkpoints。
+
+    返回:
+    算法实例。
+    """
+    alg, offset = load_checkpoint(path, page_sequence)
+    return run_with_checkpoints(alg, page_sequence, path, interval, access_types, offset, progress)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="带检查点地回放trace，中断后再次运行同一命令即从上次的检查点继续")
+    parser.add_argument('trace', help="trace文件路径，格式按扩展名判断（见trace_loader.open_trace）")
+    parser.add_argument('--algorithm', choices=list(ALGORITHMS), default='LRU')
+    parser.add_argument('--frames', type=int, default=4096, help="物理块数")
+    parser.add_argument('--page-size', type=int, default=4096, help="页面大小（字节）")
+    parser.add_argument('--checkpoint', default=None, help="检查点文件，默认为trace路径加.ckpt")
+    parser.add_argument('--interval', type=int, default=CHECKPOINT_INTERVAL, help="每隔多少次访问写一次检查点")
+    parser.add_argument('--fresh', action='store_true', help="忽略已有的检查点，从头开始")
+    args = parser.parse_args()
+
+    trace = trace_loader.open_trace(args.trace, page_size=args.page_size)
+    if hasattr(trace, 'as_array'):
+        page_sequence, access_types = trace.as_array(), trace.access_types
+    else:
+        # 文本trace的访问类型只能随页面一起从access_chunks中读出
+        chunks = [(np.asarray(pages, dtype=np.int64), np.asarray(types, dtype=np.uint8))
+                  for pages, types in trace.access_chunks()]
+        page_sequence = np.concatenate([pages for pages, _ in chunks]) if chunks else np.zeros(0, dtype=np.int64)
+        access_types = np.concatenate([types for _, types in chunks]) if chunks else None
+        if access_types is not None and not access_types.any():
+            access_types = None  # 全部为读访问时与不带访问类型的trace相同
+    checkpoint_path = args.checkpoint or args.trace + '.ckpt'
+
+    def report(done, total):
+        print(f"\r{done}/{total} ({100 * done / total:.1f}%)", end='', flush=True)
+
+    if os.path.exists(checkpoint_path) and not args.fresh:
+        alg, offset = load_checkpoint(checkpoint_path, page_sequence)
+        print(f"从检查点继续: {offset}/{len(page_sequence)}")
+        run_with_checkpoints(alg, page_sequence, checkpoint_path, args.interval, access_types, offset, report)
+    else:
+        alg = ALGORITHMS[args.algorithm](args.frames)
+        run_with_checkpoints(alg, page_sequence, checkpoint_path, args.interval, access_types, progress=report)
+    print()
+    print(alg.summary(), end='')
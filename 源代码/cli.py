@@ -0,0 +1,160 @@
+import argparse
+import csv
+import importlib.util
+import json
+import os
+import sys
+
+from PageReplacementAlgorithm import ALGORITHMS
+
+# 输出表的列，trace列是生成负载的"负载名:种子"或trace文件路径
+COLUMNS = ('algorithm', 'frames', 'trace', 'page_faults', 'page_hits', 'replacements',
+           'page_fault_rate', 'replacement_rate')
+FORMATS = ('csv', 'json', 'npz', 'parquet')
+
+
+def parse_frame_counts(text):
+    """
+    解析帧数参数："2,4,8" 为列表，"2:64" 为闭区间，"2:64:2" 带步长（与sweep.parse_frame_counts相同，
+    这里不导入sweep以免启动时就导入numpy）。
+
+    返回:
+    list: 帧数列表。
+    """
+    if ':' in text:
+        parts = [int(part) for part in text.split(':')]
+        step = parts[2] if len(parts) > 2 else 1
+        return list(range(parts[0], parts[1] + 1, step))
+    return [int(part) for part in text.split(',')]
+
+
+def load_traces(args):
+    """
+    按命令行参数准备所有trace：--trace给出的文件，以及--workload按每个种子生成的序列。
+    numpy、workload和trace_loader只在这里导入。
+
+    返回:
+    dict: trace名称 -> 页面序列（numpy数组）。
+    """
+    traces = {}
+    if args.trace:
+        import trace_loader
+        import numpy as np
+        for path in args.trace:
+            trace = trace_loader.open_trace(path, page_size=args.page_size, radix=args.radix)
+            traces[path] = trace.as_array() if hasattr(trace, 'as_array') else np.fromiter(trace, dtype=np.int64)
+    if args.workload or not args.trace:
+        import workload
+        generator = workload.WORKLOADS[args.workload or 'uniform']
+        for seed in args.seeds:
+            traces[f"{args.workload or 'uniform'}:{seed}"] = generator(args.length, args.upper_bound, seed=seed)
+    return traces
+
+
+def run(traces, algorithms, frame_counts, workers=None, cache=None):
+    """
+    对所有trace运行 算法 × 帧数 的实验网格，长度相同的trace一起交给sweep.run_sweep。
+
+    返回:
+    list: 与COLUMNS对应的结果行。
+    """
+    import sweep
+    groups = {}
+    for name, page_sequence in traces.items():
+        groups.setdefault(len(page_sequence), {})[name] = page_sequence
+    rows = []
+    for group in groups.values():
+        rows.extend(sweep.run_sweep(group, algorithms, frame_counts, workers, cache=cache))
+    return rows
+
+
+def write_rows(rows, output_format, output=None):
+    """
+    按格式输出结果：csv和json在没有给出output时写到标准输出；npz（numpy列存储）和parquet（需要pyarrow）按列写文件。
+
+    参数:
+    rows (list): 与COLUMNS对应的结果行。
+    output_format (str): FORMATS之一。
+    output (str): 输出文件路径。
+    """
+    if output_format in ('npz', 'parquet') and output is None:
+        raise ValueError(f"{output_format}格式需要用--output指定输出文件。")
+    columns = {name: [row[index] for row in rows] for index, name in enumerate(COLUMNS)}
+    if output_format == 'npz':
+        import numpy as np
+        np.savez(output, **{name: np.asarray(values) for name, values in columns.items()})
+        return
+    if output_format == 'parquet':
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("parquet格式需要安装pyarrow，或改用npz格式。") from None
+        pyarrow.parquet.write_table(pyarrow.table(columns), output)
+        return
+    file = open(output, 'w', newline='') if output is not None else sys.stdout
+    try:
+        if output_format == 'csv':
+            writer = csv.writer(file)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
+        else:
+            json.dump([dict(zip(COLUMNS, row)) for row in rows], file)
+            file.write('\n')
+    finally:
+        if output is not None:
+            file.close()
+
+
+def plot(rows, output):
+    # 只有要求绘图时才导入matplotlib；结果按列交给plotting，图形使用不需要界面的Agg画布
+    from plotting import PerformancePlot, curves_from_columns
+    performance = PerformancePlot()
+    performance.update(curves_from_columns({name: [row[index] for row in rows] for index, name in enumerate(COLUMNS)}))
+    performance.save(output)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面的页面置换实验：算法 × 帧数 × trace，结果输出为CSV、JSON或列存储文件")
+    parser.add_argument('--policies', nargs='+', choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument('--frames', type=parse_frame_counts, default=parse_frame_counts('2:8'),
+                        help="帧数，如 2,4,8 或 2:64 或 2:128:2")
+    parser.add_argument('--trace', nargs='+', default=None, help="trace文件，格式按扩展名判断（见trace_loader.open_trace）")
+    parser.add_argument('--page-size', type=int, default=4096, help="trace文件的页面大小（字节）")
+    parser.add_argument('--radix', type=int, default=None, help="文本trace中地址的进制，如16，默认0x开头为十六进制、其余为十进制")
+    parser.add_argument('--workload', choices=['uniform', 'zipf'], default=None,
+                        help="生成负载的模型，没有给出--trace时默认为uniform")
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0], help="生成负载的种子，每个种子一条trace")
+    parser.add_argument('--length', type=int, default=100_000, help="生成的每条trace的长度")
+    parser.add_argument('--upper-bound', type=int, default=1000, help="生成负载的页面编号上限")
+    parser.add_argument('--workers', type=int, default=1, help="进程数，默认1即在当前进程中运行，0为使用全部CPU")
+    parser.add_argument('--format', choices=FORMATS, default='csv', help="输出格式")
+    parser.add_argument('--output', default=None, help="输出文件，csv和json默认输出到标准输出")
+    parser.add_argument('--cache', default=None, help="结果缓存文件（sqlite），重复运行相同的trace时直接读取已有结果")
+    parser.add_argument('--plot', default=None, help="同时把性能曲线保存为图片文件")
+    args = parser.parse_args(argv)
+    # 在开始模拟之前检查输出参数，避免长时间运行后才失败
+    if args.format in ('npz', 'parquet') and args.output is None:
+        parser.error(f"{args.format}格式需要用--output指定输出文件。")
+    if args.format == 'parquet' and importlib.util.find_spec('pyarrow') is None:
+        parser.error("parquet格式需要安装pyarrow，或改用npz格式。")
+
+    traces = load_traces(args)
+    cache = None
+    if args.cache:
+        from result_cache import ResultCache
+        cache = ResultCache(args.cache)
+    try:
+        rows = run(traces, args.policies, args.frames, args.workers or None, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    write_rows(rows, args.format, args.output)
+    if args.output is not None:
+        print(f"{len(rows)} 行结果已写入 {os.path.abspath(args.output)}", file=sys.stderr)
+    if args.plot:
+        plot(rows, args.plot)
+
+
+if __name__ == "__main__":
+    main()
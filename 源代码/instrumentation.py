@@ -0,0 +1,284 @@
+import argparse
+import json
+import time
+from array import array
+from collections import Counter
+
+import numpy as np
+
+from PageReplacementAlgorithm import ALGORITHMS
+import trace_loader
+
+# 置换算法中单独负责选择被置换页面的方法，其耗时计为选择被置换页面的时间，reference_page中其余的耗时为簿记；
+# 两种时钟算法的方法即时钟指针的扫描，SimpleCLOCK在内存未满时也会扫描
+VICTIM_METHODS = {
+    'FIFO': 'evict_page',
+    'LRU': 'evict_page',
+    'SimpleCLOCK': 'select_victim',
+    'EnhancedCLOCK': 'select_victim',
+    'OPT': 'find_longest_unused_page',
+    'LFU': 'find_least_frequent_page',
+    'ARC': 'replace',
+    'TwoQ': 'reclaim',
+    'LIRS': 'evict',
+    'CLOCKPro': 'run_hand_cold',
+}
+# 导出时列出缺页次数最多的页面数，避免页面标签过多
+TOP_PAGES = 20
+# 重用距离树状数组的初始容量，装满后只保留每个页面的最近一次访问并重新编号
+REUSE_CAPACITY = 1 << 16
+
+
+def log2_bucket(value):
+    """
+    返回:
+    int: 直方图桶的上界，即不小于value的最小2的幂（value为0时为0）。
+    """
+    return 1 << (value - 1).bit_length() if value > 0 else 0
+
+
+class Instrumentation:
+    def __init__(self, alg, timing=True, scan_lengths=True, reuse_distances=True, page_faults=True,
+                 top_pages=TOP_PAGES):
+        """
+        给一个算法实例挂上统计：只替换这个实例的reference_page（和选择被置换页面的方法），算法类不受影响，
+        未挂统计的实例没有任何额外开销。simulate、steps、access等所有访问途径都会经过统计。
+
+        参数:
+        alg: 页面置换算法实例。
+        timing (bool): 是否统计耗时（命中、未置换的缺页、发生置换的缺页，以及选择被置换页面）。
+        scan_lengths (bool): 是否统计时钟指针每次缺页的扫描长度（只对带hand_moves计数的时钟算法有效）。
+        reuse_distances (bool): 是否统计重用距离（两次访问同一页面之间访问过的不同页面数）的直方图，
+                                每次访问O(log 不同页面数)，是各项统计中开销最大的一项。
+        page_faults (bool): 是否统计每个页面的缺页次数。
+        top_pages (int): 导出时列出缺页次数最多的页面数。
+        """
+        self.alg = alg
+        self.timing = timing
+        self.scan_lengths = scan_lengths and hasattr(alg, 'hand_moves')
+        self.reuse_distances = reuse_distances
+        self.page_faults = page_faults
+        self.top_pages = top_pages
+        self.reference_ns = {'hit': 0, 'fault': 0, 'eviction': 0}  # 各类访问的累计耗时
+        self.reference_counts = {'hit': 0, 'fault': 0, 'eviction': 0}
+        self.victim_ns = 0  # 选择被置换页面的累计耗时
+        self.victim_calls = 0
+        self.scan_histogram = Counter()  # 扫描长度的桶上界 -> 缺页次数
+        self.scan_total = 0
+        self.reuse_histogram = Counter()  # 重用距离的桶上界 -> 访问次数
+        self.reuse_total = 0
+        self.cold_references = 0  # 首次访问的次数，没有重用距离
+        self.faults_by_page = Counter()
+        # 重用距离用树状数组在线计算：第t个位置标记第t次访问是否为该页面的最近一次访问
+        self.tree = array('q', [0]) * (REUSE_CAPACITY + 1)
+        self.last_access = {}
+        self.time = 0
+        self.original = alg.reference_page
+        alg.reference_page = self.reference_page
+        self.victim_method = VICTIM_METHODS.get(type(alg).__name__) if timing else None
+        if self.victim_method is not None:
+            self.original_victim = getattr(alg, self.victim_method)
+            setattr(alg, self.victim_method, self.select_victim)
+
+    def detach(self):
+        # 恢复算法实例原来的方法
+        del self.alg.reference_page
+        if self.victim_method is not None:
+            delattr(self.alg, self.victim_method)
+
+    def reference_page(self, page):
+        alg = self.alg
+        faults = alg.page_faults
+        if self.scan_lengths:
+            hand_moves = alg.hand_moves
+        if self.timing:
+            start = time.perf_counter_ns()
+            evicted = self.original(page)
+            elapsed = time.perf_counter_ns() - start
+        else:
+            evicted = self.original(page)
+        if alg.page_faults != faults:
+            kind = 'fault' if evicted is None else 'eviction'
+            if self.page_faults:
+                self.faults_by_page[page] += 1
+            if self.scan_lengths:
+                moved = alg.hand_moves - hand_moves
+                self.scan_histogram[log2_bucket(moved)] += 1
+                self.scan_total += moved
+        else:
+            kind = 'hit'
+        self.reference_counts[kind] += 1
+        if self.timing:
+            self.reference_ns[kind] += elapsed
+        if self.reuse_distances:
+            self.record_reuse(page)
+        return evicted
+
+    def select_victim(self, *args):
+        start = time.perf_counter_ns()
+        result = self.original_victim(*args)
+        self.victim_ns += time.perf_counter_ns() - start
+        self.victim_calls += 1
+        return result
+
+    def record_reuse(self, page):
+        # 与lru_stack_distances相同的树状数组方法，容量用完时压缩，内存只与不同页面数成正比
+        if self.time == len(self.tree) - 1:
+            self.compact()
+        tree, size = self.tree, len(self.tree) - 1
+        self.time += 1
+        previous = self.last_access.get(page)
+        if previous is None:
+            self.cold_references += 1
+        else:
+            marked_before = 0
+            i = previous - 1
+            while i > 0:
+                marked_before += tree[i]
+                i -= i & -i
+            distance = len(self.last_access) - marked_before
+            self.reuse_histogram[log2_bucket(distance)] += 1
+            self.reuse_total += distance
+            i = previous
+            while i <= size:
+                tree[i] -= 1
+                i += i & -i
+        i = self.time
+        while i <= size:
+            tree[i] += 1
+            i += i & -i
+        self.last_access[page] = self.time
+
+    def compact(self):
+        # 按最近一次访问的先后把页面重新编号为1..M，容量至少为2M，使压缩的均摊代价为O(log M)
+        order = sorted(self.last_access, key=self.last_access.get)
+        size = max(REUSE_CAPACITY, 2 * len(order))
+        self.tree = array('q', [0]) * (size + 1)
+        self.last_access = {}
+        for t, page in enumerate(order, start=1):
+            self.last_access[page] = t
+            i = t
+            while i <= size:
+                self.tree[i] += 1
+                i += i & -i
+        self.time = len(order)
+
+    def to_dict(self):
+        """
+        返回:
+        dict: 所有统计，可以直接序列化为JSON。
+        """
+        alg = self.alg
+        result = {
+            'algorithm': type(alg).__name__,
+            'frames': alg.frames,
+            'page_faults': alg.page_faults,
+            'page_hits': alg.page_hits,
+            'replacements': alg.replacements,
+            'references': dict(self.reference_counts),
+        }
+        if self.timing:
+            result['reference_ns'] = dict(self.reference_ns)
+            total = sum(self.reference_ns.values())
+            if self.victim_method is not None:
+                # 选择被置换页面以外的时间都是维护数据结构等簿记工作
+                result['victim_selection_ns'] = self.victim_ns
+                result['victim_selection_calls'] = self.victim_calls
+                result['bookkeeping_ns'] = total - self.victim_ns
+        if self.scan_lengths:
+            result['scan_length'] = {'buckets': dict(sorted(self.scan_histogram.items())), 'sum': self.scan_total,
+                                     'count': sum(self.scan_histogram.values())}
+        if self.reuse_distances:
+            result['reuse_distance'] = {'buckets': dict(sorted(self.reuse_histogram.items())), 'sum': self.reuse_total,
+                                        'count': sum(self.reuse_histogram.values()), 'cold': self.cold_references}
+        if self.page_faults:
+            result['top_faulting_pages'] = [[int(page), count]
+                                            for page, count in self.faults_by_page.most_common(self.top_pages)]
+        return result
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    def to_prometheus(self, prefix='page_replacement'):
+        """
+        按Prometheus文本格式导出，所有指标都带algorithm和frames标签，直方图的桶按2的幂划分。
+
+        参数:
+        prefix (str): 指标名前缀。
+
+        返回:
+        str: Prometheus文本格式的指标。
+        """
+        data = self.to_dict()
+        labels = f'algorithm="{data["algorithm"]}",frames="{data["frames"]}"'
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for suffix, extra, value in samples:
+                label_text = labels + (',' + extra if extra else '')
+                lines.append(f"{prefix}_{name}{suffix}{{{label_text}}} {value}")
+
+        metric('references_total', 'counter', "Page references by outcome.",
+               [('', f'outcome="{kind}"', count) for kind, count in data['references'].items()])
+        metric('replacements_total', 'counter', "Pages evicted to make room.", [('', '', data['replacements'])])
+        if 'reference_ns' in data:
+            metric('reference_seconds_total', 'counter', "Time spent in reference_page by outcome.",
+                   [('', f'outcome="{kind}"', ns / 1e9) for kind, ns in data['reference_ns'].items()])
+        if 'victim_selection_ns' in data:
+            metric('victim_selection_seconds_total', 'counter', "Time spent choosing victims.",
+                   [('', '', data['victim_selection_ns'] / 1e9)])
+            metric('bookkeeping_seconds_total', 'counter', "Time spent outside victim selection.",
+                   [('', '', data['bookkeeping_ns'] / 1e9)])
+        for name, key, help_text in (('scan_length', 'scan_length', "Frames swept by the clock hand per fault."),
+                                     ('reuse_distance', 'reuse_distance',
+                                      "Distinct pages referenced between two references to the same page.")):
+            if key not in data:
+                continue
+            histogram = data[key]
+            samples, cumulative = [], 0
+            for bound, count in histogram['buckets'].items():
+                cumulative += count
+                samples.append(('_bucket', f'le="{bound}"', cumulative))
+            samples.append(('_bucket', 'le="+Inf"', histogram['count']))
+            samples.append(('_sum', '', histogram['sum']))
+            samples.append(('_count', '', histogram['count']))
+            metric(name, 'histogram', help_text, samples)
+        if 'reuse_distance' in data:
+            metric('cold_references_total', 'counter', "First references to a page.",
+                   [('', '', data['reuse_distance']['cold'])])
+        if 'top_faulting_pages' in data:
+            metric('page_faults_by_page', 'gauge', f"Faults of the {self.top_pages} most faulting pages.",
+                   [('', f'page="{page}"', count) for page, count in data['top_faulting_pages']])
+        return '\n'.join(lines) + '\n'
+
+
+def instrument(alg, **options):
+    """
+    给算法实例挂上统计，参数见Instrumentation。
+
+    返回:
+    Instrumentation: 统计对象，用to_dict、to_json或to_prometheus导出。
+    """
+    return Instrumentation(alg, **options)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="带统计地运行页面置换算法，按Prometheus文本格式或JSON输出")
+    parser.add_argument('trace', help="trace文件路径，格式按扩展名判断（见trace_loader.open_trace）")
+    parser.add_argument('--algorithm', choices=list(ALGORITHMS), default='LRU')
+    parser.add_argument('--frames', type=int, default=1024, help="物理块数")
+    parser.add_argument('--page-size', type=int, default=4096, help="页面大小（字节）")
+    parser.add_argument('--format', choices=['prometheus', 'json'], default='prometheus')
+    parser.add_argument('--no-timing', action='store_true', help="不统计耗时")
+    parser.add_argument('--no-reuse', action='store_true', help="不统计重用距离")
+    parser.add_argument('--top-pages', type=int, default=TOP_PAGES, help="列出缺页次数最多的页面数")
+    args = parser.parse_args()
+
+    trace = trace_loader.open_trace(args.trace, page_size=args.page_size)
+    page_sequence = trace.as_array() if hasattr(trace, 'as_array') else np.fromiter(trace, dtype=np.int64)
+    alg = ALGORITHMS[args.algorithm](args.frames)
+    stats = instrument(alg, timing=not args.no_timing, reuse_distances=not args.no_reuse, top_pages=args.top_pages)
+    alg.simulate(page_sequence)
+    print(stats.to_json() + '\n' if args.format == 'json' else stats.to_prometheus(), end='')
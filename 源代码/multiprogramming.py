@@ -0,0 +1,342 @@
+import argparse
+import json
+from collections import Counter, OrderedDict, deque
+
+import numpy as np
+
+from PageReplacementAlgorithm import ALGORITHMS
+import trace_loader
+import workload
+
+# 置换范围：global为所有进程共用一个置换算法实例，local为每个进程在自己分到的物理块内置换
+SCOPES = ('global', 'local')
+# 物理块分配方式：fixed为平均分配且不变，ws按工作集大小分配，pff按缺页频率增减
+ALLOCATIONS = ('fixed', 'ws', 'pff')
+# 全局置换时页面编号的高位存放进程号，使不同进程的同一页面编号互不相同
+PID_SHIFT = 40
+# 一个统计区间内缺页率超过此值的进程（或整个系统）视为正在抖动
+THRASHING_FAULT_RATE = 0.1
+
+
+class Process:
+    def __init__(self, pid, trace):
+        self.pid = pid
+        self.trace = np.asarray(trace, dtype=np.int64)
+        self.position = 0  # 下一次访问在trace中的位置，也是进程的虚拟时间
+        self.page_faults = 0
+        self.interval_references = 0  # 当前统计区间内的访问次数
+        self.interval_faults = 0  # 当前统计区间内的缺页次数
+        self.quantum_fault_rate = 0.0  # 上一个时间片内的缺页率
+        self.frames = 0  # 分到的物理块数（局部置换）
+        self.demand = 0  # 上一次计算出的所需物理块数（ws、pff）
+        self.engine = None  # 局部置换时进程自己的置换算法实例，被换出或结束后为None
+        self.last_use = OrderedDict()  # ws分配时最近访问过的页面 -> 最后访问的虚拟时间，表头最久未访问
+        self.suspensions = 0  # 被负载控制换出的次数
+
+    def remaining(self):
+        return len(self.trace) - self.position
+
+
+class MultiprogrammingSimulator:
+    def __init__(self, traces, policy, frames, scope='global', allocation='fixed', quantum=1000,
+                 ws_window=10_000, pff_bounds=(0.01, 0.05), load_control=False,
+                 thrashing_fault_rate=THRASHING_FAULT_RATE, **params):
+        """
+        多道程序模拟：多个进程按时间片轮转交替访问各自的页面序列，共享同一块物理内存。
+
+        全局置换时所有进程的页面由一个置换算法实例管理，进程之间互相抢占物理块；局部置换时每个进程只在
+        自己分到的物理块内置换。局部置换的分配方式：
+        fixed: 物理块平均分给所有进程，之后不再改变；
+        ws: 每个时间片结束时把进程的物理块数调整为它的工作集大小（最近ws_window次自身访问中的不同页面数），
+            配合LRU时缩小后留下的正是工作集中的页面；
+        pff: 每个时间片结束时按该时间片内的缺页率调整物理块数，高于上限时增加、低于下限时减少1/8（至少1块）。
+        空闲物理块不足以满足增长时，开启负载控制则换出驻留页面最多的其他进程（释放它的全部物理块，
+        等空闲物理块足够时再换入），否则只分配剩余的空闲物理块。
+
+        参数:
+        traces: 进程号 -> 页面序列的字典，或页面序列的列表（进程号为下标）。
+        policy: 算法类或算法名称，不能是需要预知未来访问的OPT；ws和pff要求算法支持resize。
+        frames (int): 物理块总数。
+        scope (str): SCOPES之一。
+        allocation (str): ALLOCATIONS之一，全局置换只能是fixed。
+        quantum (int): 时间片，即每个进程每次连续访问的次数。
+        ws_window (int): 工作集窗口（进程自身的访问次数）。
+        pff_bounds (tuple): pff的（缺页率下限, 缺页率上限）。
+        load_control (bool): 是否在物理块不足时换出进程。
+        thrashing_fault_rate (float): 判定抖动的缺页率。
+        **params: 传给算法类的其他参数。
+        """
+        self.policy = ALGORITHMS[policy] if isinstance(policy, str) else policy
+        if self.policy.__name__ == 'OPT':
+            raise ValueError("OPT需要预知未来的访问，不能用于多道程序模拟。")
+        if scope not in SCOPES:
+            raise ValueError(f"未知的置换范围: {scope}")
+        if allocation not in ALLOCATIONS:
+            raise ValueError(f"未知的分配方式: {allocation}")
+        if scope == 'global' and allocation != 'fixed':
+            raise ValueError("全局置换不区分进程的物理块数，分配方式只能是fixed。")
+        if allocation != 'fixed' and not self.policy.resizable:
+            raise ValueError(f"{self.policy.__name__} 不支持改变物理块数，不能用于{allocation}分配。")
+        if load_control and allocation == 'fixed':
+            raise ValueError("负载控制只用于ws和pff分配。")
+        items = traces.items() if isinstance(traces, dict) else enumerate(traces)
+        self.processes = {pid: Process(pid, trace) for pid, trace in items}
+        if scope == 'local' and frames < len(self.processes):
+            raise ValueError("局部置换时物理块总数不能少于进程数。")
+        self.frames = frames
+        self.scope = scope
+        self.allocation = allocation
+        self.quantum = quantum
+        self.ws_window = ws_window
+        self.pff_bounds = pff_bounds
+        self.load_control = load_control
+        self.thrashing_fault_rate = thrashing_fault_rate
+        self.params = params
+        self.time = 0  # 所有进程的访问总数
+        self.page_faults = 0
+        self.interval_references = 0
+        self.interval_faults = 0
+        self.ready = deque(pid for pid, process in self.processes.items() if process.remaining())
+        self.suspended = deque()  # 被负载控制换出、等待换入的进程
+        self.free = frames  # 空闲物理块数（局部置换）
+        self.engine = None  # 全局置换时所有进程共用的置换算法实例
+        if scope == 'global':
+            self.engine = self.policy(frames, **params)
+        else:
+            share = frames // max(len(self.ready), 1)
+            for pid in self.ready:
+                self.load(self.processes[pid], share)
+
+    def run(self, interval=100_000):
+        """
+        运行到所有进程的页面序列结束。
+
+        参数:
+        interval (int): 每隔多少次访问（所有进程合计，按时间片对齐）产生一次统计。
+
+        返回:
+        generator: 每次产生sample()的结果；结束时若还有未报告的访问，再产生一次。
+        """
+        next_report = interval
+        while self.ready or self.suspended:
+            if not self.ready:
+                # 没有就绪进程时所有物理块都已释放，一定能换入
+                self.swap_in()
+            process = self.processes[self.ready.popleft()]
+            self.run_quantum(process, min(self.quantum, process.remaining()))
+            if not process.remaining():
+                self.release(process)
+            else:
+                if self.allocation != 'fixed':
+                    self.reallocate(process)
+                self.ready.append(process.pid)
+            # 空闲物理块足够时换入等待最久的进程
+            while self.suspended and self.free >= self.processes[self.suspended[0]].demand and self.swap_in():
+                pass
+            if self.time >= next_report:
+                next_report += interval * ((self.time - next_report) // interval + 1)
+                yield self.sample()
+        if self.interval_references:
+            yield self.sample()
+
+    def run_quantum(self, process, length):
+        # 运行一个时间片：按块取出页面，直接调用置换算法，缺页次数按时间片前后的计数之差归给当前进程
+        chunk = process.trace[process.position:process.position + length]
+        engine = self.engine if self.scope == 'global' else process.engine
+        faults_before = engine.page_faults
+        reference_page = engine.reference_page
+        if self.scope == 'global':
+            deque(map(reference_page, (chunk + (process.pid << PID_SHIFT)).tolist()), maxlen=0)
+        elif self.allocation == 'ws':
+            last_use, time = process.last_use, process.position
+            for page in chunk.tolist():
+                reference_page(page)
+                last_use[page] = time
+                last_use.move_to_end(page)
+                time += 1
+        else:
+            deque(map(reference_page, chunk.tolist()), maxlen=0)
+        faults = engine.page_faults - faults_before
+        process.position += length
+        process.page_faults += faults
+        process.interval_references += length
+        process.interval_faults += faults
+        process.quantum_fault_rate = faults / length
+        self.time += length
+        self.page_faults += faults
+        self.interval_references += length
+        self.interval_faults += faults
+
+    def reallocate(self, process):
+        # 时间片结束时按工作集大小或缺页频率重新计算进程所需的物理块数
+        if self.allocation == 'ws':
+            last_use, horizon = process.last_use, process.position - self.ws_window
+            while last_use and next(iter(last_use.values())) < horizon:
+                last_use.popitem(last=False)
+            demand = max(1, len(last_use))
+        else:
+            lower, upper = self.pff_bounds
+            step = max(1, process.frames >> 3)
+            demand = process.frames
+            if process.quantum_fault_rate > upper:
+                demand += step
+            elif process.quantum_fault_rate < lower:
+                demand = max(1, demand - step)
+        process.demand = demand
+        if demand > process.frames + self.free and self.load_control:
+            # 负载控制：依次换出驻留页面最多的其他进程，直到空闲物理块足够
+            while demand > process.frames + self.free and self.ready:
+                victim = max(self.ready, key=lambda pid: self.processes[pid].frames)
+                self.ready.remove(victim)
+                self.swap_out(self.processes[victim])
+        self.resize(process, min(demand, process.frames + self.free))
+
+    def resize(self, process, frames):
+        process.engine.resize(frames)
+        self.free += process.frames - frames
+        process.frames = frames
+        assert self.free >= 0, "分配的物理块数超过了物理块总数"
+
+    def load(self, process, frames):
+        process.engine = self.policy(frames, **self.params)
+        process.frames = frames
+        self.free -= frames
+        assert self.free >= 0, "分配的物理块数超过了物理块总数"
+
+    def release(self, process):
+        # 进程结束或被换出：释放它的全部物理块
+        self.free += process.frames
+        process.frames = 0
+        process.engine = None
+        process.last_use.clear()
+
+    def swap_out(self, process):
+        # 保留换出前所需的物理块数，换入时按此分配；从未重新分配过的进程demand为0，按换出前占有的物理块数计
+        demand = max(process.demand, process.frames, 1)
+        self.release(process)
+        process.demand = demand
+        process.suspensions += 1
+        self.suspended.append(process.pid)
+
+    def swap_in(self):
+        """
+        换入等待最久的进程：从空内存开始运行，按换出前所需的物理块数分配（不超过空闲物理块数）。
+
+        返回:
+        bool: 是否换入；没有空闲物理块时不换入。
+        """
+        if self.free < 1:
+            return False
+        pid = self.suspended.popleft()
+        process = self.processes[pid]
+        self.load(process, min(process.demand, self.free))
+        self.ready.append(pid)
+        return True
+
+    def sample(self):
+        """
+        返回当前统计区间的结果并开始新的区间。
+
+        返回:
+        dict: references、page_faults（累计），fault_rate、thrashing（本区间），active、suspended、
+              free_frames、demand（局部置换），processes（本区间运行过的进程号 -> 区间内的访问次数、缺页次数、
+              缺页率、物理块数和是否抖动）。
+        """
+        fault_rate = self.interval_faults / self.interval_references if self.interval_references else 0.0
+        if self.scope == 'global':
+            resident = Counter(page >> PID_SHIFT for page in self.engine.memory)
+        processes = {}
+        for process in self.processes.values():
+            if not process.interval_references:
+                continue
+            process_fault_rate = process.interval_faults / process.interval_references
+            processes[process.pid] = {
+                'references': process.interval_references,
+                'page_faults': process.interval_faults,
+                'fault_rate': process_fault_rate,
+                'frames': resident[process.pid] if self.scope == 'global' else process.frames,
+                'thrashing': process_fault_rate > self.thrashing_fault_rate,
+            }
+            process.interval_references = process.interval_faults = 0
+        sample = {
+            'references': self.time,
+            'page_faults': self.page_faults,
+            'fault_rate': fault_rate,
+            'thrashing': fault_rate > self.thrashing_fault_rate,
+            'active': len(self.ready),
+            'suspended': len(self.suspended),
+            'processes': processes,
+        }
+        if self.scope == 'local':
+            sample['free_frames'] = self.free
+            sample['demand'] = sum(self.processes[pid].demand or self.processes[pid].frames for pid in self.ready)
+        self.interval_references = self.interval_faults = 0
+        return sample
+
+    def summary(self):
+        """
+        返回:
+        dict: 进程号 -> 访问次数、缺页次数、缺页率和被换出次数。
+        """
+        return {
+            pid: {
+                'references': process.position,
+                'page_faults': process.page_faults,
+                'fault_rate': process.page_faults / process.position if process.position else 0.0,
+                'suspensions': process.suspensions,
+            }
+            for pid, process in self.processes.items()
+        }
+
+
+def format_sample(sample):
+    thrashing = [pid for pid, stats in sample['processes'].items() if stats['thrashing']]
+    line = (f"{sample['references']:>12} refs  fault rate={sample['fault_rate']:.4f}  "
+            f"active={sample['active']} suspended={sample['suspended']}")
+    if 'demand' in sample:
+        line += f"  demand={sample['demand']} free={sample['free_frames']}"
+    if sample['thrashing']:
+        line += "  THRASHING"
+    if thrashing:
+        line += f"  thrashing processes={len(thrashing)}"
+    return line
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多道程序页面置换模拟：全局/局部置换，固定、工作集或缺页频率分配")
+    parser.add_argument('--traces', nargs='+', default=None, help="每个进程一个trace文件，不给出时生成工作集负载")
+    parser.add_argument('--processes', type=int, default=100, help="生成的进程数")
+    parser.add_argument('--length', type=int, default=100_000, help="每个进程生成的页面序列长度")
+    parser.add_argument('--upper-bound', type=int, default=10_000, help="页面编号的上限")
+    parser.add_argument('--working-set', type=int, default=200, help="生成负载每个阶段的工作集大小")
+    parser.add_argument('--phase', type=int, default=20_000, help="生成负载每个阶段的访问次数")
+    parser.add_argument('--page-size', type=int, default=4096, help="页面大小（字节）")
+    parser.add_argument('--policy', choices=[name for name in ALGORITHMS if name != 'OPT'], default='LRU')
+    parser.add_argument('--frames', type=int, default=16_384, help="物理块总数")
+    parser.add_argument('--scope', choices=SCOPES, default='global')
+    parser.add_argument('--allocation', choices=ALLOCATIONS, default='fixed')
+    parser.add_argument('--quantum', type=int, default=1000, help="时间片（访问次数）")
+    parser.add_argument('--window', type=int, default=10_000, help="工作集窗口")
+    parser.add_argument('--pff', type=float, nargs=2, default=(0.01, 0.05), metavar=('LOWER', 'UPPER'),
+                        help="缺页频率分配的缺页率下限和上限")
+    parser.add_argument('--load-control', action='store_true', help="物理块不足时换出进程")
+    parser.add_argument('--interval', type=int, default=1_000_000, help="每隔多少次访问输出一次统计")
+    parser.add_argument('--json', action='store_true', help="每次统计输出一行JSON（包括每个进程的统计）")
+    args = parser.parse_args()
+
+    if args.traces:
+        traces = []
+        for path in args.traces:
+            trace = trace_loader.open_trace(path, page_size=args.page_size)
+            traces.append(trace.as_array() if hasattr(trace, 'as_array') else np.fromiter(trace, dtype=np.int64))
+    else:
+        traces = [workload.working_set_sequence(args.length, args.upper_bound, args.working_set, args.phase, seed=pid)
+                  for pid in range(args.processes)]
+    simulator = MultiprogrammingSimulator(traces, args.policy, args.frames, args.scope, args.allocation,
+                                          args.quantum, args.window, tuple(args.pff), args.load_control)
+    for sample in simulator.run(args.interval):
+        print(json.dumps(sample) if args.json else format_sample(sample), flush=True)
+    totals = simulator.summary()
+    suspensions = sum(stats['suspensions'] for stats in totals.values())
+    print(f"references={simulator.time} page faults={simulator.page_faults} "
+          f"fault rate={simulator.page_faults / max(simulator.time, 1):.4f} suspensions={suspensions}")
@@ -0,0 +1,323 @@
+import argparse
+import csv
+import json
+
+import numpy as np
+
+# 显示曲线时每条曲线最多的点数（约为图的像素宽度），更多的点用LTTB降采样
+DISPLAY_POINTS = 1000
+# 缺页率和置换率都在[0, 1]内，纵轴范围固定，数据更新时只有横轴范围可能改变
+RATE_LIMITS = (0, 1.02)
+
+
+def lttb(x, ys, points):
+    """
+    最大三角形三桶（Largest-Triangle-Three-Buckets）降采样：首尾两点保留，其余的点均分为points-2个桶，
+    每个桶选出与上一个选中点、下一个桶平均点构成的三角形面积最大的点，保留曲线的形状和峰谷。
+    共用同一横坐标的多条曲线一起处理，Python循环只按桶进行。
+
+    参数:
+    x: 长度为N的横坐标（递增）。
+    ys: S×N的纵坐标，每行一条曲线。
+    points (int): 降采样后的点数。
+
+    返回:
+    numpy.ndarray: S×points的下标，每行为该曲线选中的点；N不超过points时为全部下标。
+    """
+    x = np.asarray(x, dtype=np.float64)
+    ys = np.atleast_2d(np.asarray(ys, dtype=np.float64))
+    count, length = ys.shape
+    if length <= points or points < 3:
+        return np.broadcast_to(np.arange(length), (count, length))
+    edges = np.linspace(1, length - 1, points - 1).astype(np.intp)  # 第i个桶为[edges[i], edges[i+1])
+    # 用前缀和求每个桶的平均点，最后一个桶的"下一个桶"为最后一个点
+    x_sums = np.concatenate(([0.0], np.cumsum(x)))
+    y_sums = np.concatenate((np.zeros((count, 1)), np.cumsum(ys, axis=1)), axis=1)
+    sizes = np.diff(edges)
+    mean_x = np.append((x_sums[edges[1:]] - x_sums[edges[:-1]]) / sizes, x[-1])
+    mean_y = np.concatenate(((y_sums[:, edges[1:]] - y_sums[:, edges[:-1]]) / sizes, ys[:, -1:]), axis=1)
+    rows = np.arange(count)
+    selected = np.empty((count, points), dtype=np.intp)
+    selected[:, 0] = 0
+    selected[:, -1] = length - 1
+    previous = np.zeros(count, dtype=np.intp)
+    for bucket in range(points - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        previous_x, previous_y = x[previous][:, None], ys[rows, previous][:, None]
+        next_x, next_y = mean_x[bucket + 1], mean_y[:, bucket + 1][:, None]
+        areas = np.abs((previous_x - next_x) * (ys[:, start:stop] - previous_y)
+                       - (previous_x - x[start:stop]) * (next_y - previous_y))
+        previous = areas.argmax(axis=1) + start
+        selected[:, bucket + 1] = previous
+    return selected
+
+
+def curves_from_columns(columns):
+    """
+    把列存储的结果（如cli输出的npz或parquet中的列）整理为每个算法的曲线，同一算法同一帧数的多行（多个trace或种子）取平均。
+
+    参数:
+    columns: 至少包含algorithm、frames、page_fault_rate和replacement_rate列的映射，每列为等长的序列。
+
+    返回:
+    dict: 算法名称 -> (帧数数组, 缺页率数组, 置换率数组)，帧数递增。
+    """
+    algorithms = np.asarray(columns['algorithm']).astype(str)
+    frames = np.asarray(columns['frames'], dtype=np.int64)
+    fault_rates = np.asarray(columns['page_fault_rate'], dtype=np.float64)
+    replacement_rates = np.asarray(columns['replacement_rate'], dtype=np.float64)
+    curves = {}
+    for name in dict.fromkeys(algorithms.tolist()):
+        mask = algorithms == name
+        counts, inverse = np.unique(frames[mask], return_inverse=True)
+        totals = np.bincount(inverse)
+        curves[name] = (counts, np.bincount(inverse, fault_rates[mask]) / totals,
+                        np.bincount(inverse, replacement_rates[mask]) / totals)
+    return curves
+
+
+def curves_from_results(results, frame_counts=None):
+    """
+    参数:
+    results (dict): plot_performance使用的结果字典（算法名称 -> 包含page_fault_rates、replacement_rates列表的字典）。
+    frame_counts (list): 结果中没有frame_counts时使用的帧数列表。
+
+    返回:
+    dict: 与curves_from_columns相同的曲线字典。
+    """
+    return {name: (np.asarray(rates.get('frame_counts', frame_counts)), np.asarray(rates['page_fault_rates']),
+                   np.asarray(rates['replacement_rates']))
+            for name, rates in results.items()}
+
+
+def load_columns(path):
+    """
+    读取cli输出的结果文件（npz、parquet、json或csv）。
+
+    返回:
+    dict: 列名 -> 数组。
+    """
+    if path.endswith('.npz'):
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    if path.endswith('.parquet'):
+        import pyarrow.parquet
+        table = pyarrow.parquet.read_table(path)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+    with open(path, newline='') as file:
+        rows = json.load(file) if path.endswith('.json') else list(csv.DictReader(file))
+    return {name: [row[name] for row in rows] for name in rows[0]} if rows else {}
+
+
+def use_chinese_font():
+    # 设置支持中文的字体
+    import matplotlib
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei']  # 设置中文字体为SimHei
+    matplotlib.rcParams['axes.unicode_minus'] = False  # 正确显示负号
+
+
+def headless_figure(figsize):
+    # 不经过pyplot创建图形，使用Agg画布，不需要界面，也不会留在pyplot的图形列表中
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    figure = Figure(figsize=figsize)
+    FigureCanvasAgg(figure)
+    return figure
+
+
+class BlitFigure:
+    def __init__(self, figure):
+        """
+        复用同一个图形：随数据变化的图元（曲线、柱、数值标签等）设为animated，不参与普通的重绘，
+        每次重绘完整图形后缓存不含它们的背景；数据更新而坐标轴不变时只恢复背景、重画这些图元并blit，
+        坐标轴、图例等改变时才完整重绘。
+
+        参数:
+        figure: matplotlib图形，画布可以是嵌入界面的FigureCanvasTkAgg，也可以是不需要界面的Agg画布。
+        """
+        self.figure = figure
+        self.canvas = figure.canvas
+        self.artists = []
+        self.background = None
+        self.saving = False  # savefig时动态图元已作为普通图元画出，重绘事件中不再重画
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+    def add_artist(self, artist):
+        artist.set_animated(True)
+        self.artists.append(artist)
+        return artist
+
+    def clear_artists(self):
+        for artist in self.artists:
+            artist.remove()
+        self.artists = []
+
+    def on_draw(self, event):
+        # 完整重绘（包括窗口缩放）之后缓存背景，再画上动态图元
+        if self.saving:
+            return
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_artists()
+
+    def draw_artists(self):
+        for artist in self.artists:
+            self.figure.draw_artist(artist)
+
+    def refresh(self, full=False):
+        """
+        参数:
+        full (bool): 是否需要完整重绘（坐标轴范围、图例或图元的集合改变时）。
+        """
+        if full or self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.canvas.blit(self.figure.bbox)
+
+    def save(self, path, **kwargs):
+        """
+        导出静态图片：动态图元暂时改为普通图元，否则savefig不会画出它们。
+
+        参数:
+        path (str): 图片文件路径，格式按扩展名判断。
+        """
+        for artist in self.artists:
+            artist.set_animated(False)
+        self.saving = True
+        try:
+            self.figure.savefig(path, **kwargs)
+        finally:
+            self.saving = False
+            for artist in self.artists:
+                artist.set_animated(True)
+            self.background = None  # savefig可能改变了画布，下一次更新时完整重绘
+
+
+class PerformancePlot(BlitFigure):
+    def __init__(self, figure=None, display_points=DISPLAY_POINTS):
+        """
+        缺页率和置换率两个子图的性能曲线，每个算法在每个子图中只有一条曲线，之后的update原地更新数据。
+
+        参数:
+        figure: matplotlib图形，为None时创建不需要界面的图形（只能用save导出）。
+        display_points (int): 每条曲线最多显示的点数。
+        """
+        use_chinese_font()
+        super().__init__(figure if figure is not None else headless_figure((10, 5)))
+        self.display_points = display_points
+        self.axes = self.figure.subplots(1, 2)
+        for ax, name in zip(self.axes, ('缺页率', '置换率')):
+            ax.set_xlabel('物理块数')
+            ax.set_ylabel(name)
+            ax.set_title(f'{name}比较')
+            ax.set_ylim(*RATE_LIMITS)
+        self.lines = {}  # 算法名称 -> (缺页率曲线, 置换率曲线)
+        self.figure.tight_layout()
+
+    def update(self, curves):
+        """
+        用新的结果更新曲线：点数超过display_points的曲线先降采样，算法集合和横轴范围不变时只blit曲线。
+
+        参数:
+        curves (dict): curves_from_columns或curves_from_results返回的曲线字典。
+        """
+        full = list(curves) != list(self.lines)
+        if full:
+            self.clear_artists()
+            self.lines = {}
+            for name in curves:
+                self.lines[name] = tuple(self.add_artist(ax.plot([], [], label=name)[0]) for ax in self.axes)
+        # 横坐标相同的曲线（通常是同一组帧数上的所有算法）一起降采样
+        groups = {}
+        for name, (frames, fault_rates, replacement_rates) in curves.items():
+            frames = np.asarray(frames)
+            groups.setdefault((len(frames), frames.tobytes()), (frames, []))[1].append(
+                (name, np.asarray(fault_rates), np.asarray(replacement_rates)))
+        low, high = np.inf, -np.inf
+        for frames, members in groups.values():
+            ys = np.array([rates for _, fault_rates, replacement_rates in members
+                           for rates in (fault_rates, replacement_rates)])
+            selected = lttb(frames, ys, self.display_points)
+            for index, (name, _, _) in enumerate(members):
+                for line, row in zip(self.lines[name], (2 * index, 2 * index + 1)):
+                    line.set_data(frames[selected[row]], ys[row, selected[row]])
+            if len(frames):
+                low, high = min(low, frames.min()), max(high, frames.max())
+        if np.isfinite(low):
+            limits = (low, high) if low < high else (low - 1, high + 1)
+            if tuple(self.axes[0].get_xlim()) != limits:
+                full = True
+                for ax in self.axes:
+                    ax.set_xlim(*limits)
+        if full:
+            for ax in self.axes:
+                ax.legend(handles=[line for lines in self.lines.values() for line in lines if line.axes is ax],
+                          fontsize='small', ncol=max(1, len(self.lines) // 10))
+        self.refresh(full)
+
+
+class ComparisonBars(BlitFigure):
+    def __init__(self, figure):
+        """
+        某一帧数下各算法缺页率和置换率的柱状图，柱和数值标签只创建一次，之后的update原地修改高度和文字。
+
+        参数:
+        figure: matplotlib图形。
+        """
+        super().__init__(figure)
+        self.axes = self.figure.subplots(2, 1)
+        # 调整子图之间的垂直间距
+        self.figure.subplots_adjust(hspace=0.4)
+        for ax, name in zip(self.axes, ('Page Fault Rate', 'Replacement Rate')):
+            ax.set_ylabel(name)
+            ax.set_ylim(*RATE_LIMITS)
+        self.names = None
+        self.bars = ()
+        self.labels = ()
+        self.titles = tuple(self.add_artist(ax.set_title('')) for ax in self.axes)
+
+    def update(self, names, fault_rates, replacement_rates, frames):
+        """
+        参数:
+        names (list): 算法名称。
+        fault_rates (list): 各算法的缺页率。
+        replacement_rates (list): 各算法的置换率。
+        frames (int): 物理块数，显示在标题中。
+        """
+        full = list(names) != self.names
+        if full:
+            for artist in [*self.bars, *self.labels]:
+                self.artists.remove(artist)
+                artist.remove()
+            colors = [f'C{index % 10}' for index in range(len(names))]
+            positions = np.arange(len(names))
+            for ax in self.axes:
+                ax.set_xticks(positions, names)
+                ax.set_xlim(-0.6, len(names) - 0.4)
+            self.bars = tuple(self.add_artist(rect) for ax in self.axes for rect in ax.bar(positions, 0, color=colors))
+            self.labels = tuple(self.add_artist(ax.text(rect.get_x() + rect.get_width() / 2, 0, '', ha='center',
+                                                        va='bottom'))
+                                for ax, rects in zip(self.axes, (self.bars[:len(names)], self.bars[len(names):]))
+                                for rect in rects)
+            self.names = list(names)
+        for rect, label, value in zip(self.bars, self.labels, [*fault_rates, *replacement_rates]):
+            rect.set_height(value)
+            # 在柱状图上方显示数值
+            label.set_y(value)
+            label.set_text(f'{value:.2f}')
+        for title, name in zip(self.titles, ('Page Fault Rate', 'Replacement Rate')):
+            title.set_text(f'{name} Comparison for {frames} Frames')
+        self.refresh(full)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="把cli输出的结果文件画成性能曲线图，不需要界面")
+    parser.add_argument('results', help="结果文件（npz、parquet、json或csv）")
+    parser.add_argument('--output', required=True, help="图片文件路径，格式按扩展名判断")
+    parser.add_argument('--points', type=int, default=DISPLAY_POINTS, help="每条曲线最多的点数")
+    args = parser.parse_args()
+
+    plot = PerformancePlot(display_points=args.points)
+    plot.update(curves_from_columns(load_columns(args.results)))
+    plot.save(args.output)
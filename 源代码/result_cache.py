@@ -0,0 +1,262 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from PageReplacementAlgorithm import ALGORITHMS, stack_distance_profile
+
+# 计算trace哈希时每块的页面数
+HASH_CHUNK_SIZE = 1 << 20
+# 内存层默认保留的条目数和磁盘层默认的大小上限（字节）
+MEMORY_ENTRIES = 1024
+MAX_BYTES = 64 << 20
+# 默认的磁盘缓存文件
+DEFAULT_PATH = os.path.join('algorithm_output', 'result_cache.sqlite')
+# 缓存结果的版本：置换算法的行为（缺页、置换、写回计数）或缓存值的格式改变时递增，
+# 打开磁盘层时版本不同的条目全部作废
+CACHE_VERSION = 2
+
+
+def trace_digest(page_sequence, access_types=None):
+    """
+    计算trace内容的哈希：页面编号统一按小端int64计算，同样的页面序列无论存为列表还是任何整数类型的数组都得到同一个哈希。
+
+    参数:
+    page_sequence: 页面序列，或带有chunks()方法的trace。
+    access_types: 与页面序列等长的访问类型序列，不为None时一并计入哈希。
+
+    返回:
+    str: 十六进制哈希值。
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    if hasattr(page_sequence, 'chunks'):
+        chunks = page_sequence.chunks()
+    else:
+        chunks = (page_sequence[start:start + HASH_CHUNK_SIZE] for start in range(0, len(page_sequence), HASH_CHUNK_SIZE))
+    length = 0
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype='<i8')
+        digest.update(chunk.tobytes())
+        length += len(chunk)
+    digest.update(length.to_bytes(8, 'little'))
+    if access_types is not None:
+        digest.update(b'access')
+        digest.update(np.asarray(access_types, dtype=np.uint8).tobytes())
+    return digest.hexdigest()
+
+
+def result_key(trace_hash, algorithm, frames, **params):
+    """
+    参数:
+    trace_hash (str): trace_digest的结果。
+    algorithm: 算法类或算法名称。
+    frames (int): 物理块数。
+    **params: 算法的其他参数（如LFU的tie_break）。
+
+    返回:
+    str: 缓存键。
+    """
+    name = algorithm if isinstance(algorithm, str) else algorithm.__name__
+    return f"{trace_hash}:{name}:{frames}:{json.dumps(params, sort_keys=True)}"
+
+
+def algorithm_stats(alg):
+    """
+    返回:
+    dict: 已完成模拟的算法实例的计数和比率，可以直接存入缓存。
+    """
+    stats = {
+        'page_faults': alg.page_faults,
+        'page_hits': alg.page_hits,
+        'replacements': alg.replacements,
+        'page_fault_rate': alg.get_page_fault_rate(),
+        'replacement_rate': alg.get_replacement_rate(),
+    }
+    if alg.page_writes:
+        stats['dirty_evictions'] = alg.dirty_evictions
+        stats['write_backs'] = alg.write_backs
+    return stats
+
+
+class ResultCache:
+    def __init__(self, path=None, memory_entries=MEMORY_ENTRIES, max_bytes=MAX_BYTES):
+        """
+        两级结果缓存：内存中的LRU层，以及可选的sqlite磁盘层，磁盘层超过大小上限时淘汰最久未访问的条目。
+        缓存的值是可以JSON序列化的字典，可以在多个线程中共用。磁盘层记录写入时的CACHE_VERSION，
+        版本不同时清空已有条目；所有值的总大小保存在元数据表中，写入时不必重新求和。
+
+        参数:
+        path (str): sqlite文件路径，为None时只使用内存层。
+        memory_entries (int): 内存层最多保留的条目数。
+        max_bytes (int): 磁盘层所有值的总大小上限（字节）。
+        """
+        self.memory = OrderedDict()
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.connection = None
+        if path is not None:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute("CREATE TABLE IF NOT EXISTS results "
+                                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                                    "accessed REAL NOT NULL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            version = self.connection.execute("SELECT value FROM metadata WHERE name = 'version'").fetchone()
+            if version is None or version[0] != CACHE_VERSION:
+                # 旧版本算法的结果不再正确，全部作废
+                self.connection.execute("DELETE FROM results")
+                self.connection.execute("INSERT OR REPLACE INTO metadata (name, value) VALUES ('version', ?)",
+                                        (CACHE_VERSION,))
+            total = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            self.connection.execute("INSERT OR REPLACE INTO metadata (name, value) VALUES ('total_bytes', ?)", (total,))
+            self.connection.commit()
+
+    def get(self, key):
+        """
+        参数:
+        key (str): 缓存键。
+
+        返回:
+        dict: 缓存的值，不存在时返回None。磁盘层命中的条目会被放入内存层。
+        """
+        with self.lock:
+            value = self.memory.get(key)
+            if value is not None:
+                self.memory.move_to_end(key)
+                return value
+            if self.connection is None:
+                return None
+            row = self.connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+            self.connection.commit()
+            value = json.loads(row[0])
+            self.remember(key, value)
+            return value
+
+    def put(self, key, value):
+        """
+        存入缓存的两层。
+
+        参数:
+        key (str): 缓存键。
+        value (dict): 可以JSON序列化的值。
+        """
+        with self.lock:
+            self.remember(key, value)
+            if self.connection is None:
+                return
+            text = json.dumps(value)
+            old = self.connection.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+            self.connection.execute("INSERT OR REPLACE INTO results (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                                    (key, text, len(text), time.time()))
+            self.add_bytes(len(text) - (old[0] if old else 0))
+            self.evict()
+            self.connection.commit()
+
+    def remember(self, key, value):
+        # 放入内存层，超过条目上限时淘汰最久未访问的条目
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def add_bytes(self, delta):
+        # 更新元数据表中磁盘层所有值的总大小
+        self.connection.execute("UPDATE metadata SET value = value + ? WHERE name = 'total_bytes'", (delta,))
+
+    def evict(self):
+        # 磁盘层超过大小上限时，按最近访问时间从早到晚删除条目
+        total = self.connection.execute("SELECT value FROM metadata WHERE name = 'total_bytes'").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        expired, removed = [], 0
+        for key, size in self.connection.execute("SELECT key, size FROM results ORDER BY accessed").fetchall():
+            if total - removed <= self.max_bytes:
+                break
+            expired.append((key,))
+            removed += size
+        self.connection.executemany("DELETE FROM results WHERE key = ?", expired)
+        self.add_bytes(-removed)
+
+    def clear(self):
+        with self.lock:
+            self.memory.clear()
+            if self.connection is not None:
+                self.connection.execute("DELETE FROM results")
+                self.connection.execute("UPDATE metadata SET value = 0 WHERE name = 'total_bytes'")
+                self.connection.commit()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def cached_simulation(cache, algorithm, page_sequence, frames, trace_hash=None, access_types=None, **params):
+    """
+    返回模拟结果，缓存中已有相同trace、算法、物理块数和参数的结果时直接返回，否则运行模拟并存入缓存。
+
+    参数:
+    cache (ResultCache): 结果缓存。
+    algorithm: 算法类或算法名称。
+    page_sequence: 页面序列。
+    frames (int): 物理块数。
+    trace_hash (str): 已算好的trace哈希，为None时现算。
+    access_types: 与页面序列等长的访问类型序列。
+    **params: 传给算法类的其他参数。
+
+    返回:
+    dict: algorithm_stats的结果。
+    """
+    algorithm_class = ALGORITHMS[algorithm] if isinstance(algorithm, str) else algorithm
+    if trace_hash is None:
+        trace_hash = trace_digest(page_sequence, access_types)
+    key = result_key(trace_hash, algorithm_class, frames, **params)
+    stats = cache.get(key)
+    if stats is None:
+        alg = algorithm_class(frames, **params)
+        alg.simulate(page_sequence, access_types=access_types)
+        stats = algorithm_stats(alg)
+        cache.put(key, stats)
+    return stats
+
+
+def cached_profile(cache, page_sequence, policy, max_frames=None, trace_hash=None):
+    """
+    返回栈算法的缺页率曲线（stack_distance_profile的结果），缓存中已有时直接返回。
+
+    参数:
+    cache (ResultCache): 结果缓存。
+    page_sequence: 页面序列。
+    policy (str): 'LRU'或'OPT'。
+    max_frames (int): 最大物理块数。
+    trace_hash (str): 已算好的trace哈希，为None时现算。
+
+    返回:
+    dict: stack_distance_profile的结果。
+    """
+    if trace_hash is None:
+        trace_hash = trace_digest(page_sequence)
+    key = result_key(trace_hash, f"{policy}-profile", max_frames)
+    profile = cache.get(key)
+    if profile is None:
+        profile = stack_distance_profile(page_sequence, policy, max_frames)
+        cache.put(key, profile)
+    return profile
@@ -0,0 +1,175 @@
+import argparse
+import math
+
+import numpy as np
+
+from PageReplacementAlgorithm import ALGORITHMS, stack_distance_profile, use_stack_profile
+from sweep import parse_frame_counts
+import trace_loader
+
+# 哈希值取高HASH_BITS位与阈值比较，采样率的精度为1 / 2^HASH_BITS
+HASH_BITS = 24
+# 默认使用的哈希盐数量，不同的盐得到相互独立的采样，用它们之间的差异估计误差
+SALTS = (0, 1, 2, 3)
+
+
+def page_hash(pages, salt=0):
+    """
+    对页面编号做64位混合哈希（splitmix64的终结函数），同一个页面总是得到同一个哈希值。
+
+    参数:
+    pages (numpy.ndarray): 页面编号数组。
+    salt (int): 哈希盐。
+
+    返回:
+    numpy.ndarray: uint64哈希值数组。
+    """
+    with np.errstate(over='ignore'):
+        h = pages.astype(np.uint64) + np.uint64((0x9E3779B97F4A7C15 * (salt + 1)) & 0xFFFFFFFFFFFFFFFF)
+        h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return h ^ (h >> np.uint64(31))
+
+
+def sample_trace(page_sequence, rate, salt=0, access_types=None):
+    """
+    按页面编号的哈希值空间采样：哈希值落在前rate比例内的页面，其全部访问都被保留，其余页面的访问全部丢弃。
+
+    参数:
+    page_sequence: 页面序列，或trace_loader中带有chunks()方法的trace（逐块处理，不必整体载入内存）。
+    rate (float): 采样率，0到1之间。
+    salt (int): 哈希盐。
+    access_types: 与页面序列等长的访问类型序列，为None时只返回页面。
+
+    返回:
+    tuple: (采样后的页面数组, 采样后的访问类型数组或None, 原序列长度)。
+    """
+    threshold = np.uint64(max(1, round(rate * (1 << HASH_BITS))))
+    shift = np.uint64(64 - HASH_BITS)
+    if hasattr(page_sequence, 'access_chunks') and access_types is not None:
+        chunks = page_sequence.access_chunks()
+    elif hasattr(page_sequence, 'chunks'):
+        chunks = ((chunk, None) for chunk in page_sequence.chunks())
+    else:
+        chunks = [(page_sequence, access_types)]
+    sampled_pages, sampled_access_types, length = [], [], 0
+    for pages, chunk_access_types in chunks:
+        pages = np.asarray(pages)
+        keep = (page_hash(pages, salt) >> shift) < threshold
+        sampled_pages.append(pages[keep])
+        if chunk_access_types is not None:
+            sampled_access_types.append(np.asarray(chunk_access_types, dtype=np.uint8)[keep])
+        length += len(pages)
+    pages = np.concatenate(sampled_pages) if sampled_pages else np.empty(0, dtype=np.int64)
+    return pages, np.concatenate(sampled_access_types) if sampled_access_types else None, length
+
+
+def sampled_frames(frames, rate):
+    """
+    返回:
+    int: 采样子序列上与frames对应的物理块数，至少为1。
+    """
+    return max(1, round(frames * rate))
+
+
+def estimate_curve(algorithm, page_sequence, frame_counts, rate=0.01, salts=SALTS, access_types=None, **kwargs):
+    """
+    用空间采样（SHARDS）近似计算缺页率曲线：在采样子序列上以按比例缩小的物理块数运行算法，
+    再按期望采样数修正（SHARDS-adj），用多个哈希盐之间的差异估计误差。
+
+    采样子序列的长度约为原序列的rate倍，工作量也随之减少；物理块数缩小后小于几十时误差会明显增大，
+    此时应提高采样率。
+
+    参数:
+    algorithm: 算法类或算法名称。
+    page_sequence: 页面序列，或带有chunks()方法的trace。
+    frame_counts (list): 物理块数列表。
+    rate (float): 采样率。
+    salts (tuple): 哈希盐，每个盐独立采样一次。
+    access_types: 与页面序列等长的访问类型序列。
+    **kwargs: 传给算法类的其他参数。
+
+    返回:
+    dict: frame_counts、page_fault_rates、replacement_rates（各盐的平均值），
+          errors（缺页率的标准误差，只有一个盐时为None）、sampled_frames、rate、sample_lengths。
+    """
+    algorithm_class = ALGORITHMS[algorithm] if isinstance(algorithm, str) else algorithm
+    scaled = [sampled_frames(frames, rate) for frames in frame_counts]
+    fault_rates = [[] for _ in frame_counts]
+    replacement_rates = [[] for _ in frame_counts]
+    sample_lengths = []
+    for salt in salts:
+        pages, sampled_access_types, length = sample_trace(page_sequence, rate, salt, access_types)
+        sample_lengths.append(len(pages))
+        # 按期望采样数而不是实际采样数归一化，修正采样数的随机偏差
+        expected = rate * length
+        if use_stack_profile(algorithm_class, scaled) and not kwargs and len(pages):
+            # 栈距离遍历更快时一次求出所有物理块数下的缺页次数
+            profile = stack_distance_profile(pages, algorithm_class.__name__, max(scaled))
+            for index, frames in enumerate(scaled):
+                faults = profile['page_faults'][frames - 1]
+                fault_rates[index].append(faults / expected)
+                replacement_rates[index].append(max(0, faults - frames) / expected)
+            continue
+        for index, frames in enumerate(scaled):
+            alg = algorithm_class(frames, **kwargs)
+            alg.simulate(pages, access_types=sampled_access_types)
+            if alg.page_faults + alg.page_hits == 0:
+                fault_rates[index].append(0.0)
+                replacement_rates[index].append(0.0)
+                continue
+            # get_page_fault_rate以实际采样数为分母，这里换算为以期望采样数为分母
+            scale = len(pages) / expected
+            fault_rates[index].append(alg.get_page_fault_rate() * scale)
+            replacement_rates[index].append(alg.get_replacement_rate() * scale)
+    return {
+        'frame_counts': list(frame_counts),
+        'page_fault_rates': [sum(values) / len(values) for values in fault_rates],
+        'replacement_rates': [sum(values) / len(values) for values in replacement_rates],
+        'errors': [standard_error(values) for values in fault_rates],
+        'sampled_frames': scaled,
+        'rate': rate,
+        'sample_lengths': sample_lengths,
+    }
+
+
+def standard_error(values):
+    """
+    返回:
+    float: 平均值的标准误差，少于两个值时为None。
+    """
+    if len(values) < 2:
+        return None
+    mean = sum(values) / len(values)
+    variance = sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+    return math.sqrt(variance / len(values))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="用空间采样近似计算页面置换算法的缺页率曲线")
+    parser.add_argument('trace', help="trace文件路径，格式按扩展名判断（见trace_loader.open_trace）")
+    parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS), default=['LRU'])
+    parser.add_argument('--frames', type=parse_frame_counts, default=parse_frame_counts('1024,4096,16384,65536'),
+                        help="物理块数，如 1024,4096 或 1024:65536:1024")
+    parser.add_argument('--rate', type=float, default=0.01, help="采样率")
+    parser.add_argument('--salts', type=int, default=len(SALTS), help="独立采样的次数，用于估计误差")
+    parser.add_argument('--page-size', type=int, default=4096, help="页面大小（字节）")
+    parser.add_argument('--exact', action='store_true', help="同时运行完整模拟并输出实际误差")
+    args = parser.parse_args()
+
+    trace = trace_loader.open_trace(args.trace, page_size=args.page_size)
+    for name in args.algorithms:
+        curve = estimate_curve(name, trace, args.frames, args.rate, tuple(range(args.salts)))
+        print(f"{name}  rate={args.rate} sampled={curve['sample_lengths']}")
+        if args.exact:
+            exact_sequence = trace.as_array() if hasattr(trace, 'as_array') else np.fromiter(trace, dtype=np.int64)
+        for index, frames in enumerate(args.frames):
+            error = curve['errors'][index]
+            line = f"  frames={frames:<8} page fault rate={curve['page_fault_rates'][index]:.4f}"
+            if error is not None:
+                line += f" ± {error:.4f}"
+            if args.exact:
+                alg = ALGORITHMS[name](frames)
+                alg.simulate(exact_sequence)
+                line += f"  exact={alg.get_page_fault_rate():.4f}"
+            print(line)
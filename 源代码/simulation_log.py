@@ -0,0 +1,213 @@
+import argparse
+import bisect
+import mmap
+import struct
+
+# 日志文件头：魔数、版本、物理块数、快照间隔、是否原位置换、算法名称（UTF-8，补零到32字节）
+HEADER = struct.Struct('<4sHIIB32s')
+MAGIC = b'PRSL'
+VERSION = 1
+# 事件记录：序列号、页面、被置换的页面、标志位（FLAG_HIT表示命中，FLAG_EVICTED表示发生了置换）
+EVENT = struct.Struct('<QqqB')
+FLAG_HIT = 1
+FLAG_EVICTED = 2
+# 快照记录头：序列号、页面数量，其后紧跟页面数量个int64页面编号
+SNAPSHOT = struct.Struct('<QI')
+PAGE = struct.Struct('<q')
+
+
+def snapshot_path(path):
+    """
+    返回:
+    str: 与事件日志配套的快照文件路径。
+    """
+    return path + '.snap'
+
+
+class SimulationLogWriter:
+    def __init__(self, path, algorithm, snapshot_interval=4096, buffer_size=1 << 20):
+        """
+        二进制模拟日志的写入器，事件和快照都经过缓冲写入。
+
+        参数:
+        path (str): 事件日志文件路径，快照写入同名的.snap文件。
+        algorithm: 被记录的页面置换算法实例。
+        snapshot_interval (int): 每隔多少次访问记录一次内存快照。
+        buffer_size (int): 文件写缓冲区大小（字节）。
+        """
+        self.algorithm = algorithm
+        self.snapshot_interval = snapshot_interval
+        self.event_file = open(path, 'wb', buffering=buffer_size)
+        self.snapshot_file = open(snapshot_path(path), 'wb', buffering=buffer_size)
+        name = algorithm.__class__.__name__.encode('utf-8')[:32]
+        self.event_file.write(HEADER.pack(MAGIC, VERSION, algorithm.frames, snapshot_interval,
+                                          getattr(algorithm, 'replaces_in_place', False), name))
+        self.write_snapshot(0)
+
+    def write_event(self, step, page, hit, evicted):
+        """
+        写入一次页面访问事件。
+
+        参数:
+        step (int): 序列号（从1开始）。
+        page (int): 被访问的页面。
+        hit (bool): 是否命中。
+        evicted: 被置换的页面，没有置换时为None。
+        """
+        if evicted is None:
+            self.event_file.write(EVENT.pack(step, page, 0, FLAG_HIT if hit else 0))
+        else:
+            self.event_file.write(EVENT.pack(step, page, evicted, FLAG_EVICTED))
+        if step % self.snapshot_interval == 0:
+            self.write_snapshot(step)
+
+    def write_snapshot(self, step):
+        """
+        写入算法当前的内存快照。
+
+        参数:
+        step (int): 快照对应的序列号，即已处理的页面数。
+        """
+        pages = self.algorithm.memory_state()
+        self.snapshot_file.write(SNAPSHOT.pack(step, len(pages)))
+        self.snapshot_file.write(struct.pack(f'<{len(pages)}q', *pages))
+
+    def close(self):
+        self.event_file.close()
+        self.snapshot_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def record_simulation(algorithm, page_sequence, path, snapshot_interval=4096, access_types=None):
+    """
+    运行模拟并把每次访问写入二进制日志。
+
+    参数:
+    algorithm: 页面置换算法实例。
+    page_sequence (list): 页面请求序列。
+    path (str): 事件日志文件路径。
+    snapshot_interval (int): 每隔多少次访问记录一次内存快照。
+    access_types: 与页面序列等长的访问类型序列，为None时全部视为读访问。
+    """
+    with SimulationLogWriter(path, algorithm, snapshot_interval) as writer:
+        write_event = writer.write_event
+        for step, page, hit, evicted in algorithm.steps(page_sequence, access_types):
+            write_event(step, page, hit, evicted)
+
+
+class SimulationLog:
+    def __init__(self, path):
+        """
+        以内存映射方式读取二进制模拟日志，支持随机访问任意一步的事件和内存状态。
+
+        参数:
+        path (str): 事件日志文件路径。
+        """
+        with open(path, 'rb') as file:
+            self.events_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.frames, self.snapshot_interval, in_place, name = HEADER.unpack_from(self.events_map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} 不是受支持的模拟日志文件。")
+        self.replaces_in_place = bool(in_place)
+        self.algorithm_name = name.rstrip(b'\0').decode('utf-8')
+        self.length = (len(self.events_map) - HEADER.size) // EVENT.size
+        # 快照文件只读取记录头建立索引：快照序列号 -> 文件偏移
+        self.snapshot_steps, self.snapshot_offsets = [], []
+        with open(snapshot_path(path), 'rb') as file:
+            self.snapshot_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        offset = 0
+        while offset < len(self.snapshot_map):
+            step, count = SNAPSHOT.unpack_from(self.snapshot_map, offset)
+            self.snapshot_steps.append(step)
+            self.snapshot_offsets.append(offset)
+            offset += SNAPSHOT.size + count * PAGE.size
+
+    def __len__(self):
+        return self.length
+
+    def event(self, index):
+        """
+        读取第index个事件（从0开始）。
+
+        返回:
+        tuple: (序列号, 页面, 是否命中, 被置换的页面或None)。
+        """
+        if not 0 <= index < self.length:
+            raise IndexError(index)
+        step, page, evicted, flags = EVENT.unpack_from(self.events_map, HEADER.size + index * EVENT.size)
+        return step, page, bool(flags & FLAG_HIT), evicted if flags & FLAG_EVICTED else None
+
+    def __iter__(self):
+        events = memoryview(self.events_map)[HEADER.size:HEADER.size + self.length * EVENT.size]
+        for step, page, evicted, flags in EVENT.iter_unpack(events):
+            yield step, page, bool(flags & FLAG_HIT), evicted if flags & FLAG_EVICTED else None
+
+    def memory_state_at(self, step):
+        """
+        从不晚于step的最近快照出发重放事件，重建第step步之后的内存状态。
+
+        参数:
+        step (int): 已处理的页面数，0表示模拟开始前。
+
+        返回:
+        list: 与算法memory_state()相同顺序的页面列表。
+        """
+        if not 0 <= step <= self.length:
+            raise IndexError(step)
+        snapshot = bisect.bisect_right(self.snapshot_steps, step) - 1
+        offset = self.snapshot_offsets[snapshot]
+        snapshot_step, count = SNAPSHOT.unpack_from(self.snapshot_map, offset)
+        pages = struct.unpack_from(f'<{count}q', self.snapshot_map, offset + SNAPSHOT.size)
+        if self.replaces_in_place:
+            # 原位置换（时钟类算法）：被置换页面所在的帧换成新页面
+            state = list(pages)
+            frame_of = {page: frame for frame, page in enumerate(state)}
+            for index in range(snapshot_step, step):
+                _, page, hit, evicted = self.event(index)
+                if hit:
+                    continue
+                if evicted is None:
+                    frame_of[page] = len(state)
+                    state.append(page)
+                else:
+                    frame = frame_of.pop(evicted)
+                    state[frame] = page
+                    frame_of[page] = frame
+            return state
+        # 其余算法：移除被置换页面，新页面追加在末尾
+        state = dict.fromkeys(pages)
+        for index in range(snapshot_step, step):
+            _, page, hit, evicted = self.event(index)
+            if hit:
+                continue
+            if evicted is not None:
+                del state[evicted]
+            state[page] = None
+        return list(state)
+
+    def close(self):
+        self.events_map.close()
+        self.snapshot_map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="查看二进制模拟日志")
+    parser.add_argument('path', help="事件日志文件路径")
+    parser.add_argument('--step', type=int, default=None, help="输出第step步之后的内存状态")
+    args = parser.parse_args()
+
+    with SimulationLog(args.path) as log:
+        print(f"{log.algorithm_name}, Frames: {log.frames}, Steps: {len(log)}")
+        if args.step is not None:
+            print(f"{args.step}: {log.algorithm_name} - Memory state: {log.memory_state_at(args.step)}")
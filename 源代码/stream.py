@@ -0,0 +1,84 @@
+import argparse
+import json
+import socket
+import sys
+
+from PageReplacementAlgorithm import ALGORITHMS
+from trace_loader import TextTrace
+
+
+def stream_metrics(algorithm, trace, interval, window_size=None):
+    """
+    在线模拟一个不断到来的trace，每处理interval次访问产生一次运行统计，trace不会被整体保存在内存中。
+
+    参数:
+    algorithm: 页面置换算法实例，不能是需要预知未来访问的OPT。
+    trace: 带有access_chunks()方法的trace（如读取管道或套接字的TextTrace），或(页面, 访问类型)块的可迭代对象。
+    interval (int): 每隔多少次访问产生一次统计。
+    window_size (int): 滑动窗口大小，为None时使用interval。
+
+    返回:
+    generator: 每次产生algorithm.metrics()的结果；trace结束时若还有未报告的访问，再产生一次。
+    """
+    algorithm.set_window(window_size or interval)
+    chunks = trace.access_chunks() if hasattr(trace, 'access_chunks') else trace
+    access = algorithm.access
+    next_report = interval
+    references = 0
+    for pages, access_types in chunks:
+        for page, access_type in zip(pages, access_types):
+            access(page, access_type)
+            references += 1
+            if references == next_report:
+                next_report += interval
+                yield algorithm.metrics()
+    if references != next_report - interval:
+        yield algorithm.metrics()
+
+
+def open_source(source):
+    """
+    打开在线trace的来源：'-'为标准输入，'host:port'为TCP连接，其余按文件路径（如命名管道）打开。
+
+    返回:
+    文本文件对象。
+    """
+    if source == '-':
+        return sys.stdin
+    host, separator, port = source.rpartition(':')
+    if separator and port.isdigit():
+        return socket.create_connection((host, int(port))).makefile('r')
+    return open(source, 'r')
+
+
+def format_metrics(metrics):
+    line = (f"{metrics['references']:>12} refs  faults={metrics['page_faults']:<10} "
+            f"fault rate={metrics['page_fault_rate']:.4f}  window={metrics['window_fault_rate']:.4f}")
+    if 'write_backs' in metrics:
+        line += f"  write-backs={metrics['write_backs']}"
+    return line
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="在线模拟来自管道或套接字的页面访问流，并定期输出运行统计")
+    parser.add_argument('source', nargs='?', default='-', help="'-'为标准输入（默认），'host:port'为TCP连接，或文件/命名管道路径")
+    parser.add_argument('--algorithm', choices=[name for name in ALGORITHMS if name != 'OPT'], default='LRU')
+    parser.add_argument('--frames', type=int, default=1024, help="物理块数")
+    parser.add_argument('--format', choices=['page', 'address', 'lackey'], default='page', help="每行的格式")
+    parser.add_argument('--page-size', type=int, default=4096, help="页面大小（字节），page格式下忽略")
+    parser.add_argument('--radix', type=int, default=None, help="page和address格式中数值的进制，如16，默认自动判断")
+    parser.add_argument('--interval', type=int, default=100_000, help="每隔多少次访问输出一次统计")
+    parser.add_argument('--window', type=int, default=None, help="滑动窗口大小，默认等于interval")
+    parser.add_argument('--batch', type=int, default=1, help="每次读取的行数，增大可提高吞吐但会增加输出延迟")
+    parser.add_argument('--json', action='store_true', help="每次统计输出一行JSON")
+    args = parser.parse_args()
+
+    source = open_source(args.source)
+    trace = TextTrace(source, page_size=args.page_size, trace_format=args.format, chunk_size=args.batch,
+                      radix=args.radix)
+    alg = ALGORITHMS[args.algorithm](args.frames)
+    try:
+        for metrics in stream_metrics(alg, trace, args.interval, args.window):
+            print(json.dumps(metrics) if args.json else format_metrics(metrics), flush=True)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,258 @@
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from PageReplacementAlgorithm import ALGORITHMS, stack_distance_profile, use_stack_profile
+from result_cache import ResultCache, result_key, trace_digest
+import workload
+
+# 结果表的列
+COLUMNS = ('algorithm', 'frames', 'seed', 'page_faults', 'page_hits', 'replacements',
+           'page_fault_rate', 'replacement_rate')
+
+# 子进程中已连接的共享内存，由进程池的初始化函数设置，避免每个任务都传递（pickle）整个trace
+_shared_traces = None
+
+
+def _attach_traces(name, dtype, shape):
+    global _shared_traces
+    # 子进程与父进程共用同一个resource_tracker，共享内存由父进程在run_sweep结束时释放
+    memory = shared_memory.SharedMemory(name=name)
+    _shared_traces = (memory, np.ndarray(shape, dtype=dtype, buffer=memory.buf))
+
+
+def _run_task(seed_index, seed, algorithm_name, frame_counts):
+    # 在子进程中对一条共享trace运行一个算法
+    return simulate_rows(_shared_traces[1][seed_index], seed, algorithm_name, frame_counts)
+
+
+def simulate_rows(page_sequence, seed, algorithm_name, frame_counts):
+    """
+    对一条trace运行一个算法：栈距离遍历更快时（见use_stack_profile）一次求出所有帧数，否则逐个帧数模拟。
+
+    返回:
+    list: 与COLUMNS对应的结果行。
+    """
+    rows = []
+    if use_stack_profile(algorithm_name, frame_counts):
+        profile = stack_distance_profile(page_sequence, algorithm_name, max(frame_counts))
+        total = len(page_sequence)
+        for frames in frame_counts:
+            faults = profile['page_faults'][frames - 1]
+            replacements = max(0, faults - frames)
+            rows.append((algorithm_name, frames, seed, faults, total - faults, replacements,
+                         faults / total, replacements / total))
+        return rows
+    for frames in frame_counts:
+        alg = ALGORITHMS[algorithm_name](frames)
+        alg.simulate(page_sequence)
+        rows.append((algorithm_name, frames, seed, alg.page_faults, alg.page_hits, alg.replacements,
+                     alg.get_page_fault_rate(), alg.get_replacement_rate()))
+    return rows
+
+
+def run_sweep(traces, algorithms, frame_counts, max_workers=None, progress=None, cache=None):
+    """
+    在进程池中并行运行 算法 × 帧数 × 种子 的实验网格。
+
+    所有trace放在一块共享内存中，子进程启动时连接一次，任务只传递种子下标和算法名称；
+    max_workers为1时直接在当前进程中运行，不启动进程池。
+    栈算法（LRU、OPT）对每条trace只提交一个任务，用栈距离一次求出所有帧数的结果。
+    给出cache时，按trace内容的哈希查找已有结果，只提交缓存中没有的组合，新结果写回缓存。
+
+    参数:
+    traces (dict): 种子 -> 页面序列（numpy数组），所有序列长度必须相同。
+    algorithms (list): 算法名称或算法类的列表。
+    frame_counts (list): 帧数列表。
+    max_workers (int): 进程数，默认使用全部CPU，为1时在当前进程中运行。
+    progress: 可选的回调函数，每完成一个任务调用一次 progress(已完成任务数, 任务总数)。
+    cache (ResultCache): 可选的结果缓存。
+
+    返回:
+    list: 按 (算法, 帧数, 种子) 排序的结果行，每行是与COLUMNS对应的元组。
+    """
+    names = [alg if isinstance(alg, str) else alg.__name__ for alg in algorithms]
+    seeds = list(traces)
+    rows, missing = [], {}
+    digests = {seed: trace_digest(traces[seed]) for seed in seeds} if cache is not None else {}
+    for seed in seeds:
+        for name in names:
+            for frames in frame_counts:
+                stats = cache.get(result_key(digests[seed], name, frames)) if cache is not None else None
+                if stats is None:
+                    missing.setdefault((seed, name), []).append(frames)
+                else:
+                    rows.append((name, frames, seed, stats['page_faults'], stats['page_hits'], stats['replacements'],
+                                 stats['page_fault_rate'], stats['replacement_rate']))
+    if missing:
+        rows.extend(_run_missing(traces, seeds, missing, max_workers, progress, cache, digests))
+    order = {name: index for index, name in enumerate(names)}
+    rows.sort(key=lambda row: (order[row[0]], row[1], seeds.index(row[2])))
+    return rows
+
+
+def _run_missing(traces, seeds, missing, max_workers, progress, cache, digests):
+    # 把缓存中没有的 (种子, 算法) -> 帧数列表 分成任务在进程池中运行，max_workers为1时在当前进程中依次运行
+    if max_workers == 1:
+        rows = []
+        for done, ((seed, name), frame_counts) in enumerate(missing.items(), start=1):
+            rows.extend(simulate_rows(np.asarray(traces[seed]), seed, name, frame_counts))
+            if progress is not None:
+                progress(done, len(missing))
+        _store_rows(rows, cache, digests)
+        return rows
+    # 各条trace的整数类型可能不同（如文件trace为uint64、生成的负载为int32），统一为int64再放入共享内存，
+    # 子进程按stacked的类型和形状读取
+    stacked = np.stack([np.asarray(traces[seed]).astype(np.int64, copy=False) for seed in seeds])
+    memory = shared_memory.SharedMemory(create=True, size=max(stacked.nbytes, 1))
+    try:
+        dtype, shape = stacked.dtype, stacked.shape
+        np.ndarray(shape, dtype=dtype, buffer=memory.buf)[:] = stacked
+        del stacked
+        tasks = []
+        for (seed, name), frame_counts in missing.items():
+            seed_index = seeds.index(seed)
+            if use_stack_profile(name, frame_counts):
+                tasks.append((seed_index, seed, name, frame_counts))
+            else:
+                tasks.extend((seed_index, seed, name, [frames]) for frames in frame_counts)
+        rows = []
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_attach_traces,
+                                 initargs=(memory.name, dtype, shape)) as executor:
+            futures = [executor.submit(_run_task, *task) for task in tasks]
+            for done, future in enumerate(as_completed(futures), start=1):
+                rows.extend(future.result())
+                if progress is not None:
+                    progress(done, len(futures))
+    finally:
+        memory.close()
+        memory.unlink()
+    _store_rows(rows, cache, digests)
+    return rows
+
+
+def _store_rows(rows, cache, digests):
+    if cache is None:
+        return
+    for name, frames, seed, faults, hits, replacements, fault_rate, replacement_rate in rows:
+        cache.put(result_key(digests[seed], name, frames),
+                  {'page_faults': faults, 'page_hits': hits, 'replacements': replacements,
+                   'page_fault_rate': fault_rate, 'replacement_rate': replacement_rate})
+
+
+def rows_to_results(rows):
+    """
+    把结果行按算法和帧数对各种子取平均，转换为plot_performance使用的结果字典。
+
+    参数:
+    rows (list): run_sweep返回的结果行。
+
+    返回:
+    dict: 算法名称 -> 包含frame_counts、page_fault_rates和replacement_rates列表的字典。
+    """
+    sums = {}
+    for algorithm, frames, _, _, _, _, fault_rate, replacement_rate in rows:
+        entry = sums.setdefault(algorithm, {}).setdefault(frames, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += fault_rate
+        entry[2] += replacement_rate
+    results = {}
+    for algorithm, by_frames in sums.items():
+        frame_counts = sorted(by_frames)
+        results[algorithm] = {
+            'frame_counts': frame_counts,
+            'page_fault_rates': [by_frames[f][1] / by_frames[f][0] for f in frame_counts],
+            'replacement_rates': [by_frames[f][2] / by_frames[f][0] for f in frame_counts],
+        }
+    return results
+
+
+def write_csv(rows, file):
+    """
+    把结果行写成CSV。
+
+    参数:
+    rows (list): run_sweep返回的结果行。
+    file: 文本文件对象。
+    """
+    writer = csv.writer(file)
+    writer.writerow(COLUMNS)
+    writer.writerows(rows)
+
+
+def verify_pool(max_workers=2, length=1000, upper_bound=50, frame_counts=(2, 3, 5, 8)):
+    """
+    校验进程池的结果与在当前进程中运行的结果完全相同，trace的整数类型各不相同（int32、int64、uint64），
+    与cli.py把文件trace和生成的负载放在同一组时的情况一样。
+
+    参数:
+    max_workers (int): 进程池的进程数，至少为2。
+    length (int): 每条trace的长度。
+    upper_bound (int): 页面编号的上限。
+    frame_counts (tuple): 帧数。
+
+    返回:
+    int: 校验通过的结果行数，不一致时抛出AssertionError。
+    """
+    dtypes = (np.int32, np.int64, np.uint64)
+    traces = {seed: workload.uniform_sequence(length, upper_bound, seed=seed).astype(dtype)
+              for seed, dtype in enumerate(dtypes)}
+    expected = run_sweep(traces, list(ALGORITHMS), list(frame_counts), max_workers=1)
+    actual = run_sweep(traces, list(ALGORITHMS), list(frame_counts), max_workers=max(2, max_workers))
+    if actual != expected:
+        mismatched = [(old, new) for old, new in zip(expected, actual) if old != new]
+        raise AssertionError(f"进程池的结果与当前进程中运行的结果不一致: {mismatched[:3]}")
+    return len(actual)
+
+
+def parse_frame_counts(text):
+    """
+    解析帧数参数："2,4,8" 为列表，"2:64" 为闭区间，"2:64:2" 带步长。
+
+    返回:
+    list: 帧数列表。
+    """
+    if ':' in text:
+        parts = [int(part) for part in text.split(':')]
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else 1
+        return list(range(start, stop + 1, step))
+    return [int(part) for part in text.split(',')]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="并行运行 算法 × 帧数 × 种子 的页面置换实验网格")
+    parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument('--frames', type=parse_frame_counts, default=parse_frame_counts('2:8'),
+                        help="帧数，如 2,4,8 或 2:64 或 2:128:2")
+    parser.add_argument('--seeds', type=int, default=1, help="种子数量，每个种子生成一条trace")
+    parser.add_argument('--length', type=int, default=100_000, help="每条trace的长度")
+    parser.add_argument('--upper-bound', type=int, default=1000, help="页面编号的上限")
+    parser.add_argument('--workload', choices=['uniform', 'zipf'], default='uniform', help="负载模型")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认使用全部CPU")
+    parser.add_argument('--output', default=None, help="CSV输出文件，默认输出到标准输出")
+    parser.add_argument('--cache', default=None, help="结果缓存文件（sqlite），重复运行相同的trace时直接读取已有结果")
+    parser.add_argument('--verify', action='store_true', help="只校验进程池与当前进程中运行的结果一致（trace类型各不相同）")
+    args = parser.parse_args()
+
+    if args.verify:
+        print(f"校验通过: {verify_pool(args.workers or 2)} 行结果")
+        raise SystemExit(0)
+
+    generator = workload.WORKLOADS[args.workload]
+    traces = {seed: generator(args.length, args.upper_bound, seed=seed) for seed in range(args.seeds)}
+    cache = ResultCache(args.cache) if args.cache else None
+    rows = run_sweep(traces, args.algorithms, args.frames, args.workers, cache=cache)
+    if cache is not None:
+        cache.close()
+    if args.output is None:
+        write_csv(rows, sys.stdout)
+    else:
+        with open(args.output, 'w', newline='') as output_file:
+            write_csv(rows, output_file)
+        print(f"{len(rows)} 行结果已写入 {os.path.abspath(args.output)}")
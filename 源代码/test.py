@@ -1,12 +1,28 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
 import random
-import io
+import queue
+import threading
+from collections import deque
+from itertools import islice
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 
 from PageReplacementAlgorithm import generate_page_sequence, plot_performance, FIFO, LRU, OPT, LFU, SimpleCLOCK, \
-    EnhancedCLOCK
+    EnhancedCLOCK, ARC, TwoQ, LIRS, CLOCKPro
+from plotting import ComparisonBars
+from result_cache import ResultCache, algorithm_stats, result_key, trace_digest
+
+# 界面每隔多少毫秒处理一次后台线程的消息
+POLL_INTERVAL = 50
+# 后台线程每次发送的置换过程行数，界面每次轮询最多插入的文本块数，保证界面始终能及时响应
+TEXT_CHUNK_LINES = 2000
+CHUNKS_PER_POLL = 4
+# 每个文本框最多显示的置换过程行数和页面序列最多显示的页面数，超出部分只统计不显示
+DISPLAY_LINE_LIMIT = 100_000
+SEQUENCE_DISPLAY_LIMIT = 100_000
+# 不输出置换过程的模拟每处理多少个页面检查一次取消请求并报告进度
+CANCEL_CHECK_STEPS = 1 << 16
 
 
 def is_valid_frame_number(self, frame_number):
@@ -23,15 +39,95 @@ def on_invalid_frame_number(self):
 
 
 def is_valid_size(user_input):
-    # 用户输入必须是非零的整数，且小于200
+    # 用户输入必须是非零的整数，模拟在后台线程中运行，不再限制序列大小
     if user_input.isdigit():
-        size = int(user_input)
-        return size > 0 and size <= 200
+        return int(user_input) > 0
     return False
 
 
 def on_invalid():
-    messagebox.showerror("请设置页面序列大小", "请输入一个非零的整数，且不超过200。")
+    messagebox.showerror("请设置页面序列大小", "请输入一个非零的整数。")
+
+
+def simulation_worker(tasks, sequence_size, upper_bound, messages, cancel, cache):
+    """
+    后台线程：生成页面序列并依次运行模拟任务，把进度、文本块和结果放入消息队列，由界面线程负责显示。
+    后台线程不直接操作任何Tk控件。不显示置换过程的任务先按页面序列的哈希查找结果缓存，缓存中已有时不再模拟。
+
+    参数:
+    tasks (list): (算法名称, 物理块数, 是否显示置换过程) 的列表。
+    sequence_size (int): 页面序列的大小。
+    upper_bound (int): 页面编号的上限。
+    messages (queue.Queue): 发往界面线程的消息队列。
+    cancel (threading.Event): 取消请求。
+    cache (ResultCache): 结果缓存。
+    """
+    try:
+        page_sequence = generate_page_sequence(sequence_size, upper_bound)
+        shown = page_sequence[:SEQUENCE_DISPLAY_LIMIT]
+        for start in range(0, len(shown), TEXT_CHUNK_LINES * 10):
+            messages.put(('sequence', ' '.join(str(p) for p in shown[start:start + TEXT_CHUNK_LINES * 10]) + ' '))
+        if len(page_sequence) > len(shown):
+            messages.put(('sequence', f"...（其余 {len(page_sequence) - len(shown)} 个页面未显示）"))
+
+        trace_hash = trace_digest(page_sequence)
+        for index, (alg_name, frames, show_trace) in enumerate(tasks):
+            key = result_key(trace_hash, alg_name, frames)
+            stats = None if show_trace else cache.get(key)
+            if stats is None:
+                algorithm = globals()[alg_name](frames)
+                if show_trace:
+                    completed = run_with_trace(algorithm, alg_name, page_sequence, messages, cancel)
+                else:
+                    completed = run_without_trace(algorithm, page_sequence, messages, cancel, index, len(tasks))
+                if not completed:
+                    messages.put(('cancelled',))
+                    return
+                stats = algorithm_stats(algorithm)
+                cache.put(key, stats)
+            messages.put(('result', alg_name, frames, stats))
+            messages.put(('progress', index + 1, len(tasks)))
+        messages.put(('done',))
+    except Exception as error:  # 后台线程的异常交给界面线程显示
+        messages.put(('error', f"{type(error).__name__}: {error}"))
+
+
+def run_with_trace(algorithm, alg_name, page_sequence, messages, cancel):
+    # 逐行生成置换过程，按块发送给界面线程；超过显示上限的部分只运行不生成文本
+    messages.put(('clear', alg_name))
+    steps = algorithm.steps(page_sequence)
+    lines = []
+    for counter, _, _, _ in islice(steps, DISPLAY_LINE_LIMIT):
+        if cancel.is_set():
+            return False
+        lines.append(algorithm.snapshot_line(counter))
+        if len(lines) == TEXT_CHUNK_LINES:
+            messages.put(('text', alg_name, ''.join(lines)))
+            lines = []
+    if lines:
+        messages.put(('text', alg_name, ''.join(lines)))
+    if len(page_sequence) > DISPLAY_LINE_LIMIT:
+        messages.put(('text', alg_name, f"...（其余 {len(page_sequence) - DISPLAY_LINE_LIMIT} 步未显示）\n"))
+        return consume_steps(algorithm, steps, len(page_sequence), cancel)
+    return True
+
+
+def run_without_trace(algorithm, page_sequence, messages, cancel, index, total):
+    return consume_steps(algorithm, algorithm.steps(page_sequence), len(page_sequence), cancel,
+                         lambda done: messages.put(('progress', index + done / len(page_sequence), total)))
+
+
+def consume_steps(algorithm, steps, length, cancel, progress=None):
+    # 分段消费模拟生成器，每段之间检查取消请求并报告任务内的进度
+    done = algorithm.page_faults + algorithm.page_hits
+    while done < length:
+        deque(islice(steps, CANCEL_CHECK_STEPS), maxlen=0)
+        if cancel.is_set():
+            return False
+        done = algorithm.page_faults + algorithm.page_hits
+        if progress is not None:
+            progress(done)
+    return True
 
 
 class PageReplacementApp:
@@ -49,11 +145,6 @@ class PageReplacementApp:
             return  # 不继续执行，等待用户更正输入
         sequence_size = int(sequence_input)
         upper_bound = 10
-        # 动态生成页面序列并显示
-        page_sequence = generate_page_sequence(sequence_size, upper_bound)
-        self.sequence_display.delete(1.0, tk.END)  # 清除之前的内容
-        sequence_str = ' '.join(str(p) for p in page_sequence)
-        self.sequence_display.insert(tk.END, sequence_str)
 
         # 获取选择的物理块数和算法，并运行模拟
         frames = int(self.frame_number.get())
@@ -64,20 +155,8 @@ class PageReplacementApp:
         if not algorithm_name:
             messagebox.showerror("未选择算法", "请先选择一个页面置换算法。")
             return
-        algorithm_class = globals()[algorithm_name]
-        algorithm = algorithm_class(frames)
-        output_file = io.StringIO()
-        algorithm.simulate(page_sequence, output_file)
-
-        display = self.process_displays[algorithm_name]  # 获取相应算法的文本框
-        display.delete(1.0, tk.END)  # 清除旧的置换过程
-        display.insert(tk.END, output_file.getvalue())  # 显示新的置换过程
-        # 更新 self.results 字典
-        if algorithm_name not in self.results:
-            self.results[algorithm_name] = {'page_fault_rates': [], 'replacement_rates': []}
-
-        self.results[algorithm_name]['page_fault_rates'].append(algorithm.get_page_fault_rate())
-        self.results[algorithm_name]['replacement_rates'].append(algorithm.get_replacement_rate())
+        # 在后台线程中生成页面序列并运行模拟，置换过程和结果通过消息队列分块显示
+        self.start_worker([(algorithm_name, frames, True)], sequence_size, upper_bound)
 
     def run_all_simulations(self):
         # 验证页面序列大小输入
@@ -88,12 +167,6 @@ class PageReplacementApp:
 
         sequence_size = int(sequence_input)
         page_upper_bound = 10
-        page_sequence = generate_page_sequence(sequence_size, page_upper_bound)
-
-        # 显示动态生成的页面序列
-        self.sequence_display.delete(1.0, tk.END)
-        sequence_str = ' '.join(str(p) for p in page_sequence)
-        self.sequence_display.insert(tk.END, sequence_str)
 
         # 验证物理块数
         frames_input = self.frame_number.get()
@@ -104,28 +177,90 @@ class PageReplacementApp:
         frames = int(frames_input)
 
         # 初始化或清空 self.results 中的数据
-        self.results = {alg: {'page_fault_rates': [], 'replacement_rates': []} for alg in self.algorithms}
-
-        # 运行所有算法的模拟
-        for frame_count in self.frame_counts:
-            for alg_name in self.algorithms:
-                algorithm_class = globals()[alg_name]
-                algorithm = algorithm_class(frame_count)
-                output_file = io.StringIO()
-                algorithm.simulate(page_sequence, output_file)
-
-                # 保存每个算法在当前帧数下的性能数据
-                self.results[alg_name]['page_fault_rates'].append(algorithm.get_page_fault_rate())
-                self.results[alg_name]['replacement_rates'].append(algorithm.get_replacement_rate())
-
-                # 显示算法的置换过程
-                display = self.process_displays[alg_name]
-                display.delete(1.0, tk.END)
-                display.insert(tk.END, output_file.getvalue())
-
-        # 设置 simulations_run 标志为 True，表示已经运行了模拟
+        self.results = {alg: {} for alg in self.algorithms}
+
+        self.simulations_run = False
+
+        # 运行所有算法的模拟：只有最后一个帧数的置换过程会留在文本框中，其余帧数只需要缺页率和置换率
+        tasks = [(alg_name, frame_count, frame_count == self.frame_counts[-1])
+                 for frame_count in self.frame_counts for alg_name in self.algorithms]
+        # 全部完成后设置 simulations_run 标志为 True，表示已经运行了模拟；中途取消则保持为False
+        self.start_worker(tasks, sequence_size, page_upper_bound, on_done=self.on_all_simulations_done)
+
+    def on_all_simulations_done(self):
         self.simulations_run = True
 
+    def start_worker(self, tasks, sequence_size, upper_bound, on_done=None):
+        # 启动后台线程，运行期间禁用运行按钮、启用取消按钮，并开始轮询消息队列
+        if self.worker is not None and self.worker.is_alive():
+            messagebox.showerror("正在运行", "请等待当前模拟完成或先取消。")
+            return
+        self.sequence_display.delete(1.0, tk.END)  # 清除之前的内容
+        self.messages = queue.Queue()
+        self.cancel_event = threading.Event()
+        self.on_done = on_done
+        self.progress['value'] = 0
+        self.status.config(text="正在运行...")
+        self.run_button.state(['disabled'])
+        self.run_all_button.state(['disabled'])
+        self.cancel_button.state(['!disabled'])
+        self.worker = threading.Thread(target=simulation_worker, daemon=True,
+                                       args=(tasks, sequence_size, upper_bound, self.messages, self.cancel_event,
+                                             self.cache))
+        self.worker.start()
+        self.master.after(POLL_INTERVAL, self.poll_messages)
+
+    def cancel_simulation(self):
+        if self.cancel_event is not None:
+            self.cancel_event.set()
+            self.status.config(text="正在取消...")
+
+    def poll_messages(self):
+        # 在界面线程中处理后台线程的消息，每次最多插入CHUNKS_PER_POLL个文本块，其余留到下一次轮询
+        inserted = 0
+        while inserted < CHUNKS_PER_POLL:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == 'sequence':
+                self.sequence_display.insert(tk.END, message[1])
+                inserted += 1
+            elif kind == 'clear':
+                self.process_displays[message[1]].delete(1.0, tk.END)  # 清除旧的置换过程
+            elif kind == 'text':
+                self.process_displays[message[1]].insert(tk.END, message[2])  # 显示新的置换过程
+                inserted += 1
+            elif kind == 'result':
+                _, alg_name, frames, stats = message
+                # 按帧数保存每个算法的性能数据，与任务完成的顺序无关
+                self.results[alg_name][frames] = stats
+            elif kind == 'progress':
+                _, done, total = message
+                self.progress['value'] = 100 * done / total
+                self.status.config(text=f"已完成 {int(done)}/{total} 个模拟")
+            else:
+                self.finish_worker(kind, message)
+                return
+        self.master.after(POLL_INTERVAL, self.poll_messages)
+
+    def finish_worker(self, kind, message):
+        # 后台线程结束：恢复按钮状态，完成时调用回调
+        self.run_button.state(['!disabled'])
+        self.run_all_button.state(['!disabled'])
+        self.cancel_button.state(['disabled'])
+        if kind == 'done':
+            self.progress['value'] = 100
+            self.status.config(text="模拟完成")
+            if self.on_done is not None:
+                self.on_done()
+        elif kind == 'cancelled':
+            self.status.config(text="模拟已取消")
+        else:
+            self.status.config(text="模拟出错")
+            messagebox.showerror("模拟出错", message[1])
+
     def plot_all_performance(self):
         # 在尝试绘制性能图表之前检查是否已经运行了所有模拟
         if not self.simulations_run:
@@ -133,58 +268,42 @@ class PageReplacementApp:
             return  # 如果没有运行模拟，则不继续执行
         selected_frame = int(self.frame_number.get())  # 从下拉列表中获取用户选择的帧数
 
-        # 创建一个新的Tkinter窗口
-        plot_window = tk.Toplevel(self.master)
-        plot_window.title("Performance Plots")
-
-        # 创建一个matplotlib图形
-        fig, axs = plt.subplots(2, 1, figsize=(12, 6))
-
-        # 调整子图之间的垂直间距
-        fig.subplots_adjust(hspace=0.4)  # 调整这个值以增加间隔
-
-        # 在第一个子图中绘制缺页率
-        for alg_name, data in self.results.items():
-            # 获取与所选帧数相对应的结果
-            index = self.frame_counts.index(selected_frame)
-            page_fault_rate = data['page_fault_rates'][index]
-            bar = axs[0].bar(alg_name, page_fault_rate)
-            # 在柱状图上方添加文本
-            axs[0].text(bar[0].get_x() + bar[0].get_width() / 2, bar[0].get_height(),
-                        f'{page_fault_rate:.2f}', ha='center', va='bottom')
-
-        # axs[0].set_xlabel('Algorithms')
-        axs[0].set_ylabel('Page Fault Rate')
-        axs[0].set_title(f'Page Fault Rate Comparison for {selected_frame} Frames')
-
-        # 在第二个子图中绘制置换率
-        for alg_name, data in self.results.items():
-            # 获取与所选帧数相对应的结果
-            index = self.frame_counts.index(selected_frame)
-            replacement_rate = data['replacement_rates'][index]
-            bar = axs[1].bar(alg_name, replacement_rate)
-            # 在柱状图上方添加文本
-            axs[1].text(bar[0].get_x() + bar[0].get_width() / 2, bar[0].get_height(),
-                        f'{replacement_rate:.2f}', ha='center', va='bottom')
-
-        # axs[1].set_xlabel('Algorithms')
-        axs[1].set_ylabel('Replacement Rate')
-        axs[1].set_title(f'Replacement Rate Comparison for {selected_frame} Frames')
-
-        # 将matplotlib图形嵌入到Tkinter窗口中
-        canvas = FigureCanvasTkAgg(fig, master=plot_window)
-        canvas.get_tk_widget().pack()
-        canvas.draw()
-
-        plot_window.mainloop()  # 这是为了确保新窗口能够独立运行
+        if self.plot_window is None:
+            # 第一次查看时创建窗口和嵌入的matplotlib图形，关闭窗口只是隐藏，之后原地更新同一个图形
+            self.plot_window = tk.Toplevel(self.master)
+            self.plot_window.title("Performance Plots")
+            self.plot_window.protocol("WM_DELETE_WINDOW", self.plot_window.withdraw)
+            figure = Figure(figsize=(12, 6))
+            canvas = FigureCanvasTkAgg(figure, master=self.plot_window)
+            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+            self.comparison = ComparisonBars(figure)
+        else:
+            self.plot_window.deiconify()
+            self.plot_window.lift()
+
+        # 获取与所选帧数相对应的结果
+        names = list(self.results)
+        self.comparison.update(names, [self.results[name][selected_frame]['page_fault_rate'] for name in names],
+                               [self.results[name][selected_frame]['replacement_rate'] for name in names],
+                               selected_frame)
 
     def __init__(self, master):
         self.master = master
         self.master.title("页面置换算法模拟")
-        self.algorithms = ['FIFO', 'LRU', 'OPT', 'LFU', 'SimpleCLOCK', 'EnhancedCLOCK']
-        self.results = {alg: {'page_fault_rates': [], 'replacement_rates': []} for alg in self.algorithms}
+        self.algorithms = [alg.__name__ for alg in (FIFO, LRU, OPT, LFU, SimpleCLOCK, EnhancedCLOCK,
+                                                    ARC, TwoQ, LIRS, CLOCKPro)]
+        self.results = {alg: {} for alg in self.algorithms}  # 算法名称 -> {帧数: 模拟结果}
+        # 按页面序列哈希、算法和帧数缓存的模拟结果；每次点击都生成新的随机序列，只在本次会话中重复运行同一序列时命中，
+        # 因此只用内存层，不写磁盘
+        self.cache = ResultCache()
         self.frame_counts = [2, 3, 4, 5, 6, 7, 8]  # 定义 frame_counts 作为类属性
         self.simulations_run = False  # 添加一个新属性来跟踪是否已运行模拟
+        self.worker = None  # 运行模拟的后台线程
+        self.messages = None  # 后台线程发往界面线程的消息队列
+        self.cancel_event = None  # 取消当前模拟的请求
+        self.on_done = None  # 后台线程完成所有任务后在界面线程中调用的回调
+        self.plot_window = None  # 性能图窗口，只创建一次
+        self.comparison = None  # 性能图窗口中原地更新的柱状图
 
         # 物理块数下拉列表
         ttk.Label(master, text="选择物理块数:").grid(row=0, column=0, padx=10, pady=5, sticky='w')
@@ -194,7 +313,7 @@ class PageReplacementApp:
 
         # 算法选择下拉列表
         ttk.Label(master, text="选择算法:").grid(row=1, column=0, padx=10, pady=5, sticky='w')
-        self.algorithm = ttk.Combobox(master, values=('FIFO', 'LRU', 'OPT', 'LFU', 'SimpleCLOCK', 'EnhancedCLOCK'))
+        self.algorithm = ttk.Combobox(master, values=self.algorithms)
         self.algorithm.grid(row=1, column=1, padx=10, pady=5, sticky='w')
 
         # 页面序列大小输入
@@ -214,25 +333,36 @@ class PageReplacementApp:
         self.plot_button = ttk.Button(master, text="查看性能曲线图", command=self.plot_all_performance)
         self.plot_button.grid(row=2, column=1, columnspan=2, padx=10, pady=5)
 
+        # 进度条、取消按钮和状态文字
+        ttk.Label(master, text="进度:").grid(row=3, column=0, padx=10, pady=5, sticky='w')
+        self.progress = ttk.Progressbar(master, length=400, mode='determinate', maximum=100)
+        self.progress.grid(row=3, column=1, padx=10, pady=5, sticky='w')
+        self.cancel_button = ttk.Button(master, text="取消", command=self.cancel_simulation, state='disabled')
+        self.cancel_button.grid(row=3, column=1, columnspan=2, padx=10, pady=5, sticky='e')
+        self.status = ttk.Label(master, text="")
+        self.status.grid(row=4, column=1, padx=10, pady=5, sticky='w')
+
         # 显示置换过程的文本框
         self.process_displays = {}  # 创建一个字典来存储每个算法的文本框
-        for i, alg in enumerate(['FIFO', 'LRU', 'OPT', 'LFU', 'SimpleCLOCK', 'EnhancedCLOCK'], start=6):
+        for i, alg in enumerate(self.algorithms, start=6):
             ttk.Label(master, text=f"{alg} 算法:").grid(row=i, column=0, padx=10, pady=5, sticky='nw')
-            display = scrolledtext.ScrolledText(master, height=6, width=80)
+            display = scrolledtext.ScrolledText(master, height=4, width=80)
             display.grid(row=i, column=1, padx=10, pady=5)
             self.process_displays[alg] = display
 
         # 页面序列显示的文本框
-        ttk.Label(master, text="页面序列:").grid(row=12, column=0, padx=10, pady=5, sticky='nw')
+        sequence_row = 6 + len(self.algorithms)
+        ttk.Label(master, text="页面序列:").grid(row=sequence_row, column=0, padx=10, pady=5, sticky='nw')
         self.sequence_display = scrolledtext.ScrolledText(master, height=4, width=80)
-        self.sequence_display.grid(row=12, column=1, padx=10, pady=5)
+        self.sequence_display.grid(row=sequence_row, column=1, padx=10, pady=5)
 
         # 添加证明原创的标签，设置字体为宋体，颜色为红色
         originality_label = ttk.Label(master, text="海南大学21级计科李季鸿20213002624原创程序", foreground="red")
-        originality_label.grid(row=13, column=1, padx=10, pady=5, sticky='e')  # 根据需要调整位置
+        originality_label.grid(row=sequence_row + 1, column=1, padx=10, pady=5, sticky='e')  # 根据需要调整位置
 
 
-# 创建窗口和应用
-root = tk.Tk()
-app = PageReplacementApp(root)
-root.mainloop()
+# 创建窗口和应用，只在直接运行时创建，导入本模块不会打开窗口
+if __name__ == "__main__":
+    root = tk.Tk()
+    app = PageReplacementApp(root)
+    root.mainloop()
@@ -0,0 +1,298 @@
+import os
+import warnings
+from contextlib import nullcontext
+
+import numpy as np
+
+from PageReplacementAlgorithm import ACCESS_READ, ACCESS_WRITE
+
+# 分块读取时每块的记录数，内存占用与整个trace的大小无关
+CHUNK_SIZE = 1 << 20
+# valgrind lackey输出中的访问类型：指令读取、数据读、数据写、数据修改
+LACKEY_KINDS = ('I', 'L', 'S', 'M')
+# 文本trace行首访问类型字段 -> 访问类型，数据修改（先读后写）按写访问处理
+ACCESS_FIELDS = {'I': ACCESS_READ, 'L': ACCESS_READ, 'R': ACCESS_READ,
+                 'S': ACCESS_WRITE, 'M': ACCESS_WRITE, 'W': ACCESS_WRITE}
+# 十六进制数字中的字母，未指定进制时出现在不带0x前缀的数值中说明trace实际是十六进制
+HEX_LETTERS = frozenset('abcdefABCDEF')
+
+
+def access_path(path):
+    """
+    返回:
+    str: 与二进制trace配套的访问类型文件路径，每条记录一个字节（ACCESS_READ或ACCESS_WRITE）。
+    """
+    return path + '.access'
+
+
+def page_shift(page_size):
+    """
+    返回:
+    int: 页面大小为2的幂时对应的移位位数，否则为None（改用整除）。
+    """
+    if page_size & (page_size - 1) == 0:
+        return page_size.bit_length() - 1
+    return None
+
+
+class BinaryTrace:
+    def __init__(self, path, dtype='<u8', page_size=None, offset=0, chunk_size=CHUNK_SIZE, access_types=None):
+        """
+        以内存映射方式读取定长二进制trace，文件中每条记录是一个页面编号或虚拟地址。
+
+        参数:
+        path (str): trace文件路径。
+        dtype (str): 记录的numpy数据类型，默认小端uint64。
+        page_size (int): 记录为虚拟地址时的页面大小（字节），为None时记录即页面编号。
+        offset (int): 跳过的文件头字节数。
+        chunk_size (int): 分块迭代时每块的记录数。
+        access_types (str): 访问类型文件路径，为None时若存在同名的.access文件则使用它，否则没有访问类型。
+        """
+        self.path = path
+        self.page_size = page_size
+        self.chunk_size = chunk_size
+        dtype = np.dtype(dtype)
+        count = (os.path.getsize(path) - offset) // dtype.itemsize
+        # 空文件无法映射，用空数组代替
+        self.records = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,)) if count \
+            else np.empty(0, dtype=dtype)
+        if access_types is None and os.path.exists(access_path(path)):
+            access_types = access_path(path)
+        # 与记录平行的访问类型数组（uint8），没有访问类型文件时为None
+        self.access_types = None
+        if access_types is not None:
+            if os.path.getsize(access_types) != count:
+                raise ValueError(f"{access_types} 的记录数与 {path} 不一致。")
+            self.access_types = np.memmap(access_types, dtype=np.uint8, mode='r') if count \
+                else np.empty(0, dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return int(self.to_pages(self.records[index]))
+
+    def chunks(self):
+        """
+        逐块产生页面编号数组，每块最多chunk_size条记录。
+
+        返回:
+        generator: numpy.ndarray页面编号数组。
+        """
+        for start in range(0, len(self.records), self.chunk_size):
+            yield self.to_pages(self.records[start:start + self.chunk_size])
+
+    def access_chunks(self):
+        """
+        逐块产生页面编号数组和对应的访问类型数组，没有访问类型文件时全部为读访问。
+
+        返回:
+        generator: (numpy.ndarray页面编号, numpy.ndarray访问类型)。
+        """
+        for start in range(0, len(self.records), self.chunk_size):
+            pages = self.to_pages(self.records[start:start + self.chunk_size])
+            if self.access_types is None:
+                yield pages, np.full(len(pages), ACCESS_READ, dtype=np.uint8)
+            else:
+                yield pages, self.access_types[start:start + self.chunk_size]
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            yield from chunk.tolist()
+
+    def to_pages(self, records):
+        """
+        把一批记录换算为页面编号。
+
+        参数:
+        records (numpy.ndarray): 虚拟地址或页面编号。
+
+        返回:
+        numpy.ndarray: 页面编号。
+        """
+        if self.page_size is None:
+            return records
+        shift = page_shift(self.page_size)
+        if shift is not None:
+            return records >> records.dtype.type(shift)
+        return records // records.dtype.type(self.page_size)
+
+    def as_array(self):
+        """
+        返回整个trace的页面编号数组，供OPT等需要随机访问的算法使用。
+        记录本身就是页面编号时直接返回内存映射，不占用额外内存。
+
+        返回:
+        numpy.ndarray: 页面编号数组。
+        """
+        return self.to_pages(self.records)
+
+
+class TextTrace:
+    def __init__(self, path, page_size=4096, trace_format='address', include_instructions=True,
+                 chunk_size=CHUNK_SIZE, radix=None):
+        """
+        分块流式读取文本trace。
+
+        支持的格式:
+        'page': 每行一个十进制页面编号。
+        'address': 每行一个虚拟地址，行首可以带有访问类型字段。
+        'lackey': valgrind --tool=lackey --trace-mem=yes 的输出，如 " L 0421a058,8"。
+        'page'和'address'格式的访问类型字段取R或W，lackey的S和M按写访问处理，其余为读访问。
+
+        参数:
+        path: trace文件路径，或已打开的文本文件对象（如sys.stdin、套接字的makefile()）。
+        page_size (int): 页面大小（字节），'page'格式下忽略。
+        trace_format (str): trace格式。
+        include_instructions (bool): lackey格式下是否包含指令读取（I行）。
+        chunk_size (int): 每块读取的行数。
+        radix (int): 'page'和'address'格式中数值的进制（如10、16，16进制时可以带或不带0x前缀）；
+                     为None时'page'格式按十进制，'address'格式0x开头的按十六进制、其余按十进制（允许前导0），
+                     遇到不带0x前缀、含有a~f的数值时抛出ValueError，需要指定radix=16。
+
+        读取时按当前进制无法解析的数据行计入skipped_lines，读完后不为0时给出警告；
+        空行、注释和不含数字的行（如表头）不计入。
+        """
+        if trace_format not in ('page', 'address', 'lackey'):
+            raise ValueError(f"未知的trace格式: {trace_format}")
+        if radix is not None and not 2 <= radix <= 36:
+            raise ValueError(f"进制必须在2到36之间: {radix}")
+        self.path = path
+        self.page_size = page_size
+        self.trace_format = trace_format
+        self.include_instructions = include_instructions
+        self.chunk_size = chunk_size
+        self.radix = radix
+        self.skipped_lines = 0
+
+    def chunks(self):
+        """
+        逐块产生页面编号列表，每块对应文件中最多chunk_size行。
+
+        返回:
+        generator: 页面编号列表。
+        """
+        for pages, _ in self.access_chunks():
+            yield pages
+
+    def access_chunks(self):
+        """
+        逐块产生页面编号列表和对应的访问类型列表。
+
+        返回:
+        generator: (页面编号列表, 访问类型列表)。
+        """
+        shift = page_shift(self.page_size)
+        self.skipped_lines = 0
+        with open(self.path, 'r') if isinstance(self.path, (str, os.PathLike)) else nullcontext(self.path) as file:
+            while True:
+                lines = [line for _, line in zip(range(self.chunk_size), file)]
+                if not lines:
+                    break
+                access_types = []
+                addresses = self.parse(lines, access_types)
+                if self.trace_format == 'page':
+                    yield addresses, access_types
+                elif shift is not None:
+                    yield [address >> shift for address in addresses], access_types
+                else:
+                    yield [address // self.page_size for address in addresses], access_types
+        if self.skipped_lines:
+            warnings.warn(f"{self.path}: 跳过了 {self.skipped_lines} 行无法解析的数据行", stacklevel=2)
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            yield from chunk
+
+    def parse(self, lines, access_types=None):
+        """
+        解析一块文本行，跳过空行、注释和不含数字的行（如表头）；按当前进制无法解析的数据行也跳过，
+        并计入skipped_lines。
+
+        参数:
+        lines (list): 文本行。
+        access_types (list): 不为None时，把每条记录的访问类型追加到该列表中。
+
+        返回:
+        list: 页面编号（'page'格式）或虚拟地址。
+        """
+        values = []
+        for line in lines:
+            fields = line.split()
+            if not fields or fields[0].startswith(('#', '==')):
+                continue
+            try:
+                if self.trace_format == 'lackey':
+                    if len(fields) != 2 or fields[0] not in LACKEY_KINDS:
+                        continue
+                    if fields[0] == 'I' and not self.include_instructions:
+                        continue
+                    values.append(int(fields[1].split(',')[0], 16))
+                elif self.radix is not None:
+                    values.append(int(fields[-1], self.radix))
+                elif self.trace_format == 'page' or not fields[-1].lower().startswith('0x'):
+                    values.append(int(fields[-1], 10))
+                else:
+                    values.append(int(fields[-1], 16))
+            except ValueError:
+                if (self.trace_format != 'lackey' and self.radix is None and not HEX_LETTERS.isdisjoint(fields[-1])
+                        and any(c.isdigit() for c in fields[-1])):
+                    raise ValueError(f"{self.path}: 数值 {fields[-1]!r} 含有十六进制数字但没有0x前缀，"
+                                     f"请指定进制（radix=16）") from None
+                if any(c.isdigit() for c in line):
+                    self.skipped_lines += 1
+                continue
+            if access_types is not None:
+                access_types.append(ACCESS_FIELDS.get(fields[0].upper(), ACCESS_READ) if len(fields) > 1
+                                    else ACCESS_READ)
+        return values
+
+
+def open_trace(path, page_size=4096, trace_format=None, radix=None, **kwargs):
+    """
+    按扩展名打开trace文件：.bin、.u64为uint64虚拟地址，.pages为uint64页面编号，
+    .lackey为valgrind lackey输出，其余按每行一个地址的文本处理。
+
+    参数:
+    path (str): trace文件路径。
+    page_size (int): 页面大小（字节）。
+    trace_format (str): 指定格式，取 'binary'、'binary-pages' 或 TextTrace支持的格式，为None时按扩展名判断。
+    radix (int): 文本trace中数值的进制，见TextTrace，二进制trace忽略。
+    **kwargs: 传给BinaryTrace或TextTrace的其他参数。
+
+    返回:
+    BinaryTrace或TextTrace。
+    """
+    if trace_format is None:
+        extension = os.path.splitext(path)[1].lower()
+        trace_format = {'.bin': 'binary', '.u64': 'binary', '.pages': 'binary-pages',
+                        '.lackey': 'lackey'}.get(extension, 'address')
+    if trace_format == 'binary':
+        return BinaryTrace(path, page_size=page_size, **kwargs)
+    if trace_format == 'binary-pages':
+        return BinaryTrace(path, **kwargs)
+    return TextTrace(path, page_size=page_size, trace_format=trace_format, radix=radix, **kwargs)
+
+
+def write_binary_trace(trace, path, dtype='<u8', access_types=False):
+    """
+    把任意trace（或页面序列）的页面编号分块写成定长二进制文件，便于之后内存映射读取。
+
+    参数:
+    trace: BinaryTrace、TextTrace或页面序列。
+    path (str): 输出文件路径。
+    dtype (str): 输出记录的numpy数据类型。
+    access_types: 为True时把trace的访问类型写入同名的.access文件；
+                  trace为页面序列时也可以直接传入与之等长的访问类型序列。
+    """
+    if access_types is False or access_types is None:
+        chunks = trace.chunks() if hasattr(trace, 'chunks') else [trace]
+        with open(path, 'wb') as file:
+            for chunk in chunks:
+                file.write(np.asarray(chunk, dtype=dtype).tobytes())
+        return
+    chunks = trace.access_chunks() if hasattr(trace, 'access_chunks') else [(trace, access_types)]
+    with open(path, 'wb') as file, open(access_path(path), 'wb') as access_file:
+        for pages, chunk_access_types in chunks:
+            file.write(np.asarray(pages, dtype=dtype).tobytes())
+            access_file.write(np.asarray(chunk_access_types, dtype=np.uint8).tobytes())
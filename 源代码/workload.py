@@ -0,0 +1,175 @@
+import numpy as np
+
+# 分块生成时每块的页面数，避免一次生成上亿个随机数时占用过多的临时内存
+CHUNK_SIZE = 1 << 22
+
+
+def uniform_sequence(size, upper_bound, seed=None):
+    """
+    生成均匀分布的页面序列，页面编号从1到upper_bound。
+
+    参数:
+    size (int): 页面序列的大小。
+    upper_bound (int): 页面编号的上限。
+    seed: 随机数种子。
+
+    返回:
+    numpy.ndarray: int32页面序列。
+    """
+    rng = np.random.default_rng(seed)
+    return rng.integers(1, upper_bound + 1, size=size, dtype=np.int32)
+
+
+def zipf_sequence(size, upper_bound, alpha=1.0, seed=None, shuffle=True):
+    """
+    生成有界Zipf分布的页面序列：第k热的页面被访问的概率正比于1 / k^alpha。
+
+    参数:
+    size (int): 页面序列的大小。
+    upper_bound (int): 页面编号的上限。
+    alpha (float): 偏斜程度，越大访问越集中。
+    seed: 随机数种子。
+    shuffle (bool): 是否打乱热度排名与页面编号的对应关系，否则页面1最热。
+
+    返回:
+    numpy.ndarray: int32页面序列。
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.arange(1, upper_bound + 1, dtype=np.float64) ** -alpha
+    probability, alias = alias_table(weights / weights.sum())
+    pages = np.arange(1, upper_bound + 1, dtype=np.int32)
+    if shuffle:
+        rng.shuffle(pages)
+    sequence = np.empty(size, dtype=np.int32)
+    for start in range(0, size, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, size)
+        # 别名采样：先均匀选一列，再按该列的概率决定取该列本身还是它的别名
+        ranks = rng.integers(0, upper_bound, size=stop - start, dtype=np.int32)
+        ranks = np.where(rng.random(stop - start) < probability[ranks], ranks, alias[ranks])
+        sequence[start:stop] = pages[ranks]
+    return sequence
+
+
+def alias_table(probabilities):
+    """
+    用Vose方法构造别名表，之后每次采样都是O(1)。
+
+    参数:
+    probabilities (numpy.ndarray): 和为1的概率分布。
+
+    返回:
+    tuple: (每列取本身的概率, 每列的别名) 两个数组。
+    """
+    size = len(probabilities)
+    scaled = (probabilities * size).tolist()
+    probability = [1.0] * size
+    alias = list(range(size))
+    small = [i for i, value in enumerate(scaled) if value < 1.0]
+    large = [i for i, value in enumerate(scaled) if value >= 1.0]
+    while small and large:
+        less, more = small.pop(), large[-1]
+        probability[less] = scaled[less]
+        alias[less] = more
+        # 较大的一列补足较小的一列后剩余的概率
+        scaled[more] += scaled[less] - 1.0
+        if scaled[more] < 1.0:
+            small.append(large.pop())
+    return np.array(probability), np.array(alias, dtype=np.int32)
+
+
+def working_set_sequence(size, upper_bound, working_set_size, phase_length, seed=None):
+    """
+    生成带阶段切换的工作集页面序列：每个阶段在随机选出的working_set_size个页面中均匀访问，
+    每phase_length次访问切换到新的工作集。
+
+    参数:
+    size (int): 页面序列的大小。
+    upper_bound (int): 页面编号的上限。
+    working_set_size (int): 每个阶段工作集的页面数。
+    phase_length (int): 每个阶段的访问次数。
+    seed: 随机数种子。
+
+    返回:
+    numpy.ndarray: int32页面序列。
+    """
+    rng = np.random.default_rng(seed)
+    sequence = np.empty(size, dtype=np.int32)
+    for start in range(0, size, phase_length):
+        stop = min(start + phase_length, size)
+        working_set = rng.choice(upper_bound, size=working_set_size, replace=False).astype(np.int32) + 1
+        sequence[start:stop] = working_set[rng.integers(0, working_set_size, size=stop - start)]
+    return sequence
+
+
+def scan_sequence(size, start=1):
+    """
+    生成顺序扫描的页面序列：从start开始依次访问从未访问过的页面。
+
+    参数:
+    size (int): 页面序列的大小。
+    start (int): 第一个页面的编号。
+
+    返回:
+    numpy.ndarray: int32页面序列。
+    """
+    return np.arange(start, start + size, dtype=np.int32)
+
+
+def loop_sequence(size, loop_length, start=1):
+    """
+    生成循环访问的页面序列：反复依次访问start到start + loop_length - 1这些页面。
+
+    参数:
+    size (int): 页面序列的大小。
+    loop_length (int): 循环中的页面数。
+    start (int): 循环中第一个页面的编号。
+
+    返回:
+    numpy.ndarray: int32页面序列。
+    """
+    return (np.arange(size, dtype=np.int64) % loop_length + start).astype(np.int32)
+
+
+def mixture_sequence(size, components, block_length=1, seed=None):
+    """
+    按权重交织多个页面序列生成器的输出。序列被切成长为block_length的块，每块随机分给一个组成部分，
+    各组成部分内部保持自己的访问顺序（例如扫描仍是顺序的）。
+
+    参数:
+    size (int): 页面序列的大小。
+    components (list): (权重, 生成函数, 参数字典) 的列表，生成函数的第一个参数为页面数，
+                       接受seed参数的生成函数会得到由seed派生的种子。
+    block_length (int): 每块的访问次数。
+    seed: 随机数种子。
+
+    返回:
+    numpy.ndarray: int32页面序列。
+    """
+    rng = np.random.default_rng(seed)
+    weights = np.array([weight for weight, _, _ in components], dtype=np.float64)
+    blocks = -(-size // block_length)
+    owner = np.repeat(rng.choice(len(components), size=blocks, p=weights / weights.sum()), block_length)[:size]
+    sequence = np.empty(size, dtype=np.int32)
+    for index, (_, generator, kwargs) in enumerate(components):
+        positions = np.flatnonzero(owner == index)
+        if positions.size == 0:
+            continue
+        kwargs = dict(kwargs)
+        if generator in SEEDED_GENERATORS:
+            kwargs.setdefault('seed', int(rng.integers(2 ** 63)))
+        sequence[positions] = generator(positions.size, **kwargs)
+    return sequence
+
+
+# 接受seed参数的生成函数
+SEEDED_GENERATORS = (uniform_sequence, zipf_sequence, working_set_sequence, mixture_sequence)
+
+# 生成函数名称 -> 生成函数，便于按名称选择负载模型
+WORKLOADS = {
+    'uniform': uniform_sequence,
+    'zipf': zipf_sequence,
+    'working_set': working_set_sequence,
+    'scan': scan_sequence,
+    'loop': loop_sequence,
+    'mixture': mixture_sequence,
+}